@@ -0,0 +1,36 @@
+# app/__main__.py
+import argparse
+import logging
+from .core.server import serve
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Run the production server")
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument(
+        "--workers", type=int, default=0,
+        help="Worker processes (default: WEB_WORKERS or one per CPU)"
+    )
+    serve_parser.add_argument(
+        "--max-connections", type=int, default=None,
+        help="Postgres connections the app may use in total "
+             "(default: DB_MAX_CONNECTIONS or the server's max_connections)"
+    )
+    serve_parser.add_argument("--graceful-timeout", type=int, default=30)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "serve":
+        serve(
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            max_connections=args.max_connections,
+            graceful_timeout=args.graceful_timeout
+        )
+
+if __name__ == "__main__":
+    main()
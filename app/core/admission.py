@@ -0,0 +1,288 @@
+# app/core/admission.py
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from . import profiling
+
+# Route classes in priority order: when a slot of the shared capacity frees
+# up, waiting reads are admitted before writes, and writes before bulk
+# operations. Per-class limits are separate: a class at its own limit does
+# not hold back the others.
+ROUTE_CLASSES = ("read", "write", "bulk")
+
+# Endpoints that touch many rows per request
+BULK_PATH_SUFFIXES = ("/batch",)
+
+# Share of the capacity a class may hold when its limit is not configured:
+# reads may take all of it, writes half and bulk operations a quarter
+CLASS_SHARES = {"read": 1.0, "write": 0.5, "bulk": 0.25}
+
+def class_limits(capacity: int, configured: Dict[str, int]) -> Dict[str, int]:
+    """Per-class limits; a configured limit of 0 is derived from capacity"""
+    return {
+        name: configured.get(name) or max(int(capacity * CLASS_SHARES[name]), 1)
+        for name in ROUTE_CLASSES
+    }
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: int):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+class _ClassState:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        # (enqueued at, future), oldest first
+        self.waiters: Deque[Tuple[float, asyncio.Future]] = deque()
+        # Since when queued requests have waited longer than the target
+        self.above_target_since: Optional[float] = None
+        self.overloaded = False
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.rejected_overload = 0
+        self.waits: Deque[float] = deque(maxlen=1000)
+        self.latencies: Deque[float] = deque(maxlen=1000)
+
+def _p99(values: Deque[float]) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * 0.99))] if values else 0.0
+
+class AdmissionController:
+    """
+    Bounds concurrent requests per route class and overall, so requests wait
+    here in a short, bounded queue instead of piling up on pool.acquire().
+
+    Queue depth alone does not bound latency, so waiting time does too, in
+    the manner of CoDel: once admitted requests of a class have queued
+    longer than target_wait for a whole interval, the class is overloaded.
+    An overloaded class serves its newest waiters first and sheds those
+    that have waited past target_wait with a 503, until its queue drains.
+    max_wait still caps the wait of any one request.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        capacity: int,
+        max_queue: int = 100,
+        max_wait: float = 2.0,
+        target_wait: float = 0.1,
+        interval: float = 0.5,
+        retry_after: int = 1
+    ):
+        self._classes = {name: _ClassState(limits[name]) for name in ROUTE_CLASSES}
+        self._capacity = capacity
+        self._active = 0
+        self._max_queue = max_queue
+        self._max_wait = max_wait
+        self._target_wait = target_wait
+        self._interval = interval
+        self._retry_after = retry_after
+
+    def _has_slot(self, state: _ClassState) -> bool:
+        return state.active < state.limit and self._active < self._capacity
+
+    def _queued_ahead(self, route_class: str) -> bool:
+        """
+        Whether a new request of this class must queue behind waiters: those
+        of its own class, or higher-priority ones waiting for shared
+        capacity. Higher-priority waiters held back by their own class
+        limit have no claim on a slot of this class.
+        """
+        for name in ROUTE_CLASSES:
+            state = self._classes[name]
+            if name == route_class:
+                return bool(state.waiters)
+            if state.waiters and state.active < state.limit:
+                return True
+        return False
+
+    def _grant(self) -> None:
+        now = time.monotonic()
+        for name in ROUTE_CLASSES:
+            state = self._classes[name]
+            while state.waiters and self._has_slot(state):
+                if state.overloaded:
+                    enqueued, waiter = state.waiters.pop()
+                else:
+                    enqueued, waiter = state.waiters.popleft()
+                state.active += 1
+                self._active += 1
+                waiter.set_result(None)
+                self._track_wait(state, now - enqueued, now)
+            if not state.waiters:
+                state.above_target_since = None
+                state.overloaded = False
+
+    def _track_wait(self, state: _ClassState, wait: float, now: float) -> None:
+        # Served last in, first out, an overloaded class waits little by
+        # design; it recovers once its queue drains
+        if state.overloaded:
+            return
+        if wait < self._target_wait:
+            state.above_target_since = None
+        elif state.above_target_since is None:
+            state.above_target_since = now
+        elif now - state.above_target_since >= self._interval:
+            state.overloaded = True
+
+    async def acquire(self, route_class: str) -> None:
+        state = self._classes[route_class]
+        started = time.monotonic()
+
+        if not self._queued_ahead(route_class) and self._has_slot(state):
+            state.active += 1
+            self._active += 1
+            state.admitted += 1
+            state.waits.append(0.0)
+            return
+
+        if len(state.waiters) >= self._max_queue:
+            state.rejected_queue_full += 1
+            raise AdmissionRejected(
+                429, "Too many requests queued, retry later", self._retry_after
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (started, waiter)
+        state.waiters.append(entry)
+        try:
+            await self._wait(state, waiter, started)
+        except AdmissionRejected:
+            self._abandon(state, entry, route_class)
+            raise
+        except asyncio.CancelledError:
+            self._abandon(state, entry, route_class)
+            raise
+
+        state.admitted += 1
+        state.waits.append(time.monotonic() - started)
+
+    async def _wait(
+        self, state: _ClassState, waiter: asyncio.Future, started: float
+    ) -> None:
+        """
+        Wait for the slot in steps of target_wait, so the waiter is shed
+        soon after it passes the target while its class is overloaded
+        """
+        deadline = started + self._max_wait
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                state.rejected_timeout += 1
+                break
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(waiter), min(remaining, self._target_wait)
+                )
+                return
+            except asyncio.TimeoutError:
+                if waiter.done():
+                    continue
+                # Still queued: the queue has not drained since it arrived
+                now = time.monotonic()
+                self._track_wait(state, now - started, now)
+                if state.overloaded:
+                    state.rejected_overload += 1
+                    break
+        raise AdmissionRejected(
+            503, "Server is overloaded, retry later", self._retry_after
+        )
+
+    def _abandon(
+        self,
+        state: _ClassState,
+        entry: Tuple[float, asyncio.Future],
+        route_class: str
+    ) -> None:
+        waiter = entry[1]
+        if waiter.done():
+            # Granted just as the caller gave up; hand the slot on
+            self.release(route_class)
+        else:
+            state.waiters.remove(entry)
+            # Waiters queued behind this one may fit now
+            self._grant()
+
+    def release(self, route_class: str, latency: Optional[float] = None) -> None:
+        """Free the slot; `latency` is the request's time since acquire()"""
+        state = self._classes[route_class]
+        state.active -= 1
+        self._active -= 1
+        if latency is not None:
+            state.latencies.append(latency)
+        self._grant()
+
+    def limit(self, route_class: str) -> int:
+        return self._classes[route_class].limit
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for name, state in self._classes.items():
+            result[name] = {
+                "limit": state.limit,
+                "active": state.active,
+                "queued": len(state.waiters),
+                "admitted": state.admitted,
+                "rejected_queue_full": state.rejected_queue_full,
+                "rejected_timeout": state.rejected_timeout,
+                "rejected_overload": state.rejected_overload,
+                "overloaded": state.overloaded,
+                "wait_p99_seconds": _p99(state.waits),
+                "latency_p99_seconds": _p99(state.latencies),
+            }
+        return result
+
+def classify_request(method: str, path: str) -> str:
+    if path.endswith(BULK_PATH_SUFFIXES):
+        return "bulk"
+    if method in ("GET", "HEAD"):
+        return "read"
+    return "write"
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an AdmissionController to API requests"""
+
+    def __init__(self, app, controller: AdmissionController, path_prefix: str):
+        self.app = app
+        self.controller = controller
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        route_class = classify_request(scope["method"], scope["path"])
+        started = time.perf_counter()
+        try:
+            await self.controller.acquire(route_class)
+        except AdmissionRejected as exc:
+            await send_rejection(send, exc)
+            return
+        finally:
+            profiling.record("admission_wait", time.perf_counter() - started)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route_class, time.perf_counter() - started)
+
+async def send_rejection(send, exc: AdmissionRejected) -> None:
+    body = json.dumps({"detail": exc.detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": exc.status_code,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(exc.retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -1,8 +1,12 @@
 # app/core/database.py
+import asyncio
+import time
 import asyncpg
-from fastapi import Request
+from fastapi import HTTPException, Request, status
+from . import profiling
 from .config import get_settings
-from typing import AsyncGenerator
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator
 
 async def get_pool() -> asyncpg.Pool:
     settings = get_settings()
@@ -11,10 +15,45 @@ async def get_pool() -> asyncpg.Pool:
         password=settings.POSTGRES_PASSWORD,
         host=settings.POSTGRES_HOST,
         port=settings.POSTGRES_PORT,
-        database=settings.POSTGRES_DB
+        database=settings.POSTGRES_DB,
+        min_size=settings.DB_POOL_MIN_SIZE,
+        max_size=settings.DB_POOL_MAX_SIZE
     )
 
+@asynccontextmanager
+async def connection(pool: asyncpg.Pool) -> AsyncIterator[asyncpg.Connection]:
+    """Acquire a pooled connection, failing fast with 503 when none frees up"""
+    settings = get_settings()
+    profile = profiling.current()
+    started = time.perf_counter()
+    try:
+        conn = await pool.acquire(timeout=settings.POOL_ACQUIRE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No database connection available, retry later",
+            headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)}
+        )
+    finally:
+        profiling.record("pool_wait", time.perf_counter() - started)
+
+    # Time this request's queries when the profiler is on
+    if profile:
+        conn.add_query_logger(profile.on_query)
+    try:
+        yield conn
+    finally:
+        if profile:
+            conn.remove_query_logger(profile.on_query)
+        await pool.release(conn)
+
 async def get_connection(request: Request) -> AsyncGenerator[asyncpg.Connection, None]:
     """Get database connection from pool stored in app state"""
-    async with request.app.state.pool.acquire() as conn:
-        yield conn
\ No newline at end of file
+    pool = getattr(request.app.state, "pool", None)
+    if pool is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="This endpoint needs the postgres storage backend"
+        )
+    async with connection(pool) as conn:
+        yield conn
@@ -0,0 +1,306 @@
+# app/core/profiling.py
+"""
+On-demand request profiling.
+
+A request is profiled when it sends PROFILE_HEADER with the configured token,
+or at random at the configured sample rate. While profiled requests are in
+flight a background thread samples the event loop thread's stack every
+interval; a sample belongs to a request when that request's middleware frame
+is on the stack, i.e. the request was running rather than waiting.
+
+Each profile records:
+  * waits, measured: db (query time), pool_wait, admission_wait
+  * on-CPU time, sampled and split into validation (request parsing and
+    model construction), serialization (response encoding, including
+    FastAPI's response validation) and app (everything else)
+  * the sampled stacks, as collapsed stacks ("a;b;c count") that
+    flamegraph.pl, speedscope and similar tools read directly
+
+Requests that are not sampled still have their waits measured, which costs
+a few timer reads per query. Profiled requests asked for by header, and any
+request slower than the threshold, go into a bounded ring buffer read by
+/system/profiles; a slow request that was not sampled has no stacks, only
+its waits and the unaccounted rest.
+"""
+import contextvars
+import hmac
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from types import CodeType, FrameType
+from typing import Deque, Dict, List, Optional, Tuple
+
+PROFILE_HEADER = "x-profile-token"
+
+# (file suffix, function) of FastAPI/Starlette steps that count as one phase
+SERIALIZATION_STEPS = {
+    ("fastapi/routing.py", "serialize_response"),
+    ("fastapi/encoders.py", "jsonable_encoder"),
+    ("starlette/responses.py", "render"),
+}
+VALIDATION_STEPS = {
+    ("fastapi/dependencies/utils.py", "request_body_to_args"),
+    ("fastapi/dependencies/utils.py", "request_params_to_args"),
+}
+
+_current: contextvars.ContextVar[Optional["Profile"]] = contextvars.ContextVar(
+    "profile", default=None
+)
+
+def current() -> Optional["Profile"]:
+    """The profile of the running request, sampled or not"""
+    return _current.get()
+
+def record(wait: str, seconds: float) -> None:
+    """Add a measured wait (db, pool_wait, ...) to the running profile"""
+    profile = _current.get()
+    if profile is not None:
+        profile.add_wait(wait, seconds)
+
+def _label(code: CodeType) -> str:
+    path = code.co_filename.replace(os.sep, "/")
+    short = "/".join(path.rsplit("/", 2)[-2:])
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({short}:{code.co_firstlineno})"
+
+def _matches(code: CodeType, steps) -> bool:
+    return any(
+        code.co_name == name and code.co_filename.replace(os.sep, "/").endswith(suffix)
+        for suffix, name in steps
+    )
+
+def classify(codes: List[CodeType]) -> str:
+    """Phase of one sampled stack, given outermost first"""
+    if any(_matches(code, SERIALIZATION_STEPS) for code in codes):
+        return "serialization"
+    if any(_matches(code, VALIDATION_STEPS) for code in codes):
+        return "validation"
+    for code in reversed(codes):
+        if "/pydantic/" in code.co_filename.replace(os.sep, "/"):
+            if "dump" in code.co_name or "serializ" in code.co_name:
+                return "serialization"
+            return "validation"
+    return "app"
+
+class Profile:
+    def __init__(self, profile_id: int, method: str, path: str, reason: str):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started_at = datetime.utcnow()
+        self._started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.status_code: Optional[int] = None
+        self.queries = 0
+        self.waits: Counter = Counter()
+        # Guarded by the Profiler's lock while sampling
+        self.stacks: Counter = Counter()
+        self.phases: Counter = Counter()
+        # Seconds per sample; 0 when the request is not sampled
+        self.interval = 0.0
+
+    def add_wait(self, wait: str, seconds: float) -> None:
+        self.waits[wait] += seconds
+
+    def on_query(self, record) -> None:
+        """asyncpg query logger"""
+        self.queries += 1
+        self.add_wait("db", record.elapsed)
+
+    def elapsed(self) -> float:
+        if self.duration is not None:
+            return self.duration
+        return time.perf_counter() - self._started
+
+    def breakdown(self) -> Dict[str, float]:
+        """Milliseconds per wait and sampled phase; 'other' is the rest"""
+        result = {wait: self.waits.get(wait, 0.0) for wait in ("db", "pool_wait", "admission_wait")}
+        if self.interval:
+            for phase in ("validation", "serialization", "app"):
+                result[phase] = self.phases.get(phase, 0) * self.interval
+        result["other"] = max(self.elapsed() - sum(result.values()), 0.0)
+        return {key: round(value * 1000, 2) for key, value in result.items()}
+
+    def collapsed(self) -> List[str]:
+        root = f"{self.method} {self.path}".replace(";", ":")
+        return [
+            ";".join((root,) + stack) + f" {count}"
+            for stack, count in self.stacks.most_common()
+        ]
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "reason": self.reason,
+            "status_code": self.status_code,
+            "started_at": self.started_at,
+            "duration_ms": round(self.elapsed() * 1000, 2),
+            "queries": self.queries,
+            "samples": sum(self.stacks.values()),
+            "breakdown_ms": self.breakdown(),
+        }
+
+class Profiler:
+    def __init__(
+        self,
+        token: str = "",
+        sample_rate: float = 0.0,
+        interval: float = 0.005,
+        slow_threshold: float = 0.5,
+        buffer_size: int = 50
+    ):
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.profiles: Deque[Profile] = deque(maxlen=buffer_size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        # Middleware frame of each running profiled request -> (thread, profile)
+        self._active: Dict[FrameType, Tuple[int, Profile]] = {}
+        self._thread: Optional[threading.Thread] = None
+        # Switch interval to restore once no request is being sampled
+        self._switch_interval: Optional[float] = None
+
+    def authorized(self, token: Optional[str]) -> bool:
+        return bool(self.token) and token is not None and hmac.compare_digest(
+            token.encode(), self.token.encode()
+        )
+
+    def reason(self, token: Optional[str]) -> Optional[str]:
+        """Why a request with this header value should be profiled, if at all"""
+        if token is not None and self.authorized(token):
+            return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        return None
+
+    def track(self, method: str, path: str) -> Profile:
+        """Profile of a request that is timed but not sampled"""
+        return Profile(next(self._ids), method, path, "slow")
+
+    def start(self, method: str, path: str, reason: str, frame: FrameType) -> Profile:
+        profile = Profile(next(self._ids), method, path, reason)
+        profile.interval = self.interval
+        with self._lock:
+            if not self._active:
+                # The sampler only runs when the loop thread lets go of the
+                # GIL; have it do so at least once per sampling interval
+                # while any request is being sampled
+                self._switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(min(self._switch_interval, self.interval))
+            self._active[frame] = (threading.get_ident(), profile)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._sample, name="request-profiler", daemon=True
+                )
+                self._thread.start()
+        return profile
+
+    def stop(self, frame: FrameType) -> None:
+        with self._lock:
+            self._active.pop(frame, None)
+            if not self._active and self._switch_interval is not None:
+                sys.setswitchinterval(self._switch_interval)
+                self._switch_interval = None
+
+    def finish(self, profile: Profile, status_code: Optional[int]) -> None:
+        profile.duration = profile.elapsed()
+        profile.status_code = status_code
+        if profile.reason == "header" or profile.duration >= self.slow_threshold:
+            self.profiles.append(profile)
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        for profile in self.profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def _sample(self) -> None:
+        try:
+            while True:
+                time.sleep(self.interval)
+                with self._lock:
+                    if not self._active:
+                        return
+                    frames = sys._current_frames()
+                    for thread_id in {thread for thread, _ in self._active.values()}:
+                        self._attribute(frames.get(thread_id))
+        finally:
+            with self._lock:
+                self._thread = None
+
+    def _attribute(self, frame: Optional[FrameType]) -> None:
+        """Charge one sample of a thread's stack to the request running on it"""
+        codes = []
+        while frame is not None:
+            entry = self._active.get(frame)
+            if entry is not None:
+                codes.reverse()
+                profile = entry[1]
+                profile.stacks[tuple(_label(code) for code in codes)] += 1
+                profile.phases[classify(codes)] += 1
+                return
+            codes.append(frame.f_code)
+            frame = frame.f_back
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling requests picked by a Profiler"""
+
+    def __init__(self, app, profiler: Profiler, path_prefix: str):
+        self.app = app
+        self.profiler = profiler
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode():
+                token = value.decode("latin-1")
+        reason = self.profiler.reason(token)
+        status_code = None
+
+        frame = sys._getframe()
+        if reason is None:
+            profile = self.profiler.track(scope["method"], scope["path"])
+        else:
+            profile = self.profiler.start(scope["method"], scope["path"], reason, frame)
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if reason == "header":
+                    message = dict(message)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-profile-id", str(profile.id).encode()),
+                        (b"server-timing", server_timing(profile).encode()),
+                    ]
+            await send(message)
+
+        reset = _current.set(profile)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(reset)
+            if reason is not None:
+                self.profiler.stop(frame)
+            self.profiler.finish(profile, status_code)
+
+def server_timing(profile: Profile) -> str:
+    """Server-Timing header value, as far as the request has got"""
+    parts = [f"total;dur={round(profile.elapsed() * 1000, 2)}"]
+    parts += [f"{name};dur={value}" for name, value in profile.breakdown().items()]
+    return ", ".join(parts)
@@ -0,0 +1,194 @@
+# app/core/server.py
+import asyncio
+import importlib.util
+import logging
+import os
+import sys
+from typing import Optional, Tuple
+import asyncpg
+from .config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+APP_PATH = "app.main:app"
+
+# Used when max_connections can't be read: the Postgres default (100) less
+# its default superuser_reserved_connections (3)
+DEFAULT_CONNECTION_BUDGET = 97
+
+def cpu_count() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS/Windows
+        return os.cpu_count() or 1
+
+def select_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+def select_http() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+async def probe_connection_budget() -> Optional[int]:
+    """Connections available to the app according to the server settings"""
+    settings = get_settings()
+    try:
+        conn = await asyncpg.connect(
+            user=settings.POSTGRES_USER,
+            password=settings.POSTGRES_PASSWORD,
+            host=settings.POSTGRES_HOST,
+            port=settings.POSTGRES_PORT,
+            database=settings.POSTGRES_DB,
+            timeout=5
+        )
+    except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as exc:
+        logger.warning("Could not read max_connections from Postgres: %s", exc)
+        return None
+    try:
+        max_connections = int(await conn.fetchval('SHOW max_connections'))
+        reserved = int(await conn.fetchval('SHOW superuser_reserved_connections'))
+    finally:
+        await conn.close()
+    return max_connections - reserved
+
+def pool_overhead(settings: Settings) -> int:
+    """
+    Connections of each worker's pool that don't serve admitted requests
+    directly: exact counts beside their page query, and the write
+    coalescer's own connection
+    """
+    return settings.DB_COUNT_CONNECTIONS + (1 if settings.WRITE_COALESCE_ENABLED else 0)
+
+def request_capacity(settings: Settings) -> int:
+    """Requests a worker can run at once with a connection each"""
+    return max(settings.DB_POOL_MAX_SIZE - pool_overhead(settings), 1)
+
+def plan_workers(
+    workers: int,
+    budget: Optional[int]
+) -> Tuple[int, int, int]:
+    """
+    Split the connection budget across worker processes.
+    Returns (workers, pool_min_size, pool_max_size) such that
+    workers * pool_max_size never exceeds the budget, and each pool has
+    room for its pool_overhead() plus at least one request.
+    """
+    settings = get_settings()
+    workers = workers or settings.WEB_WORKERS or cpu_count()
+    per_worker_min = pool_overhead(settings) + 1
+    pool_max = max(settings.DB_POOL_MAX_SIZE, per_worker_min)
+
+    if budget is not None:
+        budget -= settings.DB_RESERVED_CONNECTIONS
+        fit = budget // per_worker_min
+        if fit < 1:
+            raise SystemExit(
+                f"Not enough database connections for one worker "
+                f"(budget {budget}, {per_worker_min} needed)"
+            )
+        if workers > fit:
+            logger.warning(
+                "Reducing workers from %d to %d to fit %d connections",
+                workers, fit, budget
+            )
+            workers = fit
+        pool_max = min(pool_max, budget // workers)
+
+    pool_min = min(settings.DB_POOL_MIN_SIZE, pool_max)
+    return workers, pool_min, pool_max
+
+def serve(
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    workers: int = 0,
+    max_connections: Optional[int] = None,
+    graceful_timeout: int = 30
+) -> None:
+    settings = get_settings()
+    budget = max_connections or settings.DB_MAX_CONNECTIONS or None
+    if budget is None:
+        budget = asyncio.run(probe_connection_budget())
+    if budget is None:
+        logger.warning(
+            "Assuming the default budget of %d connections; set "
+            "DB_MAX_CONNECTIONS to override", DEFAULT_CONNECTION_BUDGET
+        )
+        budget = DEFAULT_CONNECTION_BUDGET
+
+    workers, pool_min, pool_max = plan_workers(workers, budget)
+    loop, http = select_loop(), select_http()
+    logger.info(
+        "Starting %d worker(s), pool %d-%d connections each, loop=%s http=%s",
+        workers, pool_min, pool_max, loop, http
+    )
+
+    # Workers read their pool size from the environment
+    os.environ["DB_POOL_MIN_SIZE"] = str(pool_min)
+    os.environ["DB_POOL_MAX_SIZE"] = str(pool_max)
+    get_settings.cache_clear()
+
+    if importlib.util.find_spec("gunicorn"):
+        _serve_gunicorn(host, port, workers, loop, http, graceful_timeout)
+    else:
+        # No preforking without gunicorn (e.g. on Windows): uvicorn spawns
+        # the workers itself and each imports the app
+        import uvicorn
+        uvicorn.run(
+            APP_PATH,
+            host=host,
+            port=port,
+            workers=workers,
+            loop=loop,
+            http=http,
+            timeout_graceful_shutdown=graceful_timeout
+        )
+
+def _serve_gunicorn(
+    host: str,
+    port: int,
+    workers: int,
+    loop: str,
+    http: str,
+    graceful_timeout: int
+) -> None:
+    from gunicorn.app.base import BaseApplication
+    from gunicorn.arbiter import Arbiter
+    try:
+        from uvicorn_worker import UvicornWorker
+    except ImportError:
+        from uvicorn.workers import UvicornWorker
+
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {**UvicornWorker.CONFIG_KWARGS, "loop": loop, "http": http}
+
+    class Application(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", Worker)
+            # Import the app once in the master; workers fork with it loaded
+            # and start fast. SIGHUP replaces workers gracefully but they
+            # fork from the same master, so they run the code it loaded: new
+            # code needs a restart, or USR2 (see run())
+            self.cfg.set("preload_app", True)
+            self.cfg.set("graceful_timeout", graceful_timeout)
+            self.cfg.set("timeout", graceful_timeout * 2)
+
+        def load(self):
+            from ..main import app
+            return app
+
+        def run(self):
+            # USR2 re-executes the master, which loads the code on disk and
+            # starts new workers on the same socket; then WINCH and QUIT the
+            # old master to drain and stop it. Both generations hold pools
+            # in between. Gunicorn re-executes argv, where `python -m app`
+            # left the path of __main__.py, which can't run as a script
+            arbiter = Arbiter(self)
+            arbiter.START_CTX["args"] = [sys.executable, "-m", "app"] + sys.argv[1:]
+            try:
+                arbiter.run()
+            except RuntimeError as exc:
+                print(f"\nError: {exc}\n", file=sys.stderr)
+                sys.exit(1)
+
+    Application().run()
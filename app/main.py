@@ -1,17 +1,67 @@
 # app/main.py
+import logging
 from fastapi import FastAPI
+from .core.admission import AdmissionController, AdmissionMiddleware, class_limits
 from .core.config import get_settings
+from .core.profiling import Profiler, ProfilingMiddleware
+from .core.server import request_capacity
 from .core.database import get_pool
 from .modules import ModuleRegistry
+from .modules.base import singleflight
+from .modules.base.coalesce import WriteCoalescer
 from .modules.registry import get_modules
+from .modules.storage import create_backend
 from fastapi.middleware.cors import CORSMiddleware
 
+logger = logging.getLogger(__name__)
+
 def create_app() -> FastAPI:
     app = FastAPI(
         title=get_settings().PROJECT_NAME,
         version=get_settings().VERSION
     )
     
+    settings = get_settings()
+    singleflight.reads.enabled = settings.SINGLEFLIGHT_ENABLED
+
+    if settings.ADMISSION_ENABLED:
+        capacity = settings.ADMISSION_MAX_ACTIVE or request_capacity(settings)
+        app.state.admission = AdmissionController(
+            limits=class_limits(capacity, {
+                "read": settings.ADMISSION_READ_LIMIT,
+                "write": settings.ADMISSION_WRITE_LIMIT,
+                "bulk": settings.ADMISSION_BULK_LIMIT,
+            }),
+            capacity=capacity,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+            max_wait=settings.ADMISSION_MAX_WAIT_SECONDS,
+            target_wait=settings.ADMISSION_TARGET_WAIT_SECONDS,
+            interval=settings.ADMISSION_INTERVAL_SECONDS,
+            retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS
+        )
+        # Added before CORS so rejections still carry CORS headers
+        app.add_middleware(
+            AdmissionMiddleware,
+            controller=app.state.admission,
+            path_prefix=settings.API_V1_STR
+        )
+
+    app.state.profiler = None
+    if settings.PROFILE_TOKEN or settings.PROFILE_SAMPLE_RATE > 0:
+        app.state.profiler = Profiler(
+            token=settings.PROFILE_TOKEN,
+            sample_rate=settings.PROFILE_SAMPLE_RATE,
+            interval=settings.PROFILE_INTERVAL_MS / 1000,
+            slow_threshold=settings.PROFILE_SLOW_MS / 1000,
+            buffer_size=settings.PROFILE_BUFFER_SIZE
+        )
+        # Outside admission control so queueing shows up in profiles
+        app.add_middleware(
+            ProfilingMiddleware,
+            profiler=app.state.profiler,
+            path_prefix=settings.API_V1_STR
+        )
+
     # Add CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -21,6 +71,9 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Outermost, so shared reads are fenced at the request's arrival
+    app.add_middleware(singleflight.RequestStartMiddleware)
+
     # Initialize registry
     registry = ModuleRegistry(app)
     
@@ -31,13 +84,40 @@ def create_app() -> FastAPI:
 
     @app.on_event("startup")
     async def startup():
-        app.state.pool = await get_pool()
+        # Modules skip tables and background workers without a pool
+        app.state.pool = None
+        app.state.write_coalescer = None
+        if settings.STORAGE_BACKEND == "postgres":
+            app.state.pool = await get_pool()
+            if settings.WRITE_COALESCE_ENABLED:
+                admission = getattr(app.state, "admission", None)
+                if admission and (
+                    admission.limit("write") < settings.WRITE_COALESCE_MAX_BATCH
+                ):
+                    logger.warning(
+                        "Write batches are capped at %d concurrent writes; "
+                        "raise ADMISSION_WRITE_LIMIT to let batches grow",
+                        admission.limit("write")
+                    )
+                app.state.write_coalescer = WriteCoalescer(
+                    app.state.pool,
+                    window=settings.WRITE_COALESCE_WINDOW_MS / 1000,
+                    max_batch=settings.WRITE_COALESCE_MAX_BATCH,
+                    acquire_timeout=settings.POOL_ACQUIRE_TIMEOUT
+                )
+        app.state.storage = create_backend(
+            settings.STORAGE_BACKEND, app.state.pool, app.state.write_coalescer
+        )
         await registry.init_all_modules()
+        if app.state.write_coalescer:
+            await app.state.write_coalescer.start()
 
     @app.on_event("shutdown")
     async def shutdown():
+        if getattr(app.state, 'write_coalescer', None):
+            await app.state.write_coalescer.close()
         await registry.cleanup_all_modules()
-        if hasattr(app.state, 'pool'):
+        if getattr(app.state, 'pool', None):
             await app.state.pool.close()
 
     # Register routes for all modules
@@ -0,0 +1,170 @@
+# app/modules/base/coalesce.py
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+# flush(conn, payloads) -> one result per payload, in order. An exception in
+# the list fails only that caller; raising fails the batch (see _flush).
+FlushFn = Callable[[asyncpg.Connection, List[Any]], Awaitable[List[Any]]]
+
+class WriteCoalescer:
+    """
+    Funnels concurrent single-item writes through one connection in batches.
+
+    A write joins the queue and waits. The writer takes everything queued,
+    then keeps collecting until it holds `max_batch` items or `window`
+    seconds have passed, and runs one flush per kind of write in the batch.
+    While a batch is being written the next one fills up, so batches grow
+    with load and a lone write waits at most `window`.
+
+    The writer keeps one pooled connection for itself from start():
+    requests waiting here still hold theirs, and a writer that had to
+    acquire one per flush could starve behind them.
+    """
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        window: float,
+        max_batch: int,
+        acquire_timeout: float = 5.0
+    ):
+        self._pool = pool
+        self.window = window
+        self.max_batch = max(max_batch, 1)
+        self.acquire_timeout = acquire_timeout
+        self._flushes: Dict[str, FlushFn] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._conn: Optional[asyncpg.Connection] = None
+        self._writer: Optional[asyncio.Task] = None
+        self.items = 0
+        self.batches = 0
+        self.largest_batch = 0
+        self.split_batches = 0
+
+    def register(self, kind: str, flush: FlushFn) -> None:
+        self._flushes[kind] = flush
+
+    async def start(self) -> None:
+        await self._connection()
+        self._writer = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Write what is queued, then give the connection back"""
+        if self._writer:
+            await self._queue.join()
+            self._writer.cancel()
+            try:
+                await self._writer
+            except asyncio.CancelledError:
+                pass
+            self._writer = None
+        if self._conn is not None:
+            await self._pool.release(self._conn)
+            self._conn = None
+
+    async def submit(self, kind: str, payload: Any) -> Any:
+        """
+        Queue one write and wait for its own result. The write still
+        happens if the caller goes away after queueing it.
+        """
+        if kind not in self._flushes:
+            raise KeyError(f"No flush registered for {kind!r}")
+        future = asyncio.get_running_loop().create_future()
+        # The caller may be gone; don't warn about unretrieved exceptions
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._queue.put_nowait((kind, payload, future))
+        return await asyncio.shield(future)
+
+    async def _collect(self) -> List[Tuple[str, Any, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            if self._queue.empty():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+
+            by_kind: Dict[str, List[Tuple[Any, asyncio.Future]]] = {}
+            for kind, payload, future in batch:
+                by_kind.setdefault(kind, []).append((payload, future))
+            try:
+                for kind, items in by_kind.items():
+                    await self._flush(kind, items)
+            except Exception as exc:
+                logger.exception("Write batch failed")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, kind: str, items: List[Tuple[Any, asyncio.Future]]) -> None:
+        flush = self._flushes[kind]
+        payloads = [payload for payload, _ in items]
+        try:
+            results = await flush(await self._connection(), payloads)
+        except Exception as exc:
+            if len(items) == 1:
+                results = [exc]
+            else:
+                # One bad row fails the whole statement; write them one at
+                # a time so only its caller sees the error
+                self.split_batches += 1
+                logger.info("Batch of %d %s writes failed (%s), retrying one by one",
+                            len(items), kind, exc)
+                results = []
+                for payload in payloads:
+                    try:
+                        results += await flush(await self._connection(), [payload])
+                    except Exception as item_exc:
+                        results.append(item_exc)
+            await self._check_connection()
+
+        for (_, future), result in zip(items, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _connection(self) -> asyncpg.Connection:
+        if self._conn is None:
+            self._conn = await self._pool.acquire(timeout=self.acquire_timeout)
+        return self._conn
+
+    async def _check_connection(self) -> None:
+        """Swap out the writer's connection if it broke during a flush"""
+        if self._conn is not None and self._conn.is_closed():
+            await self._pool.release(self._conn)
+            self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "items": self.items,
+            "batches": self.batches,
+            "largest_batch": self.largest_batch,
+            "mean_batch": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "split_batches": self.split_batches,
+        }
@@ -0,0 +1,401 @@
+# app/modules/base/memory.py
+"""
+In-memory storage backend for tests and local runs without Postgres.
+
+Rows live in dicts keyed by id. Hash indexes (value -> ids) on the filter
+columns and a sorted (created_at, id) index make filtered, paginated lists
+an index intersection plus a partial sort of the matches instead of a scan.
+There is no archive tier: deleted projects lose their tasks immediately.
+"""
+import bisect
+import heapq
+import itertools
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+from .repository import (
+    DuplicateError, Page, ProjectRepository, Row, Storage, StorageBackend,
+    TaskRepository
+)
+from .schema import CLOSED_PROJECT_STATUSES, CountMode
+from ..tasks.schema import OPEN_TASK_STATUSES
+
+PROJECT_COLUMNS = (
+    "id", "name", "description", "start_date", "end_date", "status",
+    "created_at", "updated_at", "deleted_at"
+)
+TASK_COLUMNS = (
+    "id", "project_id", "title", "description", "assignee", "start_date",
+    "end_date", "priority", "status", "created_at", "updated_at"
+)
+
+# Sort keys for ProjectRepository.tasks(); smallest first
+EMBEDDED_TASK_KEYS: Dict[str, Callable[[Row], Any]] = {
+    "priority": lambda row: (-row["priority"], row["end_date"], row["id"]),
+    "end_date": lambda row: (row["end_date"], row["id"]),
+    "created_at": lambda row: (-row["created_at"].timestamp(), -row["id"]),
+}
+
+def _plain(value: Any) -> Any:
+    """Store enum members as their values, like the database does"""
+    return value.value if isinstance(value, Enum) else value
+
+class MemoryTable:
+    """Rows by id, hash indexes on `indexed` columns and a created_at index"""
+
+    def __init__(self, columns: Tuple[str, ...], indexed: Tuple[str, ...]):
+        self.columns = columns
+        self.rows: Dict[int, Row] = {}
+        self._ids = itertools.count(1)
+        self._hash: Dict[str, Dict[Any, Set[int]]] = {
+            column: defaultdict(set) for column in indexed
+        }
+        # Ascending (created_at, id)
+        self._created: List[Tuple[datetime, int]] = []
+
+    def insert(self, values: Row) -> Row:
+        row = {column: None for column in self.columns}
+        row.update({key: _plain(value) for key, value in values.items()})
+        row["id"] = next(self._ids)
+        row["created_at"] = datetime.now()
+        self._index(row)
+        return dict(row)
+
+    def update(self, row_id: int, values: Row) -> Optional[Row]:
+        row = self._unindex(row_id)
+        if row is None:
+            return None
+        row.update({key: _plain(value) for key, value in values.items()})
+        self._index(row)
+        return dict(row)
+
+    def delete(self, row_id: int) -> Optional[Row]:
+        return self._unindex(row_id)
+
+    def get(self, row_id: int) -> Optional[Row]:
+        row = self.rows.get(row_id)
+        return dict(row) if row else None
+
+    def ids(self, column: str, value: Any) -> Set[int]:
+        return self._hash[column].get(_plain(value), set())
+
+    def match(self, **filters: Any) -> Optional[Set[int]]:
+        """Ids matching every given filter; None when no filter applies"""
+        sets = [self.ids(column, value) for column, value in filters.items() if value]
+        if not sets:
+            return None
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    def newest(
+        self,
+        ids: Optional[Set[int]],
+        offset: int,
+        limit: int
+    ) -> List[Row]:
+        """Rows among `ids` (all rows if None), newest first"""
+        if ids is None:
+            end = len(self._created) - offset
+            keys = reversed(self._created[max(end - limit, 0):max(end, 0)])
+        else:
+            candidates = ((self.rows[i]["created_at"], i) for i in ids)
+            keys = heapq.nlargest(offset + limit, candidates)[offset:]
+        return [dict(self.rows[row_id]) for _, row_id in keys]
+
+    def _index(self, row: Row) -> None:
+        self.rows[row["id"]] = row
+        for column, index in self._hash.items():
+            index[row[column]].add(row["id"])
+        bisect.insort(self._created, (row["created_at"], row["id"]))
+
+    def _unindex(self, row_id: int) -> Optional[Row]:
+        row = self.rows.pop(row_id, None)
+        if row is None:
+            return None
+        for column, index in self._hash.items():
+            ids = index[row[column]]
+            ids.discard(row_id)
+            if not ids:
+                del index[row[column]]
+        position = bisect.bisect_left(self._created, (row["created_at"], row_id))
+        del self._created[position]
+        return row
+
+class MemoryStore:
+    def __init__(self):
+        self.projects = MemoryTable(PROJECT_COLUMNS, ("status",))
+        self.tasks = MemoryTable(
+            TASK_COLUMNS, ("project_id", "status", "assignee", "priority")
+        )
+        # Live project name -> id
+        self.project_names: Dict[str, int] = {}
+        self.purges: Dict[int, Row] = {}
+
+def _page(
+    table: MemoryTable,
+    ids: Optional[Set[int]],
+    page: int,
+    page_size: int,
+    count: CountMode
+) -> Page:
+    total = len(table.rows) if ids is None else len(ids)
+    offset = (page - 1) * page_size
+    rows = table.newest(ids, offset, page_size)
+    # Counting is free here, so 'estimate' is exact
+    return rows, None if count == CountMode.NONE else total, offset + len(rows) < total
+
+class MemoryProjectRepository(ProjectRepository):
+    def __init__(self, store: MemoryStore):
+        self._store = store
+        self._table = store.projects
+
+    async def create(self, values: Row) -> Row:
+        if values["name"] in self._store.project_names:
+            raise DuplicateError(values["name"])
+        row = self._table.insert(values)
+        self._store.project_names[row["name"]] = row["id"]
+        return row
+
+    async def get(self, project_id: int) -> Optional[Row]:
+        return self._table.get(project_id)
+
+    async def get_many(self, project_ids: List[int]) -> List[Row]:
+        return [
+            dict(self._table.rows[i]) for i in set(project_ids) if i in self._table.rows
+        ]
+
+    async def exists(self, project_id: int) -> bool:
+        return project_id in self._table.rows
+
+    async def list(
+        self,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 10,
+        count: CountMode = CountMode.EXACT
+    ) -> Page:
+        ids = self._table.match(status=status)
+        if search:
+            needle = search.casefold()
+            candidates = self._table.rows if ids is None else ids
+            ids = {
+                i for i in candidates
+                if needle in self._table.rows[i]["name"].casefold()
+                or needle in (self._table.rows[i]["description"] or "").casefold()
+            }
+        return _page(self._table, ids, page, page_size, count)
+
+    async def update(self, project_id: int, values: Row) -> Optional[Row]:
+        current = self._table.rows.get(project_id)
+        if current is None:
+            return None
+        # The table updates `current` in place; keep the name it had
+        old_name = current["name"]
+        name = values.get("name", old_name)
+        if self._store.project_names.get(name, project_id) != project_id:
+            raise DuplicateError(name)
+        row = self._table.update(project_id, values)
+        del self._store.project_names[old_name]
+        self._store.project_names[row["name"]] = project_id
+        return row
+
+    async def delete(self, project_id: int) -> bool:
+        row = self._table.delete(project_id)
+        if row is None:
+            return False
+        del self._store.project_names[row["name"]]
+
+        task_ids = list(self._store.tasks.ids("project_id", project_id))
+        for task_id in task_ids:
+            self._store.tasks.delete(task_id)
+        now = datetime.utcnow()
+        self._store.purges[project_id] = {
+            "project_id": project_id,
+            "status": "completed",
+            "deleted_tasks": len(task_ids),
+            "remaining_tasks": 0,
+            "created_at": now,
+            "updated_at": now,
+            "finished_at": now,
+        }
+        return True
+
+    async def get_purge(self, project_id: int) -> Optional[Row]:
+        purge = self._store.purges.get(project_id)
+        return dict(purge) if purge else None
+
+    async def statistics(self, project_ids: List[int]) -> Dict[int, Row]:
+        tasks = self._store.tasks
+        completed = tasks.ids("status", "completed")
+        pending = tasks.ids("status", "pending")
+        today = date.today()
+
+        statistics = {}
+        for project_id in project_ids:
+            ids = tasks.ids("project_id", project_id)
+            if not ids:
+                continue
+            statistics[project_id] = {
+                "project_id": project_id,
+                "total_tasks": len(ids),
+                "completed_tasks": len(ids & completed),
+                "pending_tasks": len(ids & pending),
+                "overdue_tasks": sum(
+                    1 for i in ids - completed if tasks.rows[i]["end_date"] < today
+                ),
+            }
+        return statistics
+
+    async def tasks(
+        self,
+        project_ids: List[int],
+        limit: int,
+        order: str
+    ) -> Dict[int, List[Row]]:
+        tasks = self._store.tasks
+        key = EMBEDDED_TASK_KEYS[_plain(order)]
+        return {
+            project_id: [
+                dict(row) for row in heapq.nsmallest(
+                    limit,
+                    (tasks.rows[i] for i in tasks.ids("project_id", project_id)),
+                    key=key
+                )
+            ]
+            for project_id in project_ids
+        }
+
+class MemoryTaskRepository(TaskRepository):
+    def __init__(self, store: MemoryStore):
+        self._store = store
+        self._table = store.tasks
+
+    async def create(self, values: Row) -> Optional[Row]:
+        if values["project_id"] not in self._store.projects.rows:
+            return None
+        return self._table.insert(values)
+
+    async def get(self, task_id: int) -> Optional[Row]:
+        return self._table.get(task_id)
+
+    async def get_many(self, task_ids: List[int]) -> List[Row]:
+        return [dict(self._table.rows[i]) for i in set(task_ids) if i in self._table.rows]
+
+    async def list(
+        self,
+        project_id: Optional[int] = None,
+        status: Optional[str] = None,
+        assignee: Optional[str] = None,
+        priority: Optional[int] = None,
+        include_archived: bool = False,
+        page: int = 1,
+        page_size: int = 10,
+        count: CountMode = CountMode.EXACT
+    ) -> Page:
+        ids = self._table.match(
+            project_id=project_id, status=status, assignee=assignee, priority=priority
+        )
+        return _page(self._table, ids, page, page_size, count)
+
+    def _in_window(
+        self,
+        window_start: date,
+        window_end: date,
+        project_id: Optional[int],
+        status: Optional[str],
+        assignee: Optional[str]
+    ) -> List[Row]:
+        ids = self._table.match(project_id=project_id, status=status, assignee=assignee)
+        rows = self._table.rows.values() if ids is None else (
+            self._table.rows[i] for i in ids
+        )
+        return [
+            row for row in rows
+            if min(row["start_date"], row["end_date"]) <= window_end
+            and max(row["start_date"], row["end_date"]) >= window_start
+        ]
+
+    async def timeline(
+        self,
+        window_start: date,
+        window_end: date,
+        project_id: Optional[int] = None,
+        status: Optional[str] = None,
+        assignee: Optional[str] = None,
+        include_archived: bool = False,
+        limit: int = 1000
+    ) -> List[Row]:
+        rows = self._in_window(window_start, window_end, project_id, status, assignee)
+        return [
+            dict(row) for row in
+            heapq.nsmallest(limit, rows, key=lambda row: (row["start_date"], row["id"]))
+        ]
+
+    async def day_buckets(
+        self,
+        window_start: date,
+        window_end: date,
+        project_id: Optional[int] = None,
+        status: Optional[str] = None,
+        assignee: Optional[str] = None,
+        include_archived: bool = False
+    ) -> Dict[date, Row]:
+        buckets: Dict[date, Row] = {}
+        for row in self._in_window(window_start, window_end, project_id, status, assignee):
+            day = max(min(row["start_date"], row["end_date"]), window_start)
+            last = min(max(row["start_date"], row["end_date"]), window_end)
+            while day <= last:
+                bucket = buckets.setdefault(
+                    day, {"day": day, "task_count": 0, "priority_total": 0}
+                )
+                bucket["task_count"] += 1
+                bucket["priority_total"] += row["priority"]
+                day += timedelta(days=1)
+        return buckets
+
+    async def next_up(
+        self,
+        per_project: int,
+        assignee: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> List[Row]:
+        open_ids = set().union(*(
+            self._table.ids("status", value.value) for value in OPEN_TASK_STATUSES
+        ))
+        filtered = self._table.match(assignee=assignee, status=status)
+        if filtered is not None:
+            open_ids &= filtered
+
+        rows = []
+        for project in sorted(self._store.projects.rows.values(), key=lambda p: p["id"]):
+            if project["status"] in CLOSED_PROJECT_STATUSES:
+                continue
+            candidates = self._table.ids("project_id", project["id"]) & open_ids
+            rows += [
+                dict(row, project_name=project["name"]) for row in heapq.nsmallest(
+                    per_project,
+                    (self._table.rows[i] for i in candidates),
+                    key=EMBEDDED_TASK_KEYS["priority"]
+                )
+            ]
+        return rows
+
+    async def update(self, task_id: int, values: Row) -> Optional[Row]:
+        return self._table.update(task_id, values)
+
+    async def delete(self, task_id: int) -> bool:
+        return self._table.delete(task_id) is not None
+
+class MemoryBackend(StorageBackend):
+    def __init__(self):
+        self.store = MemoryStore()
+        self._storage = Storage(
+            MemoryProjectRepository(self.store), MemoryTaskRepository(self.store)
+        )
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[Storage]:
+        yield self._storage
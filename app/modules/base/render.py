@@ -0,0 +1,65 @@
+# app/modules/base/render.py
+"""
+SQL snippets that make Postgres render response JSON itself.
+
+The output must match what FastAPI produces from our Pydantic schemas byte
+for byte: compact separators, keys in model field order, timestamps as
+Pydantic prints them and floats with a trailing ".0" when integral. That
+rules out json_build_object() (it inserts spaces), so documents are built
+by concatenating to_json() values.
+"""
+import json
+from typing import Any, Sequence, Tuple
+
+def json_object(fields: Sequence[Tuple[str, str]]) -> str:
+    """SQL text expression for a JSON object from (key, value_sql) pairs"""
+    parts = []
+    for index, (key, value) in enumerate(fields):
+        prefix = ("{" if index == 0 else ",") + json.dumps(key) + ":"
+        parts.append(f"'{prefix}' || {value}")
+    return "(" + " || ".join(parts) + " || '}')"
+
+def json_text(expr: str) -> str:
+    """Strings and dates; to_json() escapes strings the way Pydantic does"""
+    return f"COALESCE(to_json({expr})::text, 'null')"
+
+def json_number(expr: str) -> str:
+    return f"COALESCE(({expr})::text, 'null')"
+
+def json_bool(condition: str) -> str:
+    return f"CASE WHEN {condition} THEN 'true' ELSE 'false' END"
+
+def json_float(expr: str) -> str:
+    """float8 as Pydantic prints it: 50.0, not Postgres' 50"""
+    return (
+        f"CASE WHEN ({expr}) = trunc({expr}) "
+        f"THEN trunc({expr})::bigint::text || '.0' "
+        f"ELSE ({expr})::text END"
+    )
+
+def json_timestamp(expr: str) -> str:
+    """Naive timestamp; microseconds only when non-zero, like Pydantic"""
+    return (
+        f"COALESCE('\"' || to_char({expr}, 'YYYY-MM-DD\"T\"HH24:MI:SS') || "
+        f"CASE WHEN to_char({expr}, 'US') = '000000' THEN '' "
+        f"ELSE '.' || to_char({expr}, 'US') END || '\"', 'null')"
+    )
+
+def json_array(expr: str, source: str, order_by: str) -> str:
+    """Aggregate the JSON documents `expr` over `source` into an array"""
+    return (
+        f"(SELECT '[' || COALESCE(string_agg({expr}, ',' ORDER BY {order_by}), '') "
+        f"|| ']' FROM {source})"
+    )
+
+def sql_strings(values: Sequence[Any]) -> str:
+    """SQL list of string constants, e.g. of enum members: ('a', 'b')"""
+    return "(" + ", ".join(
+        "'" + str(getattr(value, "value", value)).replace("'", "''") + "'"
+        for value in values
+    ) + ")"
+
+def render_list(key: str, items: str, **fields: Any) -> bytes:
+    """Wrap rendered items in a list envelope such as TaskList"""
+    tail = json.dumps(fields, separators=(",", ":"))
+    return f'{{"{key}":[{items}],{tail[1:]}'.encode()
@@ -0,0 +1,188 @@
+# app/modules/base/repository.py
+"""
+Storage interface behind ProjectService and TaskService.
+
+Repositories deal in rows: dicts keyed by column name. Validation, HTTP
+errors and response models stay in the services so every backend behaves
+the same behind them. Backends must pass test/test_repository.py.
+"""
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Any, AsyncContextManager, AsyncGenerator, Dict, List, Optional, Tuple
+from fastapi import Request
+from .schema import CountMode
+
+Row = Dict[str, Any]
+
+# (rows, total, has_more); total is None for CountMode.NONE
+Page = Tuple[List[Row], Optional[int], bool]
+
+class DuplicateError(Exception):
+    """The write would break a uniqueness rule, e.g. live project names"""
+
+class ProjectRepository(ABC):
+    @abstractmethod
+    async def create(self, values: Row) -> Row:
+        """Insert a project; raises DuplicateError for a taken name"""
+
+    @abstractmethod
+    async def get(self, project_id: int) -> Optional[Row]:
+        """A project that has not been deleted"""
+
+    @abstractmethod
+    async def get_many(self, project_ids: List[int]) -> List[Row]:
+        """Live projects among `project_ids`, in no particular order"""
+
+    @abstractmethod
+    async def exists(self, project_id: int) -> bool:
+        pass
+
+    @abstractmethod
+    async def list(
+        self,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 10,
+        count: CountMode = CountMode.EXACT
+    ) -> Page:
+        """Live projects, newest first; `search` matches name or description"""
+
+    @abstractmethod
+    async def update(self, project_id: int, values: Row) -> Optional[Row]:
+        """Apply `values` to a live project; raises DuplicateError"""
+
+    @abstractmethod
+    async def delete(self, project_id: int) -> bool:
+        """Delete a live project; its tasks may be removed in the background"""
+
+    @abstractmethod
+    async def get_purge(self, project_id: int) -> Optional[Row]:
+        """Deletion progress, with remaining_tasks while unfinished"""
+
+    @abstractmethod
+    async def statistics(self, project_ids: List[int]) -> Dict[int, Row]:
+        """
+        Task counts per project: total_tasks, completed_tasks, pending_tasks
+        and overdue_tasks. Projects without tasks may be left out.
+        """
+
+    @abstractmethod
+    async def tasks(
+        self,
+        project_ids: List[int],
+        limit: int,
+        order: str
+    ) -> Dict[int, List[Row]]:
+        """
+        First `limit` tasks of each project. `order` is "priority"
+        (priority desc, end_date), "end_date" or "created_at" (newest first).
+        """
+
+    async def list_json(self, **kwargs: Any) -> Optional[bytes]:
+        """
+        The ProjectList document rendered by the backend itself, if it can;
+        None tells the service to build it from rows.
+        """
+        return None
+
+class TaskRepository(ABC):
+    @abstractmethod
+    async def create(self, values: Row) -> Optional[Row]:
+        """Insert a task; None if its project is missing or deleted"""
+
+    @abstractmethod
+    async def get(self, task_id: int) -> Optional[Row]:
+        """A task, archived or not"""
+
+    @abstractmethod
+    async def get_many(self, task_ids: List[int]) -> List[Row]:
+        """Tasks among `task_ids`, archived or not, in no particular order"""
+
+    @abstractmethod
+    async def list(
+        self,
+        project_id: Optional[int] = None,
+        status: Optional[str] = None,
+        assignee: Optional[str] = None,
+        priority: Optional[int] = None,
+        include_archived: bool = False,
+        page: int = 1,
+        page_size: int = 10,
+        count: CountMode = CountMode.EXACT
+    ) -> Page:
+        """Matching tasks, newest first"""
+
+    @abstractmethod
+    async def timeline(
+        self,
+        window_start: date,
+        window_end: date,
+        project_id: Optional[int] = None,
+        status: Optional[str] = None,
+        assignee: Optional[str] = None,
+        include_archived: bool = False,
+        limit: int = 1000
+    ) -> List[Row]:
+        """Tasks whose start..end range overlaps the window, by start_date"""
+
+    @abstractmethod
+    async def day_buckets(
+        self,
+        window_start: date,
+        window_end: date,
+        project_id: Optional[int] = None,
+        status: Optional[str] = None,
+        assignee: Optional[str] = None,
+        include_archived: bool = False
+    ) -> Dict[date, Row]:
+        """task_count and priority_total per day of the window with work"""
+
+    @abstractmethod
+    async def next_up(
+        self,
+        per_project: int,
+        assignee: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> List[Row]:
+        """
+        The `per_project` most urgent open (pending or in_progress) tasks of
+        each live project that is not completed or cancelled: priority desc,
+        then end_date. Rows carry project_name and come grouped by project.
+        """
+
+    @abstractmethod
+    async def update(self, task_id: int, values: Row) -> Optional[Row]:
+        """Apply `values`; an archived task is restored first"""
+
+    @abstractmethod
+    async def delete(self, task_id: int) -> bool:
+        pass
+
+    async def set_status(self, task_id: int, status: str) -> Optional[Row]:
+        """Change only the status; backends may batch these"""
+        return await self.update(task_id, {
+            'status': status,
+            'updated_at': datetime.utcnow()
+        })
+
+    async def list_json(self, **kwargs: Any) -> Optional[bytes]:
+        """The TaskList document rendered by the backend, or None"""
+        return None
+
+class Storage:
+    """Repositories sharing one backend session (e.g. one connection)"""
+
+    def __init__(self, projects: ProjectRepository, tasks: TaskRepository):
+        self.projects = projects
+        self.tasks = tasks
+
+class StorageBackend(ABC):
+    @abstractmethod
+    def session(self) -> AsyncContextManager[Storage]:
+        """Storage for the duration of one request"""
+
+async def get_storage(request: Request) -> AsyncGenerator[Storage, None]:
+    """Dependency: repositories of the backend selected in Settings"""
+    async with request.app.state.storage.session() as storage:
+        yield storage
@@ -1,7 +1,35 @@
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
+from enum import Enum
 from typing import Optional
 
+# Upper bound on ids accepted by batch fetch endpoints
+MAX_BATCH_IDS = 200
+
+# Ids are SERIAL (int4) columns
+MAX_ID = 2**31 - 1
+
+class CountMode(str, Enum):
+    EXACT = "exact"
+    ESTIMATE = "estimate"
+    NONE = "none"
+
+class RenderMode(str, Enum):
+    APP = "app"
+    DB = "db"
+
+# Here rather than in projects.schema because the tasks module filters on
+# it too, and the projects module already imports the tasks module
+class ProjectStatus(str, Enum):
+    PLANNING = "planning"
+    ACTIVE = "active"
+    ON_HOLD = "on_hold"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+
+# Projects whose tasks GET /tasks/next leaves out
+CLOSED_PROJECT_STATUSES = (ProjectStatus.COMPLETED, ProjectStatus.CANCELLED)
+
 class BaseSchema(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
@@ -0,0 +1,213 @@
+# app/modules/base/service.py
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, List, Optional, Tuple, TypeVar
+import asyncpg
+from . import singleflight
+from .schema import CountMode
+from ...core.config import get_settings
+
+# How long an exact count waits for a second connection before falling back
+# to running after the page query on the request's own connection
+COUNT_CONNECTION_TIMEOUT = 0.1
+
+# Exact counts holding a second connection right now, see DB_COUNT_CONNECTIONS
+_count_connections = 0
+
+T = TypeVar("T")
+
+# Fetches the page with the given row limit; returns (page, rows fetched)
+PageFetch = Callable[[asyncpg.Connection, int], Awaitable[Tuple[T, int]]]
+
+async def fetch_page(
+    conn: asyncpg.Connection,
+    pool: Optional[asyncpg.Pool],
+    source: str,
+    where_clause: str,
+    params: List[Any],
+    order_by: str,
+    page: int,
+    page_size: int,
+    count: CountMode = CountMode.EXACT,
+    tables: Tuple[str, ...] = ()
+) -> Tuple[List[asyncpg.Record], Optional[int], bool]:
+    """
+    Fetch one page of `SELECT * FROM source WHERE ...` and its total.
+    Returns (rows, total, has_more); total is None for CountMode.NONE.
+    Callers pass the tables behind `source` as `tables` when the list has
+    no user filters, see estimate_count().
+    """
+    offset = (page - 1) * page_size
+    param_index = len(params) + 1
+    query = f'''
+        SELECT * FROM {source}{where_clause}
+        ORDER BY {order_by}
+        LIMIT ${param_index} OFFSET ${param_index + 1}
+    '''
+
+    async def fetch(page_conn: asyncpg.Connection, limit: int):
+        rows = await singleflight.fetch(page_conn, query, *params, limit, offset)
+        return rows[:page_size], len(rows)
+
+    return await _paginate(
+        conn, pool, source, where_clause, params, page, page_size, count, tables, fetch
+    )
+
+async def fetch_page_json(
+    conn: asyncpg.Connection,
+    pool: Optional[asyncpg.Pool],
+    source: str,
+    where_clause: str,
+    params: List[Any],
+    order_by: str,
+    render: str,
+    page: int,
+    page_size: int,
+    count: CountMode = CountMode.EXACT,
+    tables: Tuple[str, ...] = ()
+) -> Tuple[str, Optional[int], bool]:
+    """
+    Like fetch_page(), but Postgres renders each row (aliased `t`) with the
+    SQL expression `render` and returns the page as one string of
+    comma-separated JSON documents.
+    """
+    offset = (page - 1) * page_size
+    param_index = len(params) + 1
+    query = f'''
+        SELECT
+            COALESCE(
+                string_agg(doc, ',' ORDER BY page_row)
+                    FILTER (WHERE page_row <= ${param_index + 2}),
+                ''
+            ) AS items,
+            COUNT(*) AS fetched
+        FROM (
+            SELECT {render} AS doc, row_number() OVER (ORDER BY {order_by}) AS page_row
+            FROM (
+                SELECT * FROM {source}{where_clause}
+                ORDER BY {order_by}
+                LIMIT ${param_index} OFFSET ${param_index + 1}
+            ) AS t
+        ) AS page
+    '''
+
+    async def fetch(page_conn: asyncpg.Connection, limit: int):
+        row = await singleflight.fetchrow(
+            page_conn, query, *params, limit, offset, page_size
+        )
+        return row['items'], row['fetched']
+
+    return await _paginate(
+        conn, pool, source, where_clause, params, page, page_size, count, tables, fetch
+    )
+
+async def _paginate(
+    conn: asyncpg.Connection,
+    pool: Optional[asyncpg.Pool],
+    source: str,
+    where_clause: str,
+    params: List[Any],
+    page: int,
+    page_size: int,
+    count: CountMode,
+    tables: Tuple[str, ...],
+    fetch: PageFetch
+) -> Tuple[T, Optional[int], bool]:
+    offset = (page - 1) * page_size
+    count_query = f'SELECT COUNT(*) FROM {source}{where_clause}'
+
+    if count == CountMode.EXACT:
+        (result, fetched), total = await _fetch_with_exact_count(
+            conn, pool, count_query, params, lambda page_conn: fetch(page_conn, page_size)
+        )
+        return result, total, offset + fetched < total
+
+    # Fetch one extra row to learn whether another page exists
+    result, fetched = await fetch(conn, page_size + 1)
+    has_more = fetched > page_size
+
+    if count == CountMode.NONE:
+        return result, None, has_more
+
+    total = await estimate_count(conn, source, where_clause, params, tables)
+    # Never report fewer rows than we have actually seen
+    total = max(total, offset + fetched)
+    return result, total, has_more
+
+async def _fetch_with_exact_count(
+    conn: asyncpg.Connection,
+    pool: Optional[asyncpg.Pool],
+    count_query: str,
+    params: List[Any],
+    fetch: Callable[[asyncpg.Connection], Awaitable[T]]
+) -> Tuple[T, int]:
+    global _count_connections
+    count_conn = None
+    if (
+        pool is not None
+        and not conn.is_in_transaction()
+        and _count_connections < get_settings().DB_COUNT_CONNECTIONS
+        and (pool.get_idle_size() > 0 or pool.get_size() < pool.get_max_size())
+    ):
+        _count_connections += 1
+        try:
+            count_conn = await pool.acquire(timeout=COUNT_CONNECTION_TIMEOUT)
+        except asyncio.TimeoutError:
+            count_conn = None
+        finally:
+            if count_conn is None:
+                _count_connections -= 1
+
+    if count_conn is None:
+        total = await singleflight.fetchval(conn, count_query, *params)
+        return await fetch(conn), total
+
+    # Count on a second pooled connection while the page loads on this one
+    count_task = asyncio.ensure_future(
+        singleflight.fetchval(count_conn, count_query, *params)
+    )
+    try:
+        result = await fetch(conn)
+        total = await count_task
+    finally:
+        # Never hand back a connection with the count still running on it
+        count_task.cancel()
+        await asyncio.gather(count_task, return_exceptions=True)
+        try:
+            # asyncpg bounds the reset on release by the acquire timeout,
+            # and a reset that overruns it raises here; give it the
+            # request connection's budget rather than the short one above
+            await pool.release(
+                count_conn, timeout=get_settings().POOL_ACQUIRE_TIMEOUT
+            )
+        finally:
+            _count_connections -= 1
+    return result, total
+
+async def estimate_count(
+    conn: asyncpg.Connection,
+    source: str,
+    where_clause: str,
+    params: List[Any],
+    tables: Tuple[str, ...] = ()
+) -> int:
+    """
+    Row count estimate. For a list without user filters (`tables` given)
+    it is the tables' pg_class.reltuples: the always-on conditions left in
+    `where_clause` (live projects only) hide few rows, so they are not
+    worth a plan. Otherwise the query planner estimates the filtered count.
+    """
+    if tables:
+        estimate = await conn.fetchval('''
+            SELECT SUM(GREATEST(reltuples, 0))::bigint
+            FROM pg_class
+            WHERE oid = ANY($1::regclass[])
+        ''', list(tables))
+        # reltuples is -1 until the table has been vacuumed or analyzed
+        if estimate:
+            return estimate
+
+    plan = await conn.fetchval(
+        f'EXPLAIN (FORMAT JSON) SELECT 1 FROM {source}{where_clause}', *params
+    )
+    return int(json.loads(plan)[0]['Plan']['Plan Rows'])
@@ -0,0 +1,148 @@
+# app/modules/base/singleflight.py
+import asyncio
+import contextvars
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+import asyncpg
+
+T = TypeVar("T")
+
+# When the running request arrived (time.monotonic()); None outside requests
+_request_started: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(
+    "request_started", default=None
+)
+
+def begin_request() -> contextvars.Token:
+    """Record that a request starts now, for the reads it makes"""
+    return _request_started.set(time.monotonic())
+
+class _LeaderCancelled(Exception):
+    """The request running a shared query went away before it finished"""
+
+class _Flight:
+    def __init__(self, epoch: int):
+        self.epoch = epoch
+        self.started = time.monotonic()
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting; don't warn about unretrieved exceptions
+        self.future.add_done_callback(
+            lambda f: f.cancelled() or f.exception()
+        )
+
+class SingleFlight:
+    """
+    Lets concurrent identical reads share one in-flight execution.
+
+    A read only joins a flight that started after its request arrived (see
+    begin_request; outside a request, after the read itself started), so
+    it never receives a result computed before a write that committed
+    before the request began, in this process or any other. Writers here
+    also call invalidate() once their write has committed: a read then
+    only joins a flight started at the current write epoch, which covers a
+    request reading back its own write.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._epoch = 0
+        self.executed = 0
+        self.coalesced = 0
+
+    def invalidate(self) -> None:
+        self._epoch += 1
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        if not self.enabled:
+            return await fn()
+
+        not_before = _request_started.get()
+        if not_before is None:
+            not_before = time.monotonic()
+        while True:
+            flight = self._flights.get(key)
+            if (
+                flight is None
+                or flight.epoch != self._epoch
+                or flight.started < not_before
+            ):
+                break
+            self.coalesced += 1
+            try:
+                # shield: a joiner giving up must not cancel the shared result
+                return await asyncio.shield(flight.future)
+            except _LeaderCancelled:
+                continue
+
+        flight = _Flight(self._epoch)
+        self._flights[key] = flight
+        self.executed += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            flight.future.set_exception(_LeaderCancelled())
+            raise
+        except Exception as exc:
+            flight.future.set_exception(exc)
+            raise
+        else:
+            flight.future.set_result(result)
+            return result
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._flights),
+        }
+
+reads = SingleFlight()
+
+class RequestStartMiddleware:
+    """ASGI middleware calling begin_request() for every HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = begin_request()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_started.reset(token)
+
+def _freeze(value: Any) -> Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+async def _coalesce(
+    method: str,
+    conn: asyncpg.Connection,
+    query: str,
+    args: tuple
+) -> Any:
+    execute = getattr(conn, method)
+    # Reads inside a transaction may see uncommitted writes; never share them
+    if conn.is_in_transaction():
+        return await execute(query, *args)
+    key = (method, " ".join(query.split()), _freeze(args))
+    return await reads.run(key, lambda: execute(query, *args))
+
+async def fetch(conn: asyncpg.Connection, query: str, *args: Any) -> list:
+    """conn.fetch() shared with concurrent identical reads"""
+    return await _coalesce("fetch", conn, query, args)
+
+async def fetchrow(conn: asyncpg.Connection, query: str, *args: Any) -> Any:
+    """conn.fetchrow() shared with concurrent identical reads"""
+    return await _coalesce("fetchrow", conn, query, args)
+
+async def fetchval(conn: asyncpg.Connection, query: str, *args: Any) -> Any:
+    """conn.fetchval() shared with concurrent identical reads"""
+    return await _coalesce("fetchval", conn, query, args)
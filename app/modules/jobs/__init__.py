@@ -0,0 +1,82 @@
+from fastapi import FastAPI, Depends, Path
+from typing import Optional
+from .service import JobService
+from .runner import JobRunner, register_job_handler
+from .schema import Job, JobMetrics
+from ..base.module import BaseModule
+from ...core.config import get_settings
+from ...core.database import get_connection
+
+class JobModule(BaseModule):
+    def __init__(self, app: FastAPI = None):
+        super().__init__(app)
+        self.prefix = "/jobs"
+        self.tags = ["jobs"]
+        self.runner: Optional[JobRunner] = None
+
+    @property
+    def name(self) -> str:
+        return "jobs"
+
+    def register_routes(self) -> None:
+        @self.router.get("/metrics", response_model=JobMetrics)
+        async def get_job_metrics(conn = Depends(get_connection)):
+            """Job runner latency/throughput for this process and queue depth"""
+            metrics = self.runner.metrics()
+            metrics.queue_depth = await JobService(conn).get_queue_depth()
+            return metrics
+
+        @self.router.get("/{job_id}", response_model=Job)
+        async def get_job(
+            job_id: int = Path(..., gt=0),
+            conn = Depends(get_connection)
+        ):
+            """Get job state"""
+            service = JobService(conn)
+            return await service.get_job(job_id)
+
+    async def init_module(self) -> None:
+        if self.app.state.pool is None:
+            return  # memory storage: no tables or background workers
+        async with self.app.state.pool.acquire() as conn:
+            await conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id BIGSERIAL PRIMARY KEY,
+                    kind VARCHAR(100) NOT NULL,
+                    payload JSONB NOT NULL DEFAULT '{}',
+                    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+                    dedupe_key VARCHAR(255),
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 5,
+                    interval_seconds INTEGER,
+                    run_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    locked_at TIMESTAMP,
+                    locked_by VARCHAR(100),
+                    last_error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP,
+                    finished_at TIMESTAMP
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_jobs_ready
+                    ON jobs(run_at) WHERE status = 'queued';
+                CREATE INDEX IF NOT EXISTS idx_jobs_running
+                    ON jobs(locked_at) WHERE status = 'running';
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_dedupe_key
+                    ON jobs(dedupe_key) WHERE status IN ('queued', 'running');
+            ''')
+
+        settings = get_settings()
+        self.runner = JobRunner(
+            self.app.state.pool,
+            workers=settings.JOB_WORKERS,
+            poll_interval=settings.JOB_POLL_SECONDS,
+            backoff=settings.JOB_BACKOFF_SECONDS,
+            backoff_max=settings.JOB_BACKOFF_MAX_SECONDS,
+            lease=settings.JOB_LEASE_SECONDS
+        )
+        self.runner.start()
+
+    async def cleanup_module(self) -> None:
+        if self.runner:
+            await self.runner.stop(get_settings().JOB_DRAIN_SECONDS)
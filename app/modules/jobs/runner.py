@@ -0,0 +1,325 @@
+# app/modules/jobs/runner.py
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+import asyncpg
+from .schema import JobMetrics, LatencySummary
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[asyncpg.Pool, Dict[str, Any]], Awaitable[None]]
+
+_handlers: Dict[str, JobHandler] = {}
+
+def register_job_handler(kind: str, handler: JobHandler) -> None:
+    """Register the coroutine that runs jobs of the given kind"""
+    _handlers[kind] = handler
+
+CLAIM_QUERY = '''
+    UPDATE jobs
+    SET status = 'running',
+        attempts = attempts + 1,
+        locked_at = CURRENT_TIMESTAMP,
+        locked_by = $2,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE id = (
+        SELECT id
+        FROM jobs
+        WHERE status = 'queued'
+          AND run_at <= CURRENT_TIMESTAMP
+          AND kind = ANY($1::varchar[])
+        ORDER BY run_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, kind, payload, attempts, max_attempts, interval_seconds,
+              EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - run_at)) AS wait_seconds
+'''
+
+# The finishing queries take the job id and the worker id first. They only
+# apply while this worker still holds the job: if its lease ran out and the
+# job was reaped (and maybe claimed again), the late result is dropped.
+FINISH_GUARD = "id = $1 AND locked_by = $2 AND status = 'running'"
+
+COMPLETE_QUERY = f'''
+    UPDATE jobs
+    SET status = 'completed',
+        locked_at = NULL,
+        locked_by = NULL,
+        last_error = NULL,
+        updated_at = CURRENT_TIMESTAMP,
+        finished_at = CURRENT_TIMESTAMP
+    WHERE {FINISH_GUARD}
+'''
+
+RESCHEDULE_QUERY = f'''
+    UPDATE jobs
+    SET status = 'queued',
+        attempts = $3,
+        run_at = CURRENT_TIMESTAMP + make_interval(secs => $4),
+        locked_at = NULL,
+        locked_by = NULL,
+        last_error = $5,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE {FINISH_GUARD}
+'''
+
+FAIL_QUERY = f'''
+    UPDATE jobs
+    SET status = 'failed',
+        locked_at = NULL,
+        locked_by = NULL,
+        last_error = $3,
+        updated_at = CURRENT_TIMESTAMP,
+        finished_at = CURRENT_TIMESTAMP
+    WHERE {FINISH_GUARD}
+'''
+
+# Keeps a running job's lease fresh while its handler works
+HEARTBEAT_QUERY = f'''
+    UPDATE jobs
+    SET locked_at = CURRENT_TIMESTAMP
+    WHERE {FINISH_GUARD}
+'''
+
+# Jobs whose worker died (crash, kill -9) keep status 'running' until their
+# lease runs out. They go back to the queue while they have attempts left;
+# a job that has used them all (one that keeps killing its worker, say)
+# fails, or for a recurring job waits for its next run, as after an error.
+REAP_QUERY = '''
+    UPDATE jobs
+    SET status = CASE
+            WHEN attempts < max_attempts OR interval_seconds IS NOT NULL
+            THEN 'queued'
+            ELSE 'failed'
+        END,
+        attempts = CASE
+            WHEN attempts >= max_attempts AND interval_seconds IS NOT NULL THEN 0
+            ELSE attempts
+        END,
+        run_at = CASE
+            WHEN attempts < max_attempts THEN CURRENT_TIMESTAMP
+            ELSE CURRENT_TIMESTAMP + make_interval(secs => COALESCE(interval_seconds, 0))
+        END,
+        finished_at = CASE
+            WHEN attempts < max_attempts OR interval_seconds IS NOT NULL
+            THEN NULL
+            ELSE CURRENT_TIMESTAMP
+        END,
+        last_error = 'Lease expired on worker ' || locked_by,
+        locked_at = NULL,
+        locked_by = NULL,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE status = 'running'
+      AND locked_at < CURRENT_TIMESTAMP - make_interval(secs => $1)
+'''
+
+class _Window:
+    """Bounded sample of recent measurements"""
+
+    def __init__(self, size: int = 1000):
+        self._values: Deque[float] = deque(maxlen=size)
+
+    def add(self, value: float) -> None:
+        self._values.append(value)
+
+    def summary(self) -> LatencySummary:
+        if not self._values:
+            return LatencySummary()
+        values = sorted(self._values)
+        count = len(values)
+        return LatencySummary(
+            count=count,
+            avg=sum(values) / count,
+            p50=values[int(count * 0.50)],
+            p95=values[min(count - 1, int(count * 0.95))],
+            max=values[-1]
+        )
+
+class JobRunner:
+    """Pool of asyncio workers that claim and run jobs from the jobs table"""
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        workers: int = 2,
+        poll_interval: float = 1.0,
+        backoff: float = 5.0,
+        backoff_max: float = 600.0,
+        lease: int = 300,
+        handlers: Optional[Dict[str, JobHandler]] = None
+    ):
+        self._pool = pool
+        # Kinds this runner claims; the registered handlers by default
+        self._handlers = _handlers if handlers is None else handlers
+        self._workers = workers
+        self._poll_interval = poll_interval
+        self._backoff = backoff
+        self._backoff_max = backoff_max
+        self._lease = lease
+        self._worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._last_reap = 0.0
+
+        # Metrics
+        self._in_flight = 0
+        self._claimed = 0
+        self._succeeded = 0
+        self._retried = 0
+        self._failed = 0
+        self._finished_at: Deque[float] = deque(maxlen=10000)
+        self._wait = _Window()
+        self._run = _Window()
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        for index in range(self._workers):
+            self._tasks.append(asyncio.create_task(self._work(index)))
+
+    def wake(self) -> None:
+        """Let idle workers in this process poll immediately"""
+        self._wake.set()
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """Stop claiming jobs and wait for in-flight jobs to finish"""
+        self._stopping = True
+        self._wake.set()
+        if not self._tasks:
+            return
+
+        _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(
+                "Cancelled %d job worker(s) still running after %.0fs drain",
+                len(pending), timeout
+            )
+            await asyncio.gather(*pending, return_exceptions=True)
+        self._tasks = []
+
+    async def _work(self, index: int) -> None:
+        while not self._stopping:
+            try:
+                ran = await self._run_one()
+            except Exception:
+                logger.exception("Job worker %d failed to poll", index)
+                ran = False
+
+            if ran or self._stopping:
+                continue
+
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _run_one(self) -> bool:
+        kinds = list(self._handlers)
+        if not kinds:
+            return False
+
+        async with self._pool.acquire() as conn:
+            now = time.monotonic()
+            if now - self._last_reap > self._lease / 2:
+                self._last_reap = now
+                await conn.execute(REAP_QUERY, float(self._lease))
+            job = await conn.fetchrow(CLAIM_QUERY, kinds, self._worker_id)
+
+        if not job:
+            return False
+
+        self._claimed += 1
+        self._in_flight += 1
+        self._wait.add(max(0.0, float(job['wait_seconds'])))
+        started = time.monotonic()
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            await self._handlers[job['kind']](self._pool, json.loads(job['payload']))
+        except asyncio.CancelledError:
+            # Drain timed out: hand the job back without burning an attempt
+            await self._finish(job, RESCHEDULE_QUERY, job['attempts'] - 1, 0.0, None)
+            raise
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed", job['id'], job['kind'])
+            await self._record_failure(job, f"{type(exc).__name__}: {exc}")
+        else:
+            await self._record_success(job)
+        finally:
+            heartbeat.cancel()
+            self._in_flight -= 1
+            self._run.add(time.monotonic() - started)
+            self._finished_at.append(time.monotonic())
+        return True
+
+    async def _record_success(self, job: asyncpg.Record) -> None:
+        self._succeeded += 1
+        if job['interval_seconds']:
+            await self._finish(
+                job, RESCHEDULE_QUERY, 0, float(job['interval_seconds']), None
+            )
+        else:
+            await self._finish(job, COMPLETE_QUERY)
+
+    async def _record_failure(self, job: asyncpg.Record, error: str) -> None:
+        if job['attempts'] < job['max_attempts']:
+            self._retried += 1
+            delay = min(
+                self._backoff * 2 ** (job['attempts'] - 1), self._backoff_max
+            )
+            await self._finish(job, RESCHEDULE_QUERY, job['attempts'], delay, error)
+        elif job['interval_seconds']:
+            # Recurring jobs stay scheduled; the next run starts fresh
+            self._failed += 1
+            await self._finish(
+                job, RESCHEDULE_QUERY, 0, float(job['interval_seconds']), error
+            )
+        else:
+            self._failed += 1
+            await self._finish(job, FAIL_QUERY, error)
+
+    async def _heartbeat(self, job: asyncpg.Record) -> None:
+        """Renew the job's lease every third of it until cancelled"""
+        while True:
+            await asyncio.sleep(self._lease / 3)
+            try:
+                async with self._pool.acquire() as conn:
+                    result = await conn.execute(HEARTBEAT_QUERY, job['id'], self._worker_id)
+            except Exception:
+                logger.exception("Heartbeat for job %s failed", job['id'])
+                continue
+            if result == 'UPDATE 0':
+                logger.warning("Job %s (%s) lost its lease", job['id'], job['kind'])
+                return
+
+    async def _finish(self, job: asyncpg.Record, query: str, *args: Any) -> None:
+        async with self._pool.acquire() as conn:
+            result = await conn.execute(query, job['id'], self._worker_id, *args)
+        if result == 'UPDATE 0':
+            logger.warning(
+                "Dropped result of job %s (%s): its lease expired and it was reaped",
+                job['id'], job['kind']
+            )
+
+    def metrics(self) -> JobMetrics:
+        cutoff = time.monotonic() - 60
+        return JobMetrics(
+            workers=len(self._tasks),
+            in_flight=self._in_flight,
+            claimed=self._claimed,
+            succeeded=self._succeeded,
+            retried=self._retried,
+            failed=self._failed,
+            throughput_per_minute=sum(1 for t in self._finished_at if t >= cutoff),
+            queue_wait_seconds=self._wait.summary(),
+            run_seconds=self._run.summary()
+        )
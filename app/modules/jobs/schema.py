@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import Optional, Dict, Any
+from enum import Enum
+from pydantic import Field
+from ..base.schema import BaseSchema
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class Job(BaseSchema):
+    id: int
+    kind: str
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    status: JobStatus
+    dedupe_key: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    interval_seconds: Optional[int] = None
+    run_at: datetime
+    locked_at: Optional[datetime] = None
+    locked_by: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class LatencySummary(BaseSchema):
+    count: int = 0
+    avg: float = 0.0
+    p50: float = 0.0
+    p95: float = 0.0
+    max: float = 0.0
+
+class JobMetrics(BaseSchema):
+    workers: int
+    in_flight: int
+    claimed: int
+    succeeded: int
+    retried: int
+    failed: int
+    throughput_per_minute: float
+    queue_wait_seconds: LatencySummary
+    run_seconds: LatencySummary
+    queue_depth: Dict[str, int] = Field(default_factory=dict)
@@ -0,0 +1,82 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional
+import asyncpg
+from fastapi import HTTPException, status
+from .schema import Job
+from ...core.config import get_settings
+
+class JobService:
+    def __init__(self, conn: asyncpg.Connection):
+        self._conn = conn
+
+    @staticmethod
+    def _to_job(row: asyncpg.Record) -> Job:
+        data = dict(row)
+        data['payload'] = json.loads(data['payload'])
+        return Job(**data)
+
+    async def enqueue(
+        self,
+        kind: str,
+        payload: Optional[Dict[str, Any]] = None,
+        run_at: Optional[datetime] = None,
+        dedupe_key: Optional[str] = None,
+        interval_seconds: Optional[int] = None,
+        max_attempts: Optional[int] = None
+    ) -> Optional[Job]:
+        """
+        Queue a job. Runs on the caller's connection, so enqueueing inside a
+        transaction makes the job visible only if the transaction commits.
+        Returns None when a live job with the same dedupe_key already exists.
+        """
+        query = '''
+            INSERT INTO jobs (
+                kind, payload, run_at, dedupe_key, interval_seconds,
+                max_attempts
+            )
+            VALUES ($1, $2, COALESCE($3, CURRENT_TIMESTAMP), $4, $5, $6)
+            ON CONFLICT (dedupe_key) WHERE status IN ('queued', 'running')
+            DO NOTHING
+            RETURNING *
+        '''
+        row = await self._conn.fetchrow(
+            query,
+            kind,
+            json.dumps(payload or {}),
+            run_at,
+            dedupe_key,
+            interval_seconds,
+            max_attempts or get_settings().JOB_MAX_ATTEMPTS
+        )
+        return self._to_job(row) if row else None
+
+    async def schedule(
+        self,
+        kind: str,
+        interval_seconds: int,
+        payload: Optional[Dict[str, Any]] = None,
+        dedupe_key: Optional[str] = None
+    ) -> Optional[Job]:
+        """Register a recurring job; a no-op if it is already scheduled"""
+        return await self.enqueue(
+            kind,
+            payload,
+            dedupe_key=dedupe_key or kind,
+            interval_seconds=interval_seconds
+        )
+
+    async def get_job(self, job_id: int) -> Job:
+        row = await self._conn.fetchrow('SELECT * FROM jobs WHERE id = $1', job_id)
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Job {job_id} not found"
+            )
+        return self._to_job(row)
+
+    async def get_queue_depth(self) -> Dict[str, int]:
+        rows = await self._conn.fetch(
+            'SELECT status, COUNT(*) AS count FROM jobs GROUP BY status'
+        )
+        return {row['status']: row['count'] for row in rows}
@@ -1,12 +1,32 @@
-from fastapi import FastAPI, APIRouter, Depends, Query, Path
-from typing import Optional
-from .service import ProjectService
+from fastapi import FastAPI, APIRouter, Depends, Query, Path, HTTPException, Response, status
+from typing import FrozenSet, Optional
+from .service import ProjectService, DEFAULT_INCLUDE
+from .purge import PURGE_JOB, purge_deleted_projects
 from .schema import (
     Project, ProjectCreate, ProjectUpdate,
-    ProjectStatus, ProjectList
+    ProjectStatus, ProjectList, ProjectPurge,
+    ProjectBatch, ProjectBatchRequest, ProjectInclude,
+    EmbeddedTaskOrder, MAX_EMBEDDED_TASKS
 )
 from ..base.module import BaseModule
-from ...core.database import get_connection
+from ..base.repository import get_storage
+from ..base.schema import CountMode, RenderMode
+from ..jobs import JobService, register_job_handler
+from ...core.config import get_settings
+
+def parse_include(value: Optional[str]) -> FrozenSet[ProjectInclude]:
+    if value is None:
+        return DEFAULT_INCLUDE
+    try:
+        return frozenset(
+            ProjectInclude(part.strip()) for part in value.split(",") if part.strip()
+        )
+    except ValueError:
+        allowed = ", ".join(include.value for include in ProjectInclude)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"include must be a comma-separated list of: {allowed}"
+        )
 
 class ProjectModule(BaseModule):
     def __init__(self, app: FastAPI = None):  # Make app optional with default None
@@ -22,10 +42,10 @@ class ProjectModule(BaseModule):
         @self.router.post("/", response_model=Project)
         async def create_project(
             project: ProjectCreate,
-            conn = Depends(get_connection)
+            storage = Depends(get_storage)
         ):
             """Create a new project"""
-            service = ProjectService(conn)
+            service = ProjectService(storage)
             return await service.create_project(project)
 
         @self.router.get("/", response_model=ProjectList)
@@ -45,57 +65,132 @@ class ProjectModule(BaseModule):
                 le=100, 
                 description="Items per page"
             ),
-            conn = Depends(get_connection)
+            count: CountMode = Query(
+                CountMode.EXACT,
+                description="'exact' counts every match, 'estimate' uses planner "
+                            "statistics, 'none' skips the count (see has_more)"
+            ),
+            include: Optional[str] = Query(
+                None,
+                description="Comma-separated expansions: tasks, stats "
+                            "(default: stats)"
+            ),
+            tasks_limit: int = Query(
+                10,
+                ge=1,
+                le=MAX_EMBEDDED_TASKS,
+                description="Tasks embedded per project with include=tasks"
+            ),
+            tasks_order: EmbeddedTaskOrder = Query(
+                EmbeddedTaskOrder.PRIORITY,
+                description="Order of embedded tasks"
+            ),
+            render: RenderMode = Query(
+                RenderMode.APP,
+                description="'db' has Postgres render the JSON response; "
+                            "same document, faster for large pages"
+            ),
+            storage = Depends(get_storage)
         ):
             """Get list of projects with filtering and pagination"""
-            service = ProjectService(conn)
-            return await service.get_projects(
+            service = ProjectService(storage)
+            params = dict(
                 status=status,
                 search=search,
                 page=page,
-                page_size=page_size
+                page_size=page_size,
+                count=count,
+                include=parse_include(include),
+                tasks_limit=tasks_limit,
+                tasks_order=tasks_order
             )
+            if render == RenderMode.DB:
+                return Response(
+                    content=await service.get_projects_json(**params),
+                    media_type="application/json"
+                )
+            return await service.get_projects(**params)
+
+        @self.router.post("/batch", response_model=ProjectBatch)
+        async def get_projects_batch(
+            request: ProjectBatchRequest,
+            storage = Depends(get_storage)
+        ):
+            """Get several projects with statistics by id, in request order"""
+            service = ProjectService(storage)
+            return await service.get_projects_by_ids(request.ids)
 
         @self.router.get("/{project_id}", response_model=Project)
         async def get_project(
             project_id: int = Path(..., gt=0),
-            conn = Depends(get_connection)
+            include: Optional[str] = Query(
+                None,
+                description="Comma-separated expansions: tasks, stats "
+                            "(default: stats)"
+            ),
+            tasks_limit: int = Query(
+                10,
+                ge=1,
+                le=MAX_EMBEDDED_TASKS,
+                description="Tasks embedded per project with include=tasks"
+            ),
+            tasks_order: EmbeddedTaskOrder = Query(
+                EmbeddedTaskOrder.PRIORITY,
+                description="Order of embedded tasks"
+            ),
+            storage = Depends(get_storage)
         ):
-            """Get project details including statistics"""
-            service = ProjectService(conn)
-            return await service.get_project(project_id)
+            """Get project details including statistics and, on request, tasks"""
+            service = ProjectService(storage)
+            return await service.get_project(
+                project_id,
+                include=parse_include(include),
+                tasks_limit=tasks_limit,
+                tasks_order=tasks_order
+            )
 
         @self.router.put("/{project_id}", response_model=Project)
         async def update_project(
             project_update: ProjectUpdate,
             project_id: int = Path(..., gt=0),
-            conn = Depends(get_connection)
+            storage = Depends(get_storage)
         ):
             """Update project details"""
-            service = ProjectService(conn)
+            service = ProjectService(storage)
             return await service.update_project(project_id, project_update)
 
         @self.router.delete("/{project_id}")
         async def delete_project(
             project_id: int = Path(..., gt=0),
-            conn = Depends(get_connection)
+            storage = Depends(get_storage)
         ):
-            """Delete project and all associated tasks"""
-            service = ProjectService(conn)
+            """Delete project; its tasks are purged in the background"""
+            service = ProjectService(storage)
             await service.delete_project(project_id)
             return {"message": "Project deleted successfully"}
 
+        @self.router.get("/{project_id}/purge", response_model=ProjectPurge)
+        async def get_project_purge(
+            project_id: int = Path(..., gt=0),
+            storage = Depends(get_storage)
+        ):
+            """Get progress of the background task purge for a deleted project"""
+            service = ProjectService(storage)
+            return await service.get_purge(project_id)
+
         @self.router.patch("/{project_id}/status", response_model=Project)
         async def change_project_status(
             status: ProjectStatus,
             project_id: int = Path(..., gt=0),
-            conn = Depends(get_connection)
+            storage = Depends(get_storage)
         ):
             """Change project status"""
-            service = ProjectService(conn)
+            service = ProjectService(storage)
             return await service.change_status(project_id, status)
         
     async def init_module(self) -> None:
+        if self.app.state.pool is None:
+            return  # memory storage: no tables or background workers
         async with self.app.state.pool.acquire() as conn:
             # Kiểm tra và tạo enum type nếu chưa tồn tại
             await conn.execute('''
@@ -142,4 +237,38 @@ class ProjectModule(BaseModule):
                         ADD COLUMN status project_status DEFAULT 'planning';
                     END IF;
                 END $$;
-            ''')
\ No newline at end of file
+            ''')
+
+            # Soft delete: deleted projects are hidden and purged in batches
+            await conn.execute('''
+                ALTER TABLE projects ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP;
+
+                -- Names only need to be unique among live projects
+                ALTER TABLE projects DROP CONSTRAINT IF EXISTS projects_name_key;
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_projects_name_live
+                    ON projects(name) WHERE deleted_at IS NULL;
+                -- Task reads skip the tasks of deleted projects until purged
+                CREATE INDEX IF NOT EXISTS idx_projects_deleted
+                    ON projects(id) WHERE deleted_at IS NOT NULL;
+
+                CREATE TABLE IF NOT EXISTS project_purges (
+                    project_id INTEGER PRIMARY KEY,
+                    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+                    deleted_tasks BIGINT NOT NULL DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP,
+                    finished_at TIMESTAMP
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_project_purges_pending
+                    ON project_purges(created_at) WHERE status != 'completed';
+            ''')
+
+            # Each delete queues a purge job; the recurring sweep picks up
+            # purges a run left behind (rows locked by other transactions)
+            register_job_handler(PURGE_JOB, purge_deleted_projects)
+            await JobService(conn).schedule(
+                PURGE_JOB,
+                get_settings().PROJECT_PURGE_INTERVAL_SECONDS,
+                dedupe_key=f"{PURGE_JOB}:sweep"
+            )
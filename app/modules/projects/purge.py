@@ -0,0 +1,128 @@
+# app/modules/projects/purge.py
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import asyncpg
+from ..base import singleflight
+from ...core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+PURGE_JOB = "projects.purge"
+
+# Claim one unfinished purge, delete a bounded batch of its tasks and record
+# progress, all in one transaction. A crash rolls the batch back and the next
+# run (in this or any other process) picks the purge up where it stopped.
+# $2 lists purges to pass over, e.g. ones stuck on rows locked elsewhere.
+PURGE_BATCH_QUERY = '''
+    WITH purge AS (
+        SELECT project_id
+        FROM project_purges
+        WHERE status != 'completed'
+          AND project_id != ALL($2::int[])
+        ORDER BY created_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    ),
+    batch AS (
+        SELECT t.id
+        FROM tasks t, purge
+        WHERE t.project_id = purge.project_id
+        LIMIT $1
+        FOR UPDATE OF t SKIP LOCKED
+    ),
+    deleted AS (
+        DELETE FROM tasks
+        WHERE id IN (SELECT id FROM batch)
+        RETURNING id
+    )
+    SELECT purge.project_id, (SELECT COUNT(*) FROM deleted) AS deleted
+    FROM purge
+'''
+
+async def purge_deleted_projects(pool: asyncpg.Pool, payload: Dict[str, Any]) -> None:
+    """Job handler: remove the tasks of deleted projects in batches"""
+    settings = get_settings()
+    stalled: List[int] = []
+    while True:
+        step = await purge_batch(pool, settings.PROJECT_PURGE_BATCH_SIZE, stalled)
+        if step is None:
+            break
+        project_id, progressed = step
+        if not progressed:
+            # Its remaining rows are locked elsewhere; move on to the next
+            # purge and leave this one to a later run
+            stalled.append(project_id)
+            continue
+        await asyncio.sleep(settings.PROJECT_PURGE_THROTTLE_SECONDS)
+
+    if stalled:
+        logger.info("Project purges waiting on locked rows: %s", stalled)
+
+async def purge_batch(
+    pool: asyncpg.Pool,
+    batch_size: int,
+    skip: Sequence[int] = ()
+) -> Optional[Tuple[int, bool]]:
+    """
+    Run one purge step. Returns None when there is nothing to do, otherwise
+    (project_id, whether the step deleted anything or finished the purge).
+    """
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            row = await conn.fetchrow(PURGE_BATCH_QUERY, batch_size, list(skip))
+            if not row:
+                return None
+            progressed = await _step(conn, row['project_id'], row['deleted'], batch_size)
+    if progressed:
+        singleflight.reads.invalidate()
+    return row['project_id'], progressed
+
+async def _step(
+    conn: asyncpg.Connection,
+    project_id: int,
+    deleted: int,
+    batch_size: int
+) -> bool:
+    """Record progress, or finish the purge once no tasks are left"""
+    if not deleted:
+        # Hot tasks are gone, continue with the archived ones
+        result = await conn.execute('''
+            DELETE FROM tasks_archive
+            WHERE id IN (
+                SELECT id FROM tasks_archive
+                WHERE project_id = $1
+                LIMIT $2
+                FOR UPDATE SKIP LOCKED
+            )
+        ''', project_id, batch_size)
+        deleted = int(result.split()[-1])
+
+    if deleted:
+        await conn.execute('''
+            UPDATE project_purges
+            SET status = 'running',
+                deleted_tasks = deleted_tasks + $2,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE project_id = $1
+        ''', project_id, deleted)
+        return True
+
+    # No tasks left: drop the project row itself
+    remaining = await conn.fetchval('''
+        SELECT EXISTS(SELECT 1 FROM tasks WHERE project_id = $1)
+            OR EXISTS(SELECT 1 FROM tasks_archive WHERE project_id = $1)
+    ''', project_id)
+    if remaining:
+        # Some rows are locked by another transaction, retry later
+        return False
+
+    await conn.execute('DELETE FROM projects WHERE id = $1', project_id)
+    await conn.execute('''
+        UPDATE project_purges
+        SET status = 'completed',
+            updated_at = CURRENT_TIMESTAMP,
+            finished_at = CURRENT_TIMESTAMP
+        WHERE project_id = $1
+    ''', project_id)
+    return True
@@ -0,0 +1,345 @@
+# app/modules/projects/repository.py
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+import asyncpg
+from ..base import singleflight
+from ..base.render import (
+    json_array, json_float, json_number, json_object, json_text, json_timestamp,
+    render_list
+)
+from ..base.repository import DuplicateError, Page, ProjectRepository, Row
+from ..base.schema import CountMode
+from ..base.service import fetch_page, fetch_page_json
+from ..jobs.service import JobService
+from ..tasks.repository import TASK_JSON
+from .purge import PURGE_JOB
+from .schema import ProjectInclude, EmbeddedTaskOrder
+
+EMBEDDED_TASK_ORDER = {
+    EmbeddedTaskOrder.PRIORITY: "priority DESC, end_date, id",
+    EmbeddedTaskOrder.END_DATE: "end_date, id",
+    EmbeddedTaskOrder.CREATED_AT: "created_at DESC, id DESC",
+}
+
+# Task statistics of project row `t` as ProjectStatistics JSON
+STATISTICS_JSON = '''(
+    SELECT %s
+    FROM (
+        SELECT
+            *,
+            completed_tasks::float8 / NULLIF(total_tasks, 0) * 100 AS completion_rate
+        FROM (
+            SELECT
+                COUNT(*) AS total_tasks,
+                COUNT(*) FILTER (WHERE status = 'completed') AS completed_tasks,
+                COUNT(*) FILTER (WHERE status = 'pending') AS pending_tasks,
+                COUNT(*) FILTER (
+                    WHERE end_date < CURRENT_DATE
+                    AND status != 'completed'
+                ) AS overdue_tasks
+            FROM (
+                SELECT status, end_date FROM tasks WHERE project_id = t.id
+                UNION ALL
+                SELECT status, end_date FROM tasks_archive WHERE project_id = t.id
+            ) AS project_tasks
+        ) AS counts
+    ) AS stats
+)''' % json_object([
+    ("total_tasks", json_number("total_tasks")),
+    ("completed_tasks", json_number("completed_tasks")),
+    ("pending_tasks", json_number("pending_tasks")),
+    ("overdue_tasks", json_number("overdue_tasks")),
+    ("completion_rate", json_float("COALESCE(completion_rate, 0)")),
+])
+
+def project_json(
+    include: FrozenSet[ProjectInclude],
+    tasks_limit: int,
+    tasks_order: EmbeddedTaskOrder
+) -> str:
+    """SQL rendering project row `t` as the JSON FastAPI renders for Project"""
+    statistics = "'null'"
+    if ProjectInclude.STATS in include:
+        statistics = STATISTICS_JSON
+
+    tasks = "'null'"
+    if ProjectInclude.TASKS in include:
+        order_by = EMBEDDED_TASK_ORDER[tasks_order]
+        tasks = json_array(
+            TASK_JSON,
+            f'''(
+                SELECT * FROM tasks
+                WHERE project_id = t.id
+                ORDER BY {order_by}
+                LIMIT {int(tasks_limit)}
+            ) AS embedded''',
+            order_by
+        )
+
+    return json_object([
+        ("id", json_number("id")),
+        ("created_at", json_timestamp("created_at")),
+        ("updated_at", json_timestamp("updated_at")),
+        ("name", json_text("name")),
+        ("description", json_text("description")),
+        ("start_date", json_timestamp("start_date")),
+        ("end_date", json_timestamp("end_date")),
+        ("status", json_text("status")),
+        ("statistics", statistics),
+        ("tasks", tasks),
+    ])
+
+class PostgresProjectRepository(ProjectRepository):
+    def __init__(self, conn: asyncpg.Connection, pool: Optional[asyncpg.Pool] = None):
+        self._conn = conn
+        self._pool = pool
+
+    async def create(self, values: Row) -> Row:
+        query = '''
+            INSERT INTO projects (
+                name, description, start_date, end_date, status
+            )
+            VALUES ($1, $2, $3, $4, $5)
+            RETURNING *
+        '''
+        try:
+            row = await self._conn.fetchrow(
+                query,
+                values['name'],
+                values.get('description'),
+                values.get('start_date'),
+                values.get('end_date'),
+                values['status']
+            )
+        except asyncpg.UniqueViolationError:
+            raise DuplicateError(values['name'])
+        singleflight.reads.invalidate()
+        return dict(row)
+
+    async def get(self, project_id: int) -> Optional[Row]:
+        row = await singleflight.fetchrow(self._conn, '''
+            SELECT * FROM projects WHERE id = $1 AND deleted_at IS NULL
+        ''', project_id)
+        return dict(row) if row else None
+
+    async def get_many(self, project_ids: List[int]) -> List[Row]:
+        rows = await singleflight.fetch(self._conn, '''
+            SELECT * FROM projects
+            WHERE id = ANY($1::int[]) AND deleted_at IS NULL
+        ''', project_ids)
+        return [dict(row) for row in rows]
+
+    async def exists(self, project_id: int) -> bool:
+        return await self._conn.fetchval('''
+            SELECT EXISTS(
+                SELECT 1 FROM projects WHERE id = $1 AND deleted_at IS NULL
+            )
+        ''', project_id)
+
+    def _list_query(
+        self,
+        status: Optional[str],
+        search: Optional[str]
+    ) -> Tuple[str, List[Any], Tuple[str, ...]]:
+        """
+        WHERE clause, params and, for a list without filters, the tables to
+        estimate its size from
+        """
+        # Build query conditions
+        conditions = ["deleted_at IS NULL"]
+        params = []
+        param_index = 1
+
+        if status:
+            conditions.append(f"status = ${param_index}")
+            params.append(status)
+            param_index += 1
+
+        if search:
+            conditions.append(
+                f"(name ILIKE ${param_index} OR description ILIKE ${param_index})"
+            )
+            params.append(f"%{search}%")
+            param_index += 1
+
+        tables = () if params else ('projects',)
+        return ' WHERE ' + ' AND '.join(conditions), params, tables
+
+    async def list(
+        self,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 10,
+        count: CountMode = CountMode.EXACT
+    ) -> Page:
+        where_clause, params, tables = self._list_query(status, search)
+        rows, total, has_more = await fetch_page(
+            self._conn,
+            self._pool,
+            'projects',
+            where_clause,
+            params,
+            order_by='created_at DESC',
+            page=page,
+            page_size=page_size,
+            count=count,
+            tables=tables
+        )
+        return [dict(row) for row in rows], total, has_more
+
+    async def list_json(
+        self,
+        status: Optional[str] = None,
+        search: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 10,
+        count: CountMode = CountMode.EXACT,
+        include: FrozenSet[ProjectInclude] = frozenset(),
+        tasks_limit: int = 10,
+        tasks_order: EmbeddedTaskOrder = EmbeddedTaskOrder.PRIORITY
+    ) -> Optional[bytes]:
+        where_clause, params, tables = self._list_query(status, search)
+        items, total, has_more = await fetch_page_json(
+            self._conn,
+            self._pool,
+            'projects',
+            where_clause,
+            params,
+            order_by='created_at DESC',
+            render=project_json(include, tasks_limit, tasks_order),
+            page=page,
+            page_size=page_size,
+            count=count,
+            tables=tables
+        )
+        return render_list(
+            'items',
+            items,
+            total=total,
+            page=page,
+            page_size=page_size,
+            total_pages=None if total is None else (total + page_size - 1) // page_size,
+            has_more=has_more
+        )
+
+    async def update(self, project_id: int, values: Row) -> Optional[Row]:
+        update_fields = []
+        params = []
+        param_index = 1
+
+        for field, value in values.items():
+            update_fields.append(f"{field} = ${param_index}")
+            params.append(value)
+            param_index += 1
+
+        # Add project_id
+        params.append(project_id)
+
+        query = f'''
+            UPDATE projects
+            SET {', '.join(update_fields)}
+            WHERE id = ${param_index} AND deleted_at IS NULL
+            RETURNING *
+        '''
+        try:
+            row = await self._conn.fetchrow(query, *params)
+        except asyncpg.UniqueViolationError:
+            raise DuplicateError(values.get('name'))
+        singleflight.reads.invalidate()
+        return dict(row) if row else None
+
+    async def delete(self, project_id: int) -> bool:
+        # Mark the project deleted and queue a purge job for its tasks
+        # instead of cascading the whole delete in this request
+        async with self._conn.transaction():
+            result = await self._conn.fetchrow('''
+                UPDATE projects
+                SET deleted_at = $1
+                WHERE id = $2 AND deleted_at IS NULL
+                RETURNING id
+            ''', datetime.utcnow(), project_id)
+            if not result:
+                return False
+            await self._conn.execute('''
+                INSERT INTO project_purges (project_id)
+                VALUES ($1)
+                ON CONFLICT (project_id) DO NOTHING
+            ''', project_id)
+            await JobService(self._conn).enqueue(PURGE_JOB, dedupe_key=PURGE_JOB)
+        singleflight.reads.invalidate()
+        return True
+
+    async def get_purge(self, project_id: int) -> Optional[Row]:
+        row = await self._conn.fetchrow(
+            'SELECT * FROM project_purges WHERE project_id = $1', project_id
+        )
+        if not row:
+            return None
+
+        purge = dict(row)
+        if purge['finished_at'] is None:
+            purge['remaining_tasks'] = await self._conn.fetchval('''
+                SELECT
+                    (SELECT COUNT(*) FROM tasks WHERE project_id = $1)
+                    + (SELECT COUNT(*) FROM tasks_archive WHERE project_id = $1)
+            ''', project_id)
+        else:
+            purge['remaining_tasks'] = 0
+        return purge
+
+    async def statistics(self, project_ids: List[int]) -> Dict[int, Row]:
+        """Task statistics for several projects in one grouped aggregate"""
+        stats_query = '''
+            SELECT
+                project_id,
+                COUNT(*) as total_tasks,
+                COUNT(*) FILTER (WHERE status = 'completed') as completed_tasks,
+                COUNT(*) FILTER (WHERE status = 'pending') as pending_tasks,
+                COUNT(*) FILTER (
+                    WHERE end_date < CURRENT_DATE
+                    AND status != 'completed'
+                ) as overdue_tasks
+            FROM (
+                SELECT project_id, status, end_date
+                FROM tasks
+                WHERE project_id = ANY($1::int[])
+                UNION ALL
+                SELECT project_id, status, end_date
+                FROM tasks_archive
+                WHERE project_id = ANY($1::int[])
+            ) AS tasks
+            GROUP BY project_id
+        '''
+        rows = await singleflight.fetch(self._conn, stats_query, project_ids)
+        return {row['project_id']: dict(row) for row in rows}
+
+    async def tasks(
+        self,
+        project_ids: List[int],
+        limit: int,
+        order: str
+    ) -> Dict[int, List[Row]]:
+        """Top `limit` tasks of each project in one LATERAL query"""
+        # Plain rows rather than one json_agg() document per project (as
+        # before the repository split): rows keep asyncpg's native types
+        # (date, datetime), like every other repository method and the
+        # memory backend, instead of JSON strings the caller must reparse
+        order_by = EMBEDDED_TASK_ORDER[EmbeddedTaskOrder(order)]
+        tasks_query = f'''
+            SELECT t.*
+            FROM unnest($1::int[]) AS p(pid)
+            CROSS JOIN LATERAL (
+                SELECT * FROM tasks
+                WHERE project_id = p.pid
+                ORDER BY {order_by}
+                LIMIT $2
+            ) AS t
+            ORDER BY pid, {order_by}
+        '''
+        rows = await singleflight.fetch(self._conn, tasks_query, project_ids, limit)
+
+        tasks = {project_id: [] for project_id in project_ids}
+        for row in rows:
+            tasks[row['project_id']].append(dict(row))
+        return tasks
@@ -1,15 +1,24 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Annotated, Optional, List
 from enum import Enum
 from pydantic import Field
-from ..base.schema import BaseSchema, BaseDBSchema
+from ..base.schema import (
+    BaseSchema, BaseDBSchema, MAX_BATCH_IDS, MAX_ID,
+    ProjectStatus, CLOSED_PROJECT_STATUSES
+)
+from ..tasks.schema import Task
 
-class ProjectStatus(str, Enum):
-    PLANNING = "planning"
-    ACTIVE = "active"
-    ON_HOLD = "on_hold"
-    COMPLETED = "completed"
-    CANCELLED = "cancelled"
+# Upper bound on tasks embedded per project by ?include=tasks
+MAX_EMBEDDED_TASKS = 50
+
+class ProjectInclude(str, Enum):
+    TASKS = "tasks"
+    STATS = "stats"
+
+class EmbeddedTaskOrder(str, Enum):
+    PRIORITY = "priority"
+    END_DATE = "end_date"
+    CREATED_AT = "created_at"
 
 class ProjectStatistics(BaseSchema):
     total_tasks: int = 0
@@ -39,10 +48,35 @@ class Project(BaseDBSchema):
     end_date: Optional[datetime]
     status: ProjectStatus
     statistics: Optional[ProjectStatistics] = None
+    tasks: Optional[List[Task]] = None
 
 class ProjectList(BaseSchema):
     items: List[Project]
-    total: int
+    total: Optional[int]
     page: int
     page_size: int
-    total_pages: int
+    total_pages: Optional[int]
+    has_more: bool = False
+
+class ProjectBatchRequest(BaseSchema):
+    ids: List[Annotated[int, Field(gt=0, le=MAX_ID)]] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_IDS
+    )
+
+class ProjectBatch(BaseSchema):
+    items: List[Project]
+    missing_ids: List[int]
+
+class ProjectPurgeStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+
+class ProjectPurge(BaseSchema):
+    project_id: int
+    status: ProjectPurgeStatus
+    deleted_tasks: int = 0
+    remaining_tasks: Optional[int] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
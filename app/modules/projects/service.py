@@ -1,140 +1,130 @@
 from datetime import datetime
-from typing import List, Optional
-import asyncpg
+from typing import FrozenSet, List, Optional
 from fastapi import HTTPException, status
+from ..base.repository import DuplicateError, Storage
+from ..base.schema import CountMode
 from .schema import (
     Project, ProjectCreate, ProjectUpdate, 
-    ProjectStatus, ProjectList, ProjectStatistics
+    ProjectStatus, ProjectList, ProjectStatistics, ProjectPurge,
+    ProjectBatch, ProjectInclude, EmbeddedTaskOrder
 )
+from ..tasks.schema import Task
+
+# Expansions applied when the client does not pass ?include=
+DEFAULT_INCLUDE = frozenset({ProjectInclude.STATS})
 
 class ProjectService:
-    def __init__(self, conn: asyncpg.Connection):
-        self._conn = conn
+    def __init__(self, storage: Storage):
+        self._projects = storage.projects
 
     async def create_project(self, project: ProjectCreate) -> Project:
-        query = '''
-            INSERT INTO projects (
-                name, description, start_date, end_date, status
-            )
-            VALUES ($1, $2, $3, $4, $5)
-            RETURNING *
-        '''
         try:
-            row = await self._conn.fetchrow(
-                query,
-                project.name,
-                project.description,
-                project.start_date,
-                project.end_date,
-                project.status
-            )
-            return Project(**dict(row))
-        except asyncpg.UniqueViolationError:
+            row = await self._projects.create(project.model_dump())
+        except DuplicateError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Project with this name already exists"
             )
+        return Project(**row)
 
-    async def get_project(self, project_id: int) -> Project:
-        # Get project details
-        project_query = 'SELECT * FROM projects WHERE id = $1'
-        project_row = await self._conn.fetchrow(project_query, project_id)
-        
-        if not project_row:
+    async def get_project(
+        self,
+        project_id: int,
+        include: FrozenSet[ProjectInclude] = DEFAULT_INCLUDE,
+        tasks_limit: int = 10,
+        tasks_order: EmbeddedTaskOrder = EmbeddedTaskOrder.PRIORITY
+    ) -> Project:
+        row = await self._projects.get(project_id)
+        if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Project {project_id} not found"
             )
 
-        # Get project statistics
-        stats_query = '''
-            SELECT 
-                COUNT(*) as total_tasks,
-                COUNT(*) FILTER (WHERE status = 'completed') as completed_tasks,
-                COUNT(*) FILTER (WHERE status = 'pending') as pending_tasks,
-                COUNT(*) FILTER (
-                    WHERE end_date < CURRENT_DATE 
-                    AND status != 'completed'
-                ) as overdue_tasks
-            FROM tasks 
-            WHERE project_id = $1
-        '''
-        stats_row = await self._conn.fetchrow(stats_query, project_id)
-        
-        project = Project(**dict(project_row))
-        
-        # Calculate statistics
-        stats = ProjectStatistics(
-            total_tasks=stats_row['total_tasks'],
-            completed_tasks=stats_row['completed_tasks'],
-            pending_tasks=stats_row['pending_tasks'],
-            overdue_tasks=stats_row['overdue_tasks']
-        )
-        
-        if stats.total_tasks > 0:
-            stats.completion_rate = (stats.completed_tasks / stats.total_tasks) * 100
-            
-        project.statistics = stats
+        project = Project(**row)
+        await self._expand([project], include, tasks_limit, tasks_order)
         return project
 
+    async def get_projects_by_ids(self, project_ids: List[int]) -> ProjectBatch:
+        """Fetch projects by id in request order, reporting missing ids"""
+        ids = list(dict.fromkeys(project_ids))
+        found = {row['id']: row for row in await self._projects.get_many(ids)}
+        projects = [Project(**found[i]) for i in ids if i in found]
+        await self._expand(projects, DEFAULT_INCLUDE, 0, EmbeddedTaskOrder.PRIORITY)
+
+        return ProjectBatch(
+            items=projects,
+            missing_ids=[i for i in ids if i not in found]
+        )
+
+    async def _expand(
+        self,
+        projects: List[Project],
+        include: FrozenSet[ProjectInclude],
+        tasks_limit: int,
+        tasks_order: EmbeddedTaskOrder
+    ) -> None:
+        """Attach requested related resources, one query per expansion"""
+        project_ids = [project.id for project in projects]
+        if not project_ids:
+            return
+
+        if ProjectInclude.STATS in include:
+            counts = await self._projects.statistics(project_ids)
+            for project in projects:
+                stats = ProjectStatistics(**counts.get(project.id, {}))
+                if stats.total_tasks > 0:
+                    stats.completion_rate = (stats.completed_tasks / stats.total_tasks) * 100
+                project.statistics = stats
+
+        if ProjectInclude.TASKS in include:
+            tasks = await self._projects.tasks(project_ids, tasks_limit, tasks_order)
+            for project in projects:
+                project.tasks = []
+                for row in tasks[project.id]:
+                    task = Task(**row)
+                    task.calculate_metadata()
+                    project.tasks.append(task)
+
     async def get_projects(
         self,
         status: Optional[ProjectStatus] = None,
         search: Optional[str] = None,
         page: int = 1,
-        page_size: int = 10
+        page_size: int = 10,
+        count: CountMode = CountMode.EXACT,
+        include: FrozenSet[ProjectInclude] = DEFAULT_INCLUDE,
+        tasks_limit: int = 10,
+        tasks_order: EmbeddedTaskOrder = EmbeddedTaskOrder.PRIORITY
     ) -> ProjectList:
-        # Build query conditions
-        conditions = []
-        params = []
-        param_index = 1
-
-        if status:
-            conditions.append(f"status = ${param_index}")
-            params.append(status)
-            param_index += 1
-
-        if search:
-            conditions.append(
-                f"(name ILIKE ${param_index} OR description ILIKE ${param_index})"
-            )
-            params.append(f"%{search}%")
-            param_index += 1
-
-        # Base query
-        query = 'SELECT * FROM projects'
-        count_query = 'SELECT COUNT(*) FROM projects'
-
-        # Add conditions
-        if conditions:
-            where_clause = ' WHERE ' + ' AND '.join(conditions)
-            query += where_clause
-            count_query += where_clause
-
-        # Add pagination
-        query += ' ORDER BY created_at DESC LIMIT $%d OFFSET $%d' % (
-            param_index, param_index + 1
+        rows, total, has_more = await self._projects.list(
+            status=status,
+            search=search,
+            page=page,
+            page_size=page_size,
+            count=count
         )
-        params.extend([page_size, (page - 1) * page_size])
-
-        # Get total count and records
-        total = await self._conn.fetchval(count_query, *params[:-2])
-        rows = await self._conn.fetch(query, *params)
 
-        # Get statistics for all projects
-        projects = []
-        for row in rows:
-            project = await self.get_project(row['id'])
-            projects.append(project)
+        # Expansions cost one query each, however many projects are on the page
+        projects = [Project(**row) for row in rows]
+        await self._expand(projects, include, tasks_limit, tasks_order)
 
         return ProjectList(
             items=projects,
             total=total,
             page=page,
             page_size=page_size,
-            total_pages=(total + page_size - 1) // page_size
+            total_pages=None if total is None else (total + page_size - 1) // page_size,
+            has_more=has_more
         )
 
+    async def get_projects_json(self, **params) -> bytes:
+        """Same document as get_projects(), rendered by the backend if it can"""
+        body = await self._projects.list_json(**params)
+        if body is None:
+            body = (await self.get_projects(**params)).model_dump_json().encode()
+        return body
+
     async def update_project(
         self, 
         project_id: int, 
@@ -142,80 +132,60 @@ class ProjectService:
     ) -> Project:
         # Verify project exists
         await self.get_project(project_id)
-        
-        # Build update query
-        update_fields = []
-        params = []
-        param_index = 1
-        
-        update_data = project_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            update_fields.append(f"{field} = ${param_index}")
-            params.append(value)
-            param_index += 1
 
-        if not update_fields:
+        update_data = project_update.dict(exclude_unset=True)
+        if not update_data:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="No fields to update"
             )
 
         # Add updated_at
-        update_fields.append(f"updated_at = ${param_index}")
-        params.append(datetime.utcnow())
-        param_index += 1
-
-        # Add project_id
-        params.append(project_id)
-
-        query = f'''
-            UPDATE projects 
-            SET {', '.join(update_fields)}
-            WHERE id = ${param_index}
-            RETURNING *
-        '''
+        update_data['updated_at'] = datetime.utcnow()
 
         try:
-            row = await self._conn.fetchrow(query, *params)
-            return await self.get_project(row['id'])
-        except asyncpg.UniqueViolationError:
+            row = await self._projects.update(project_id, update_data)
+        except DuplicateError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Project with this name already exists"
             )
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Project {project_id} not found"
+            )
+        return await self.get_project(row['id'])
 
     async def delete_project(self, project_id: int) -> bool:
-        # This will automatically delete associated tasks due to CASCADE
-        query = 'DELETE FROM projects WHERE id = $1 RETURNING id'
-        result = await self._conn.fetchrow(query, project_id)
-        if not result:
+        if not await self._projects.delete(project_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Project {project_id} not found"
             )
         return True
 
+    async def get_purge(self, project_id: int) -> ProjectPurge:
+        row = await self._projects.get_purge(project_id)
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No deletion in progress for project {project_id}"
+            )
+        return ProjectPurge(**row)
+
     async def change_status(
         self, 
         project_id: int, 
-        status: ProjectStatus
+        new_status: ProjectStatus
     ) -> Project:
-        query = '''
-            UPDATE projects 
-            SET status = $1, updated_at = $2
-            WHERE id = $3
-            RETURNING *
-        '''
-        row = await self._conn.fetchrow(
-            query, 
-            status, 
-            datetime.utcnow(), 
-            project_id
-        )
+        row = await self._projects.update(project_id, {
+            'status': new_status,
+            'updated_at': datetime.utcnow()
+        })
         if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Project {project_id} not found"
             )
-        
         return await self.get_project(project_id)
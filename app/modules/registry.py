@@ -1,14 +1,18 @@
 # app/modules/registry.py
 from typing import List, Type
 from .base.module import BaseModule
+from .jobs import JobModule
 from .projects import ProjectModule
 from .tasks import TaskModule
+from .system import SystemModule
 from .ui import UIModule  # Thêm UI module
 
 def get_modules() -> List[Type[BaseModule]]:
     """Return list of all available modules"""
     return [
+        JobModule,  # First: other modules schedule jobs during init
         ProjectModule,
         TaskModule,
+        SystemModule,
         UIModule  # Thêm UI module vào danh sách
     ]
\ No newline at end of file
@@ -0,0 +1,39 @@
+# app/modules/storage.py
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+import asyncpg
+from .base.coalesce import WriteCoalescer
+from .base.memory import MemoryBackend
+from .base.repository import Storage, StorageBackend
+from .projects.repository import PostgresProjectRepository
+from .tasks.repository import (
+    CREATE_TASK, SET_TASK_STATUS, PostgresTaskRepository, create_tasks,
+    set_task_statuses
+)
+from ..core.database import connection
+
+class PostgresBackend(StorageBackend):
+    def __init__(self, pool: asyncpg.Pool, coalescer: Optional[WriteCoalescer] = None):
+        self._pool = pool
+        self._coalescer = coalescer
+        if coalescer:
+            coalescer.register(CREATE_TASK, create_tasks)
+            coalescer.register(SET_TASK_STATUS, set_task_statuses)
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[Storage]:
+        async with connection(self._pool) as conn:
+            yield Storage(
+                PostgresProjectRepository(conn, self._pool),
+                PostgresTaskRepository(conn, self._pool, self._coalescer)
+            )
+
+def create_backend(
+    name: str,
+    pool: Optional[asyncpg.Pool] = None,
+    coalescer: Optional[WriteCoalescer] = None
+) -> StorageBackend:
+    """Storage backend selected by Settings.STORAGE_BACKEND"""
+    if name == "memory":
+        return MemoryBackend()
+    return PostgresBackend(pool, coalescer)
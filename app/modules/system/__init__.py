@@ -0,0 +1,108 @@
+from typing import List, Optional
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, status
+from .schema import (
+    SystemMetrics, PoolStats, SingleFlightStats, WriteCoalescerStats,
+    ProfileDetail, ProfileFormat, ProfileSummary
+)
+from ..base import singleflight
+from ..base.module import BaseModule
+
+# Stacks are only sampled for requests picked by header or sample rate
+NO_STACKS = (
+    "Only requests sent with X-Profile-Token or picked by PROFILE_SAMPLE_RATE "
+    "are sampled"
+)
+
+def get_profiler(request: Request, token: Optional[str]):
+    """The app's Profiler, if the caller sent its token"""
+    profiler = request.app.state.profiler
+    if profiler is None or not profiler.authorized(token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Profiling is disabled or the X-Profile-Token header is wrong"
+        )
+    return profiler
+
+def collapsed_response(lines: List[str]) -> Response:
+    return Response(content="\n".join(lines) + "\n", media_type="text/plain")
+
+class SystemModule(BaseModule):
+    def __init__(self, app: FastAPI = None):
+        super().__init__(app)
+        self.prefix = "/system"
+        self.tags = ["system"]
+
+    @property
+    def name(self) -> str:
+        return "system"
+
+    def register_routes(self) -> None:
+        @self.router.get("/metrics", response_model=SystemMetrics)
+        async def get_metrics(request: Request):
+            """Pool usage, read/write coalescing and admission control counters"""
+            pool = request.app.state.pool
+            coalescer = request.app.state.write_coalescer
+            admission = getattr(request.app.state, "admission", None)
+            return SystemMetrics(
+                pool=PoolStats(
+                    size=pool.get_size(),
+                    idle=pool.get_idle_size(),
+                    max_size=pool.get_max_size()
+                ) if pool else None,
+                singleflight=SingleFlightStats(**singleflight.reads.stats()),
+                write_coalescer=WriteCoalescerStats(
+                    **coalescer.stats()
+                ) if coalescer else None,
+                admission=admission.stats() if admission else {}
+            )
+
+        @self.router.get("/profiles", response_model=List[ProfileSummary])
+        async def get_profiles(
+            request: Request,
+            format: ProfileFormat = Query(
+                ProfileFormat.JSON,
+                description="'collapsed' merges every stored profile's stacks "
+                            "into one flamegraph input"
+            ),
+            x_profile_token: Optional[str] = Header(None)
+        ):
+            """Profiled and slow requests in the ring buffer, newest first"""
+            profiler = get_profiler(request, x_profile_token)
+            profiles = list(reversed(profiler.profiles))
+            if format == ProfileFormat.COLLAPSED:
+                lines = [line for profile in profiles for line in profile.collapsed()]
+                if not lines:
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail=NO_STACKS + "; no stored profile has any"
+                    )
+                return collapsed_response(lines)
+            return [profile.summary() for profile in profiles]
+
+        @self.router.get("/profiles/{profile_id}", response_model=ProfileDetail)
+        async def get_profile(
+            request: Request,
+            profile_id: int,
+            format: ProfileFormat = Query(ProfileFormat.JSON),
+            x_profile_token: Optional[str] = Header(None)
+        ):
+            profiler = get_profiler(request, x_profile_token)
+            profile = profiler.get(profile_id)
+            if profile is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"Profile {profile_id} not found"
+                )
+            if format == ProfileFormat.COLLAPSED:
+                if not profile.stacks:
+                    if profile.reason == "slow":
+                        detail = (NO_STACKS + f"; profile {profile_id} was kept "
+                                  "for being slow and has timings only")
+                    else:
+                        detail = (f"Profile {profile_id} ended before its "
+                                  "first sample was taken")
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND, detail=detail
+                    )
+                return collapsed_response(profile.collapsed())
+            return ProfileDetail(**profile.summary(), stacks=profile.collapsed())
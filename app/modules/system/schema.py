@@ -0,0 +1,65 @@
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional
+from pydantic import Field
+from ..base.schema import BaseSchema
+
+class AdmissionClassStats(BaseSchema):
+    limit: int
+    active: int
+    queued: int
+    admitted: int
+    rejected_queue_full: int
+    rejected_timeout: int
+    rejected_overload: int
+    overloaded: bool
+    wait_p99_seconds: float
+    # From arrival at admission control to the end of the response
+    latency_p99_seconds: float
+
+class PoolStats(BaseSchema):
+    size: int
+    idle: int
+    max_size: int
+
+class SingleFlightStats(BaseSchema):
+    executed: int
+    coalesced: int
+    in_flight: int
+
+class WriteCoalescerStats(BaseSchema):
+    queued: int
+    items: int
+    batches: int
+    largest_batch: int
+    mean_batch: float
+    split_batches: int
+
+class SystemMetrics(BaseSchema):
+    pool: Optional[PoolStats]
+    singleflight: SingleFlightStats
+    write_coalescer: Optional[WriteCoalescerStats] = None
+    admission: Dict[str, AdmissionClassStats] = Field(default_factory=dict)
+
+class ProfileFormat(str, Enum):
+    JSON = "json"
+    COLLAPSED = "collapsed"
+
+class ProfileSummary(BaseSchema):
+    id: int
+    method: str
+    path: str
+    reason: str
+    status_code: Optional[int]
+    started_at: datetime
+    duration_ms: float
+    queries: int
+    samples: int
+    # Milliseconds: db, pool_wait and admission_wait are measured;
+    # validation, serialization and app are sampled on-CPU time, left out
+    # when the request was not sampled (samples == 0)
+    breakdown_ms: Dict[str, float]
+
+class ProfileDetail(ProfileSummary):
+    # Collapsed stacks ("frame;frame;frame count"), most sampled first
+    stacks: List[str]
@@ -1,12 +1,39 @@
-from fastapi import FastAPI, APIRouter, Depends, Query, Path
-from typing import Optional
+from fastapi import FastAPI, APIRouter, Depends, Query, Path, HTTPException, Response, status
+from datetime import date
+from typing import List, Optional
 from .service import TaskService
+from .repository import OPEN_TASKS, TASK_PERIOD
+from .archive import ARCHIVE_JOB, CLOSED_TASKS, archive_closed_tasks
 from .schema import (
     Task, TaskCreate, TaskUpdate, TaskStatus,
-    TaskPriority, TaskList
+    TaskPriority, TaskList, TaskBatch, TaskTimeline, TimelineView,
+    NextTasks, MAX_NEXT_PER_PROJECT
 )
 from ..base.module import BaseModule
-from ...core.database import get_connection
+from ..base.repository import get_storage
+from ..base.schema import CountMode, RenderMode, MAX_BATCH_IDS, MAX_ID
+from ..jobs import JobService, register_job_handler
+from ...core.config import get_settings
+
+def parse_ids(value: str) -> List[int]:
+    try:
+        ids = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    if not ids or len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ids must contain between 1 and {MAX_BATCH_IDS} values"
+        )
+    if not all(0 < task_id <= MAX_ID for task_id in ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ids must be between 1 and {MAX_ID}"
+        )
+    return ids
 
 class TaskModule(BaseModule):
     def __init__(self, app: FastAPI = None):  # Make app optional with default None
@@ -22,9 +49,9 @@ class TaskModule(BaseModule):
         @self.router.post("/", response_model=Task)
         async def create_task(
             task: TaskCreate,
-            conn = Depends(get_connection)
+            storage = Depends(get_storage)
         ):
-            service = TaskService(conn)
+            service = TaskService(storage)
             return await service.create_task(task)
 
         @self.router.get("/", response_model=TaskList)
@@ -35,41 +62,124 @@ class TaskModule(BaseModule):
             priority: Optional[TaskPriority] = Query(None, description="Filter by priority"),
             page: int = Query(1, ge=1, description="Page number"),
             page_size: int = Query(10, ge=1, le=100, description="Items per page"),
-            conn = Depends(get_connection)
+            include_archived: bool = Query(
+                False, description="Also return archived (long closed) tasks"
+            ),
+            count: CountMode = Query(
+                CountMode.EXACT,
+                description="'exact' counts every match, 'estimate' uses planner "
+                            "statistics, 'none' skips the count (see has_more)"
+            ),
+            render: RenderMode = Query(
+                RenderMode.APP,
+                description="'db' has Postgres render the JSON response; "
+                            "same document, faster for large pages"
+            ),
+            storage = Depends(get_storage)
         ):
-            service = TaskService(conn)
-            return await service.get_tasks(
+            service = TaskService(storage)
+            params = dict(
                 project_id=project_id,
                 status=status,
                 assignee=assignee,
                 priority=priority,
                 page=page,
-                page_size=page_size
+                page_size=page_size,
+                include_archived=include_archived,
+                count=count
+            )
+            if render == RenderMode.DB:
+                return Response(
+                    content=await service.get_tasks_json(**params),
+                    media_type="application/json"
+                )
+            return await service.get_tasks(**params)
+
+        @self.router.get("/batch", response_model=TaskBatch)
+        async def get_tasks_batch(
+            ids: str = Query(
+                ..., description="Comma-separated task IDs to fetch in one call"
+            ),
+            storage = Depends(get_storage)
+        ):
+            """Get several tasks by id, in request order"""
+            service = TaskService(storage)
+            return await service.get_tasks_by_ids(parse_ids(ids))
+
+        @self.router.get("/timeline", response_model=TaskTimeline)
+        async def get_timeline(
+            window_start: date = Query(..., alias="from", description="First day of the window"),
+            window_end: date = Query(..., alias="to", description="Last day of the window"),
+            project_id: Optional[int] = Query(None, description="Filter by project ID"),
+            status: Optional[TaskStatus] = Query(None, description="Filter by status"),
+            assignee: Optional[str] = Query(None, description="Filter by assignee"),
+            view: TimelineView = Query(
+                TimelineView.TASKS,
+                description="'tasks' for task rows, 'days' for per-day load buckets"
+            ),
+            limit: int = Query(1000, ge=1, le=5000, description="Max task rows"),
+            include_archived: bool = Query(
+                False, description="Also return archived (long closed) tasks"
+            ),
+            storage = Depends(get_storage)
+        ):
+            """Tasks whose start/end dates overlap the window (calendar/Gantt)"""
+            service = TaskService(storage)
+            return await service.get_timeline(
+                window_start=window_start,
+                window_end=window_end,
+                project_id=project_id,
+                status=status,
+                assignee=assignee,
+                view=view,
+                limit=limit,
+                include_archived=include_archived
+            )
+
+        # Before /{task_id}, which would otherwise match "next"
+        @self.router.get("/next", response_model=NextTasks)
+        async def get_next_tasks(
+            per_project: int = Query(
+                3, ge=1, le=MAX_NEXT_PER_PROJECT,
+                description="Open tasks to return per project"
+            ),
+            assignee: Optional[str] = Query(None, description="Filter by assignee"),
+            status: Optional[TaskStatus] = Query(
+                None, description="Filter by status (pending or in_progress)"
+            ),
+            storage = Depends(get_storage)
+        ):
+            """Most urgent open tasks of each active project (standup view)"""
+            service = TaskService(storage)
+            return await service.get_next_tasks(
+                per_project=per_project,
+                assignee=assignee,
+                status=status
             )
 
         @self.router.get("/{task_id}", response_model=Task)
         async def get_task(
             task_id: int,
-            conn = Depends(get_connection)
+            storage = Depends(get_storage)
         ):
-            service = TaskService(conn)
+            service = TaskService(storage)
             return await service.get_task(task_id)
 
         @self.router.put("/{task_id}", response_model=Task)
         async def update_task(
             task_id: int,
             task_update: TaskUpdate,
-            conn = Depends(get_connection)
+            storage = Depends(get_storage)
         ):
-            service = TaskService(conn)
+            service = TaskService(storage)
             return await service.update_task(task_id, task_update)
 
         @self.router.delete("/{task_id}")
         async def delete_task(
             task_id: int,
-            conn = Depends(get_connection)
+            storage = Depends(get_storage)
         ):
-            service = TaskService(conn)
+            service = TaskService(storage)
             await service.delete_task(task_id)
             return {"message": "Task deleted successfully"}
 
@@ -77,13 +187,14 @@ class TaskModule(BaseModule):
         async def change_task_status(
             task_id: int,
             status: TaskStatus,
-            conn = Depends(get_connection)
+            storage = Depends(get_storage)
         ):
-            service = TaskService(conn)
-            print(status)
+            service = TaskService(storage)
             return await service.change_status(task_id, status)
 
     async def init_module(self) -> None:
+        if self.app.state.pool is None:
+            return  # memory storage: no tables or background workers
         async with self.app.state.pool.acquire() as conn:
             # Tạo enum type cho task status
             await conn.execute('''
@@ -116,10 +227,20 @@ class TaskModule(BaseModule):
                 );
                 
                 CREATE INDEX IF NOT EXISTS idx_tasks_project_id ON tasks(project_id);
-                CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
                 CREATE INDEX IF NOT EXISTS idx_tasks_assignee ON tasks(assignee);
             ''')
 
+            # project_id and assignee stay full indexes: project and assignee
+            # filters return closed tasks too, and the project purge and
+            # ON DELETE CASCADE look tasks up by project_id whatever their
+            # status. A status filter only needs open rows here; closed
+            # ones are read through idx_tasks_closed.
+            await conn.execute(f'''
+                DROP INDEX IF EXISTS idx_tasks_status;
+                CREATE INDEX IF NOT EXISTS idx_tasks_status_open
+                    ON tasks(status) WHERE {OPEN_TASKS};
+            ''')
+
             # Kiểm tra và thêm cột status nếu chưa tồn tại
             await conn.execute('''
                 DO $$ 
@@ -133,4 +254,45 @@ class TaskModule(BaseModule):
                         ADD COLUMN status task_status DEFAULT 'pending';
                     END IF;
                 END $$;
-            ''')
\ No newline at end of file
+            ''')
+
+            # Cold tier: closed tasks are moved here by the archive job so
+            # the hot table and its indexes only hold (mostly) open work
+            await conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS tasks_archive (
+                    LIKE tasks INCLUDING DEFAULTS,
+                    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (id)
+                );
+
+                CREATE INDEX IF NOT EXISTS idx_tasks_archive_project
+                    ON tasks_archive(project_id, status, end_date);
+                CREATE INDEX IF NOT EXISTS idx_tasks_archive_assignee
+                    ON tasks_archive(assignee);
+
+                -- Date-range overlap queries for the timeline
+                CREATE INDEX IF NOT EXISTS idx_tasks_period
+                    ON tasks USING GIST (({TASK_PERIOD}));
+                CREATE INDEX IF NOT EXISTS idx_tasks_archive_period
+                    ON tasks_archive USING GIST (({TASK_PERIOD}));
+
+                -- Lets the archive job find its candidates without a scan
+                CREATE INDEX IF NOT EXISTS idx_tasks_closed
+                    ON tasks(COALESCE(updated_at, created_at))
+                    WHERE {CLOSED_TASKS};
+
+                -- Top open tasks per project for /tasks/next, read in order
+                CREATE INDEX IF NOT EXISTS idx_tasks_next
+                    ON tasks(project_id, priority DESC, end_date, id)
+                    WHERE {OPEN_TASKS};
+                CREATE INDEX IF NOT EXISTS idx_tasks_next_assignee
+                    ON tasks(project_id, assignee, priority DESC, end_date, id)
+                    WHERE {OPEN_TASKS};
+            ''')
+
+            settings = get_settings()
+            if settings.TASK_ARCHIVE_ENABLED:
+                register_job_handler(ARCHIVE_JOB, archive_closed_tasks)
+                await JobService(conn).schedule(
+                    ARCHIVE_JOB, settings.TASK_ARCHIVE_INTERVAL_SECONDS
+                )
\ No newline at end of file
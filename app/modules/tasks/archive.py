@@ -0,0 +1,87 @@
+# app/modules/tasks/archive.py
+import asyncio
+import logging
+from typing import Any, Dict
+import asyncpg
+from ..base import singleflight
+from ..base.render import sql_strings
+from .schema import CLOSED_TASK_STATUSES
+from ...core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_JOB = "tasks.archive"
+
+# Columns shared by tasks and tasks_archive, in table order
+TASK_COLUMNS = (
+    "id, project_id, title, description, assignee, start_date, end_date, "
+    "priority, status, created_at, updated_at"
+)
+
+# Hot table plus archive, for reads that ask for archived tasks too
+TASKS_WITH_ARCHIVE = f'''(
+    SELECT {TASK_COLUMNS} FROM tasks
+    UNION ALL
+    SELECT {TASK_COLUMNS} FROM tasks_archive
+) AS tasks'''
+
+# Tasks of a soft-deleted project stay in the tables until the purge job
+# removes them; reads and writes skip them (see idx_projects_deleted)
+LIVE_PROJECT = (
+    "NOT EXISTS (SELECT 1 FROM projects p "
+    "WHERE p.id = tasks.project_id AND p.deleted_at IS NOT NULL)"
+)
+
+# Finished work. The archive query must use this exact predicate to match
+# idx_tasks_closed
+CLOSED_TASKS = f"status IN {sql_strings(CLOSED_TASK_STATUSES)}"
+
+# Move one batch of tasks that have been closed for long enough
+ARCHIVE_BATCH_QUERY = f'''
+    WITH moved AS (
+        DELETE FROM tasks
+        WHERE id IN (
+            SELECT id
+            FROM tasks
+            WHERE {CLOSED_TASKS}
+              AND COALESCE(updated_at, created_at)
+                  < CURRENT_TIMESTAMP - make_interval(days => $1)
+            LIMIT $2
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING {TASK_COLUMNS}
+    )
+    INSERT INTO tasks_archive ({TASK_COLUMNS})
+    SELECT {TASK_COLUMNS} FROM moved
+'''
+
+RESTORE_QUERY = f'''
+    WITH moved AS (
+        DELETE FROM tasks_archive AS tasks
+        WHERE id = $1 AND {LIVE_PROJECT}
+        RETURNING {TASK_COLUMNS}
+    )
+    INSERT INTO tasks ({TASK_COLUMNS})
+    SELECT {TASK_COLUMNS} FROM moved
+'''
+
+async def archive_closed_tasks(pool: asyncpg.Pool, payload: Dict[str, Any]) -> None:
+    """Job handler: move closed tasks out of the hot table in batches"""
+    settings = get_settings()
+    batch_size = settings.TASK_ARCHIVE_BATCH_SIZE
+    total = 0
+    while True:
+        async with pool.acquire() as conn:
+            result = await conn.execute(
+                ARCHIVE_BATCH_QUERY, settings.TASK_ARCHIVE_AFTER_DAYS, batch_size
+            )
+        moved = int(result.split()[-1])
+        total += moved
+        if moved:
+            singleflight.reads.invalidate()
+        if moved < batch_size:
+            break
+        await asyncio.sleep(settings.TASK_ARCHIVE_THROTTLE_SECONDS)
+
+    if total:
+        logger.info("Archived %d closed tasks", total)
@@ -0,0 +1,453 @@
+# app/modules/tasks/repository.py
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+import asyncpg
+from ..base import singleflight
+from ..base.coalesce import WriteCoalescer
+from ..base.render import (
+    json_bool, json_number, json_object, json_text, json_timestamp, render_list,
+    sql_strings
+)
+from ..base.repository import Page, Row, TaskRepository
+from ..base.schema import CLOSED_PROJECT_STATUSES, CountMode
+from ..base.service import fetch_page, fetch_page_json
+from .archive import LIVE_PROJECT, TASK_COLUMNS, TASKS_WITH_ARCHIVE, RESTORE_QUERY
+from .schema import CLOSED_TASK_STATUSES
+
+# Date range covered by a task. LEAST/GREATEST keep it valid for rows whose
+# dates were saved in the wrong order; the GiST indexes use this expression.
+TASK_PERIOD = (
+    "daterange(LEAST(start_date, end_date), GREATEST(start_date, end_date), '[]')"
+)
+
+# A task row as the JSON FastAPI renders for Task, including the fields
+# Task.calculate_metadata() fills in. CURRENT_DATE is the database's date;
+# keep the app and database in the same time zone.
+TASK_JSON = json_object([
+    ("id", json_number("id")),
+    ("created_at", json_timestamp("created_at")),
+    ("updated_at", json_timestamp("updated_at")),
+    ("title", json_text("title")),
+    ("description", json_text("description")),
+    ("assignee", json_text("assignee")),
+    ("start_date", json_text("start_date")),
+    ("end_date", json_text("end_date")),
+    ("priority", json_number("priority")),
+    ("status", json_text("status")),
+    ("project_id", json_number("project_id")),
+    ("is_overdue", json_bool("end_date < CURRENT_DATE AND status != 'completed'")),
+    ("days_remaining", json_number("GREATEST(end_date - CURRENT_DATE, 0)")),
+])
+
+# Open work. Queries must use this exact predicate to match the partial
+# indexes built with it
+OPEN_TASKS = f"status NOT IN {sql_strings(CLOSED_TASK_STATUSES)}"
+
+# Kinds of write PostgresTaskRepository sends through a WriteCoalescer
+CREATE_TASK = "tasks.create"
+SET_TASK_STATUS = "tasks.status"
+
+# Insert many tasks in one statement, skipping those whose project is
+# missing or deleted. Ids are drawn up front so each input row can be
+# matched with what was inserted for it; skipped rows come back all NULL.
+CREATE_BATCH_QUERY = '''
+    WITH input AS (
+        SELECT nextval(pg_get_serial_sequence('tasks', 'id')) AS id, i.*
+        FROM unnest(
+            $1::text[], $2::text[], $3::text[], $4::date[], $5::date[],
+            $6::int[], $7::int[], $8::text[]
+        ) WITH ORDINALITY AS i(
+            title, description, assignee, start_date, end_date,
+            priority, project_id, status, ord
+        )
+    ),
+    inserted AS (
+        INSERT INTO tasks (
+            id, title, description, assignee, start_date, end_date,
+            priority, project_id, status
+        )
+        SELECT id, title, description, assignee, start_date, end_date,
+               priority, project_id, status::task_status
+        FROM input
+        WHERE EXISTS (
+            SELECT 1 FROM projects
+            WHERE projects.id = input.project_id AND deleted_at IS NULL
+        )
+        RETURNING id, title, description, assignee, start_date,
+                  end_date, priority, status, project_id,
+                  created_at, updated_at
+    )
+    SELECT inserted.*
+    FROM input LEFT JOIN inserted ON inserted.id = input.id
+    ORDER BY input.ord
+'''
+
+SET_STATUS_BATCH_QUERY = f'''
+    UPDATE tasks
+    SET status = i.status::task_status, updated_at = i.updated_at
+    FROM unnest($1::int[], $2::text[], $3::timestamp[]) AS i(id, status, updated_at)
+    WHERE tasks.id = i.id AND {LIVE_PROJECT}
+    RETURNING tasks.*
+'''
+
+def _plain(value: Any) -> Any:
+    """Enum members as their values, for array parameters"""
+    return getattr(value, 'value', value)
+
+async def create_tasks(conn: asyncpg.Connection, tasks: List[Row]) -> List[Optional[Row]]:
+    """Insert tasks in one statement; None for each one without a live project"""
+    columns = (
+        "title", "description", "assignee", "start_date", "end_date",
+        "priority", "project_id", "status"
+    )
+    rows = await conn.fetch(CREATE_BATCH_QUERY, *(
+        [_plain(values.get(column)) for values in tasks] for column in columns
+    ))
+    singleflight.reads.invalidate()
+    return [dict(row) if row['id'] is not None else None for row in rows]
+
+async def set_task_statuses(
+    conn: asyncpg.Connection,
+    changes: List[Tuple[int, Row]]
+) -> List[Optional[Row]]:
+    """
+    Apply (task_id, {status, updated_at}) changes in one statement per
+    round. A task changed n times in the batch is changed in n rounds, in
+    caller order, so the last change wins and every caller gets the row
+    as its own change left it.
+    """
+    # Round k holds the k-th change of each task: task_id -> index in changes
+    rounds: List[Dict[int, int]] = []
+    seen: Dict[int, int] = {}
+    for index, (task_id, _) in enumerate(changes):
+        round_index = seen.get(task_id, 0)
+        seen[task_id] = round_index + 1
+        if round_index == len(rounds):
+            rounds.append({})
+        rounds[round_index][task_id] = index
+
+    results: List[Optional[Row]] = [None] * len(changes)
+    repository = PostgresTaskRepository(conn)
+    for round_changes in rounds:
+        values = [changes[index][1] for index in round_changes.values()]
+        rows = await conn.fetch(
+            SET_STATUS_BATCH_QUERY,
+            list(round_changes),
+            [_plain(change['status']) for change in values],
+            [change['updated_at'] for change in values]
+        )
+        found = {row['id']: dict(row) for row in rows}
+        for task_id, index in round_changes.items():
+            if task_id in found:
+                results[index] = found[task_id]
+            else:
+                # Archived tasks take the single-row path, which restores
+                # them first
+                results[index] = await repository.update(task_id, changes[index][1])
+    singleflight.reads.invalidate()
+    return results
+
+def _filters(
+    params: List[Any],
+    project_id: Optional[int] = None,
+    status: Optional[str] = None,
+    assignee: Optional[str] = None,
+    priority: Optional[int] = None
+) -> List[str]:
+    """Conditions for the given filters; their values are appended to params"""
+    conditions = []
+    for column, value in (
+        ("project_id", project_id),
+        ("status", status),
+        ("assignee", assignee),
+        ("priority", priority),
+    ):
+        if value:
+            params.append(value)
+            conditions.append(f"{column} = ${len(params)}")
+    return conditions
+
+class PostgresTaskRepository(TaskRepository):
+    def __init__(
+        self,
+        conn: asyncpg.Connection,
+        pool: Optional[asyncpg.Pool] = None,
+        coalescer: Optional[WriteCoalescer] = None
+    ):
+        self._conn = conn
+        self._pool = pool
+        self._coalescer = coalescer
+
+    async def create(self, values: Row) -> Optional[Row]:
+        if self._coalescer:
+            return await self._coalescer.submit(CREATE_TASK, values)
+        return (await create_tasks(self._conn, [values]))[0]
+
+    async def get(self, task_id: int) -> Optional[Row]:
+        row = await singleflight.fetchrow(
+            self._conn, f'SELECT * FROM tasks WHERE id = $1 AND {LIVE_PROJECT}', task_id
+        )
+        if not row:
+            row = await singleflight.fetchrow(
+                self._conn,
+                f'''
+                    SELECT {TASK_COLUMNS} FROM tasks_archive AS tasks
+                    WHERE id = $1 AND {LIVE_PROJECT}
+                ''',
+                task_id
+            )
+        return dict(row) if row else None
+
+    async def get_many(self, task_ids: List[int]) -> List[Row]:
+        rows = await singleflight.fetch(
+            self._conn,
+            f'SELECT * FROM tasks WHERE id = ANY($1::int[]) AND {LIVE_PROJECT}',
+            task_ids
+        )
+        found = {row['id']: dict(row) for row in rows}
+
+        # Look for the rest in the archive
+        missing = [i for i in task_ids if i not in found]
+        if missing:
+            rows = await singleflight.fetch(self._conn, f'''
+                SELECT {TASK_COLUMNS} FROM tasks_archive AS tasks
+                WHERE id = ANY($1::int[]) AND {LIVE_PROJECT}
+            ''', missing)
+            found.update({row['id']: dict(row) for row in rows})
+        return list(found.values())
+
+    def _list_query(
+        self,
+        project_id: Optional[int],
+        status: Optional[str],
+        assignee: Optional[str],
+        priority: Optional[int],
+        include_archived: bool
+    ) -> Tuple[str, str, List[Any], Tuple[str, ...]]:
+        """
+        Source, WHERE clause, params and, for a list without filters, the
+        tables to estimate its size from
+        """
+        params = []
+        conditions = _filters(params, project_id, status, assignee, priority)
+        where_clause = ' WHERE ' + ' AND '.join(conditions + [LIVE_PROJECT])
+
+        if include_archived:
+            source, tables = TASKS_WITH_ARCHIVE, ('tasks', 'tasks_archive')
+        else:
+            source, tables = 'tasks', ('tasks',)
+        return source, where_clause, params, () if conditions else tables
+
+    async def list(
+        self,
+        project_id: Optional[int] = None,
+        status: Optional[str] = None,
+        assignee: Optional[str] = None,
+        priority: Optional[int] = None,
+        include_archived: bool = False,
+        page: int = 1,
+        page_size: int = 10,
+        count: CountMode = CountMode.EXACT
+    ) -> Page:
+        source, where_clause, params, tables = self._list_query(
+            project_id, status, assignee, priority, include_archived
+        )
+        rows, total, has_more = await fetch_page(
+            self._conn,
+            self._pool,
+            source,
+            where_clause,
+            params,
+            order_by='created_at DESC',
+            page=page,
+            page_size=page_size,
+            count=count,
+            tables=tables
+        )
+        return [dict(row) for row in rows], total, has_more
+
+    async def list_json(
+        self,
+        project_id: Optional[int] = None,
+        status: Optional[str] = None,
+        assignee: Optional[str] = None,
+        priority: Optional[int] = None,
+        include_archived: bool = False,
+        page: int = 1,
+        page_size: int = 10,
+        count: CountMode = CountMode.EXACT
+    ) -> Optional[bytes]:
+        source, where_clause, params, tables = self._list_query(
+            project_id, status, assignee, priority, include_archived
+        )
+        items, total, has_more = await fetch_page_json(
+            self._conn,
+            self._pool,
+            source,
+            where_clause,
+            params,
+            order_by='created_at DESC',
+            render=TASK_JSON,
+            page=page,
+            page_size=page_size,
+            count=count,
+            tables=tables
+        )
+        return render_list(
+            'tasks',
+            items,
+            total=total,
+            page=page,
+            page_size=page_size,
+            total_pages=None if total is None else (total + page_size - 1) // page_size,
+            has_more=has_more
+        )
+
+    def _window_query(
+        self,
+        window_start: date,
+        window_end: date,
+        project_id: Optional[int],
+        status: Optional[str],
+        assignee: Optional[str],
+        include_archived: bool
+    ) -> Tuple[str, str, List[Any]]:
+        params = [window_start, window_end]
+        conditions = [f"{TASK_PERIOD} && daterange($1, $2, '[]')"]
+        conditions += _filters(params, project_id, status, assignee)
+        conditions.append(LIVE_PROJECT)
+        source = TASKS_WITH_ARCHIVE if include_archived else 'tasks'
+        return source, ' WHERE ' + ' AND '.join(conditions), params
+
+    async def timeline(
+        self,
+        window_start: date,
+        window_end: date,
+        project_id: Optional[int] = None,
+        status: Optional[str] = None,
+        assignee: Optional[str] = None,
+        include_archived: bool = False,
+        limit: int = 1000
+    ) -> List[Row]:
+        source, where_clause, params = self._window_query(
+            window_start, window_end, project_id, status, assignee, include_archived
+        )
+        query = f'''
+            SELECT * FROM {source}{where_clause}
+            ORDER BY start_date, id
+            LIMIT ${len(params) + 1}
+        '''
+        rows = await singleflight.fetch(self._conn, query, *params, limit)
+        return [dict(row) for row in rows]
+
+    async def day_buckets(
+        self,
+        window_start: date,
+        window_end: date,
+        project_id: Optional[int] = None,
+        status: Optional[str] = None,
+        assignee: Optional[str] = None,
+        include_archived: bool = False
+    ) -> Dict[date, Row]:
+        source, where_clause, params = self._window_query(
+            window_start, window_end, project_id, status, assignee, include_archived
+        )
+        # Expand each matching task over the days it covers inside the window
+        query = f'''
+            SELECT day::date AS day,
+                   COUNT(*) AS task_count,
+                   SUM(priority) AS priority_total
+            FROM (SELECT * FROM {source}{where_clause}) AS matched
+            CROSS JOIN LATERAL generate_series(
+                GREATEST(LEAST(start_date, end_date), $1),
+                LEAST(GREATEST(start_date, end_date), $2),
+                interval '1 day'
+            ) AS day
+            GROUP BY day
+        '''
+        rows = await singleflight.fetch(self._conn, query, *params)
+        return {row['day']: dict(row) for row in rows}
+
+    async def next_up(
+        self,
+        per_project: int,
+        assignee: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> List[Row]:
+        # One index range scan of at most `per_project` rows per project
+        # (idx_tasks_next / idx_tasks_next_assignee), whatever the backlog
+        params = [per_project]
+        conditions = [OPEN_TASKS] + _filters(params, status=status, assignee=assignee)
+        query = f'''
+            SELECT t.*, p.name AS project_name
+            FROM projects AS p
+            CROSS JOIN LATERAL (
+                SELECT * FROM tasks
+                WHERE project_id = p.id AND {' AND '.join(conditions)}
+                ORDER BY priority DESC, end_date, id
+                LIMIT $1
+            ) AS t
+            WHERE p.deleted_at IS NULL
+              AND p.status NOT IN {sql_strings(CLOSED_PROJECT_STATUSES)}
+            ORDER BY p.id, t.priority DESC, t.end_date, t.id
+        '''
+        rows = await singleflight.fetch(self._conn, query, *params)
+        return [dict(row) for row in rows]
+
+    async def update(self, task_id: int, values: Row) -> Optional[Row]:
+        update_fields = []
+        params = []
+        param_index = 1
+
+        for field, value in values.items():
+            update_fields.append(f"{field} = ${param_index}")
+            params.append(value)
+            param_index += 1
+
+        # Add task_id
+        params.append(task_id)
+
+        query = f'''
+            UPDATE tasks
+            SET {', '.join(update_fields)}
+            WHERE id = ${param_index} AND {LIVE_PROJECT}
+            RETURNING *
+        '''
+        row = await self._conn.fetchrow(query, *params)
+        if not row:
+            # Archived tasks move back to the hot table before they change.
+            # In one transaction, so a failed update leaves the task archived
+            # and the archive job never sees it restored but unchanged
+            async with self._conn.transaction():
+                if await self._restore(task_id):
+                    row = await self._conn.fetchrow(query, *params)
+        if not row:
+            return None
+        singleflight.reads.invalidate()
+        return dict(row)
+
+    async def set_status(self, task_id: int, status: str) -> Optional[Row]:
+        values = {'status': status, 'updated_at': datetime.utcnow()}
+        if self._coalescer:
+            return await self._coalescer.submit(SET_TASK_STATUS, (task_id, values))
+        return await self.update(task_id, values)
+
+    async def delete(self, task_id: int) -> bool:
+        result = await self._conn.fetchrow(
+            f'DELETE FROM tasks WHERE id = $1 AND {LIVE_PROJECT} RETURNING id', task_id
+        )
+        if not result:
+            result = await self._conn.fetchrow(f'''
+                DELETE FROM tasks_archive AS tasks
+                WHERE id = $1 AND {LIVE_PROJECT}
+                RETURNING id
+            ''', task_id)
+        if not result:
+            return False
+        singleflight.reads.invalidate()
+        return True
+
+    async def _restore(self, task_id: int) -> bool:
+        """Move an archived task back to the hot table so it can be changed"""
+        result = await self._conn.execute(RESTORE_QUERY, task_id)
+        return result != 'INSERT 0 0'
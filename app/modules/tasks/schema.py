@@ -10,6 +10,16 @@ class TaskStatus(str, Enum):
     COMPLETED = "completed"
     CANCELLED = "cancelled"
 
+# Statuses of finished work, which the archive job moves out of tasks
+CLOSED_TASK_STATUSES = (TaskStatus.COMPLETED, TaskStatus.CANCELLED)
+# Statuses of work still to do; GET /tasks/next only covers these
+OPEN_TASK_STATUSES = tuple(
+    task_status for task_status in TaskStatus if task_status not in CLOSED_TASK_STATUSES
+)
+
+# Upper bound on tasks per project from GET /tasks/next
+MAX_NEXT_PER_PROJECT = 20
+
 class TaskPriority(int, Enum):
     LOW = 1
     MEDIUM = 2
@@ -58,7 +68,36 @@ class Task(BaseDBSchema):
 
 class TaskList(BaseSchema):
     tasks: list[Task]
-    total: int
+    total: Optional[int]
     page: int
     page_size: int
-    total_pages: int
\ No newline at end of file
+    total_pages: Optional[int]
+    has_more: bool = False
+
+class TaskBatch(BaseSchema):
+    tasks: list[Task]
+    missing_ids: list[int]
+
+class TimelineView(str, Enum):
+    TASKS = "tasks"
+    DAYS = "days"
+
+class TimelineBucket(BaseSchema):
+    day: date
+    task_count: int = 0
+    priority_total: int = 0
+
+class TaskTimeline(BaseSchema):
+    window_start: date
+    window_end: date
+    tasks: Optional[list[Task]] = None
+    buckets: Optional[list[TimelineBucket]] = None
+
+class ProjectNextTasks(BaseSchema):
+    project_id: int
+    project_name: str
+    tasks: list[Task]
+
+class NextTasks(BaseSchema):
+    per_project: int
+    projects: list[ProjectNextTasks]
@@ -1,71 +1,90 @@
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from typing import List, Optional
-import asyncpg
 from fastapi import HTTPException, status
-from .schema import Task, TaskCreate, TaskUpdate, TaskStatus, TaskList
+from ..base.repository import Row, Storage
+from ..base.schema import CountMode
+from .schema import (
+    Task, TaskCreate, TaskUpdate, TaskStatus, TaskList, TaskBatch,
+    TaskTimeline, TimelineBucket, TimelineView, NextTasks, ProjectNextTasks,
+    OPEN_TASK_STATUSES
+)
+
+# Longest window accepted for per-day buckets
+MAX_TIMELINE_DAYS = 366
+
+def validate_window(window_start: date, window_end: date, view: TimelineView) -> None:
+    if window_end < window_start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'to' cannot be earlier than 'from'"
+        )
+    if view == TimelineView.DAYS and (window_end - window_start).days >= MAX_TIMELINE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Day buckets are limited to {MAX_TIMELINE_DAYS} days"
+        )
+
+def validate_open_status(task_status: Optional[TaskStatus]) -> None:
+    if task_status is not None and task_status not in OPEN_TASK_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="status must be one of the open statuses: "
+                   + ", ".join(open_status.value for open_status in OPEN_TASK_STATUSES)
+        )
 
 class TaskService:
-    def __init__(self, conn: asyncpg.Connection):
-        self._conn = conn
+    def __init__(self, storage: Storage):
+        self._storage = storage
+        self._tasks = storage.tasks
+
+    def _to_task(self, row: Row) -> Task:
+        task = Task(**row)
+        task.calculate_metadata()
+        return task
 
     async def create_task(self, task: TaskCreate) -> Task:
-        # Kiểm tra project tồn tại
-        project_exists = await self._conn.fetchval(
-            'SELECT EXISTS(SELECT 1 FROM projects WHERE id = $1)',
-            task.project_id
+        project_missing = HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Project {task.project_id} not found"
         )
-        if not project_exists:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Project {task.project_id} not found"
-            )
 
         # Validate dates
         if task.end_date < task.start_date:
+            # Kiểm tra project tồn tại: a missing project is reported first
+            if not await self._storage.projects.exists(task.project_id):
+                raise project_missing
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="End date cannot be earlier than start date"
             )
 
-        query = '''
-            INSERT INTO tasks (
-                title, description, assignee, start_date, end_date,
-                priority, project_id, status
-            )
-            VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-            RETURNING id, title, description, assignee, start_date,
-                      end_date, priority, status, project_id,
-                      created_at, updated_at
-        '''
-        row = await self._conn.fetchrow(
-            query,
-            task.title,
-            task.description,
-            task.assignee,
-            task.start_date,
-            task.end_date,
-            task.priority,
-            task.project_id,
-            TaskStatus.PENDING
-        )
-        
-        task_obj = Task(**dict(row))
-        task_obj.calculate_metadata()
-        return task_obj
+        # The project check happens in the insert
+        row = await self._tasks.create({
+            **task.model_dump(),
+            'status': TaskStatus.PENDING
+        })
+        if not row:
+            raise project_missing
+        return self._to_task(row)
 
     async def get_task(self, task_id: int) -> Optional[Task]:
-        query = 'SELECT * FROM tasks WHERE id = $1'
-        row = await self._conn.fetchrow(query, task_id)
-        
+        row = await self._tasks.get(task_id)
         if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Task {task_id} not found"
             )
-        
-        task = Task(**dict(row))
-        task.calculate_metadata()
-        return task
+        return self._to_task(row)
+
+    async def get_tasks_by_ids(self, task_ids: List[int]) -> TaskBatch:
+        """Fetch tasks by id in request order, reporting missing ids"""
+        ids = list(dict.fromkeys(task_ids))
+        found = {row['id']: row for row in await self._tasks.get_many(ids)}
+
+        return TaskBatch(
+            tasks=[self._to_task(found[i]) for i in ids if i in found],
+            missing_ids=[i for i in ids if i not in found]
+        )
 
     async def get_tasks(
         self,
@@ -74,133 +93,138 @@ class TaskService:
         assignee: Optional[str] = None,
         priority: Optional[int] = None,
         page: int = 1,
-        page_size: int = 10
+        page_size: int = 10,
+        include_archived: bool = False,
+        count: CountMode = CountMode.EXACT
     ) -> TaskList:
-        # Build query conditions
-        conditions = []
-        params = []
-        param_index = 1
-
-        if project_id:
-            conditions.append(f"project_id = ${param_index}")
-            params.append(project_id)
-            param_index += 1
-
-        if status:
-            conditions.append(f"status = ${param_index}")
-            params.append(status)
-            param_index += 1
-
-        if assignee:
-            conditions.append(f"assignee = ${param_index}")
-            params.append(assignee)
-            param_index += 1
-
-        if priority:
-            conditions.append(f"priority = ${param_index}")
-            params.append(priority)
-            param_index += 1
-
-        # Base query
-        query = 'SELECT * FROM tasks'
-        count_query = 'SELECT COUNT(*) FROM tasks'
-
-        # Add conditions
-        if conditions:
-            where_clause = ' WHERE ' + ' AND '.join(conditions)
-            query += where_clause
-            count_query += where_clause
-
-        # Add pagination
-        query += ' ORDER BY created_at DESC LIMIT $%d OFFSET $%d' % (
-            param_index, param_index + 1
+        rows, total, has_more = await self._tasks.list(
+            project_id=project_id,
+            status=status,
+            assignee=assignee,
+            priority=priority,
+            include_archived=include_archived,
+            page=page,
+            page_size=page_size,
+            count=count
         )
-        params.extend([page_size, (page - 1) * page_size])
-
-        # Get total count and records
-        total = await self._conn.fetchval(count_query, *params[:-2])
-        rows = await self._conn.fetch(query, *params)
-
-        # Create task objects
-        tasks = []
-        for row in rows:
-            task = Task(**dict(row))
-            task.calculate_metadata()
-            tasks.append(task)
 
         return TaskList(
-            tasks=tasks,
+            tasks=[self._to_task(row) for row in rows],
             total=total,
             page=page,
             page_size=page_size,
-            total_pages=(total + page_size - 1) // page_size
+            total_pages=None if total is None else (total + page_size - 1) // page_size,
+            has_more=has_more
+        )
+
+    async def get_tasks_json(self, **filters) -> bytes:
+        """Same document as get_tasks(), rendered by the backend if it can"""
+        body = await self._tasks.list_json(**filters)
+        if body is None:
+            body = (await self.get_tasks(**filters)).model_dump_json().encode()
+        return body
+
+    async def get_timeline(
+        self,
+        window_start: date,
+        window_end: date,
+        project_id: Optional[int] = None,
+        status: Optional[TaskStatus] = None,
+        assignee: Optional[str] = None,
+        view: TimelineView = TimelineView.TASKS,
+        limit: int = 1000,
+        include_archived: bool = False
+    ) -> TaskTimeline:
+        """Tasks whose date range overlaps the window, or per-day load"""
+        validate_window(window_start, window_end, view)
+        filters = dict(
+            project_id=project_id,
+            status=status,
+            assignee=assignee,
+            include_archived=include_archived
+        )
+        timeline = TaskTimeline(window_start=window_start, window_end=window_end)
+
+        if view == TimelineView.DAYS:
+            found = await self._tasks.day_buckets(window_start, window_end, **filters)
+            timeline.buckets = []
+            for offset in range((window_end - window_start).days + 1):
+                day = window_start + timedelta(days=offset)
+                row = found.get(day)
+                timeline.buckets.append(TimelineBucket(
+                    day=day,
+                    task_count=row['task_count'] if row else 0,
+                    priority_total=row['priority_total'] if row else 0
+                ))
+            return timeline
+
+        rows = await self._tasks.timeline(
+            window_start, window_end, limit=limit, **filters
+        )
+        timeline.tasks = [self._to_task(row) for row in rows]
+        return timeline
+
+    async def get_next_tasks(
+        self,
+        per_project: int,
+        assignee: Optional[str] = None,
+        status: Optional[TaskStatus] = None
+    ) -> NextTasks:
+        """Most urgent open tasks of each project, most urgent project first"""
+        validate_open_status(status)
+        projects = {}
+        for row in await self._tasks.next_up(per_project, assignee=assignee, status=status):
+            group = projects.get(row['project_id'])
+            if group is None:
+                group = projects[row['project_id']] = ProjectNextTasks(
+                    project_id=row['project_id'],
+                    project_name=row['project_name'],
+                    tasks=[]
+                )
+            group.tasks.append(self._to_task(row))
+
+        # Rows come most urgent first within each project
+        return NextTasks(
+            per_project=per_project,
+            projects=sorted(projects.values(), key=lambda group: (
+                -group.tasks[0].priority, group.tasks[0].end_date, group.project_id
+            ))
         )
 
     async def update_task(self, task_id: int, task_update: TaskUpdate) -> Task:
-        # Get current task
-        current_task = await self.get_task(task_id)
-        
-        # Build update query
-        update_fields = []
-        params = []
-        param_index = 1
-        
         update_data = task_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            update_fields.append(f"{field} = ${param_index}")
-            params.append(value)
-            param_index += 1
-
-        if not update_fields:
+        if not update_data:
+            # Make sure the task exists
+            await self.get_task(task_id)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="No fields to update"
             )
 
         # Add updated_at
-        update_fields.append(f"updated_at = ${param_index}")
-        params.append(datetime.utcnow())
-        param_index += 1
-
-        # Add task_id
-        params.append(task_id)
-
-        query = f'''
-            UPDATE tasks 
-            SET {', '.join(update_fields)}
-            WHERE id = ${param_index}
-            RETURNING *
-        '''
-
-        row = await self._conn.fetchrow(query, *params)
-        task = Task(**dict(row))
-        task.calculate_metadata()
-        return task
+        update_data['updated_at'] = datetime.utcnow()
+
+        row = await self._tasks.update(task_id, update_data)
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Task {task_id} not found"
+            )
+        return self._to_task(row)
 
     async def delete_task(self, task_id: int) -> bool:
-        query = 'DELETE FROM tasks WHERE id = $1 RETURNING id'
-        result = await self._conn.fetchrow(query, task_id)
-        if not result:
+        if not await self._tasks.delete(task_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Task {task_id} not found"
             )
         return True
 
-    async def change_status(self, task_id: int, status: TaskStatus) -> Task:
-        query = '''
-            UPDATE tasks 
-            SET status = $1, updated_at = $2
-            WHERE id = $3
-            RETURNING *
-        '''
-        row = await self._conn.fetchrow(query, status, datetime.utcnow(), task_id)
+    async def change_status(self, task_id: int, new_status: TaskStatus) -> Task:
+        row = await self._tasks.set_status(task_id, new_status)
         if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Task {task_id} not found"
             )
-        
-        task = Task(**dict(row))
-        task.calculate_metadata()
-        return task
\ No newline at end of file
+        return self._to_task(row)
@@ -1,8 +1,12 @@
 # app/modules/ui/__init__.py
-from fastapi import FastAPI, APIRouter, Request
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, APIRouter, Request, Response
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
+from typing import Optional
+from .assets import (
+    Asset, AssetManifest, IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL,
+    etag_matches
+)
 from ..base.module import BaseModule
 
 class UIModule(BaseModule):
@@ -10,27 +14,52 @@ class UIModule(BaseModule):
         super().__init__(app)
         self.prefix = ""  # Empty prefix for root URL
         self.tags = ["ui"]
+        self.assets = AssetManifest(Path(__file__).parent / "static")
+        self.index: Optional[Asset] = None
 
     @property
     def name(self) -> str:
         return "ui"
 
     def register_routes(self) -> None:
-        # Mount static files
-        static_path = Path(__file__).parent / "static"
-        self.app.mount("/static", StaticFiles(directory=str(static_path)), name="static")
-        
         # Setup templates
         templates_path = Path(__file__).parent / "templates"
         self.templates = Jinja2Templates(directory=str(templates_path))
+        self.templates.env.globals["asset_url"] = self.assets.url
 
         @self.router.get("/", tags=["ui"])
         async def index(request: Request):
             """Serve the main UI page"""
-            return self.templates.TemplateResponse(
-                "index.html",
-                {"request": request}
+            return self._serve(request, self.index, REVALIDATE_CACHE_CONTROL)
+
+        @self.router.get("/static/{path:path}", tags=["ui"])
+        async def static(path: str, request: Request):
+            """Serve a static file, fingerprinted names are cached forever"""
+            asset, immutable = self.assets.get(path)
+            if asset is None:
+                return Response(status_code=404)
+            cache_control = (
+                IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
             )
+            return self._serve(request, asset, cache_control)
+
+    def _serve(self, request: Request, asset: Asset, cache_control: str) -> Response:
+        headers = {
+            "Cache-Control": cache_control,
+            "ETag": asset.etag,
+            "Vary": "Accept-Encoding",
+        }
+        if etag_matches(request.headers.get("if-none-match", ""), asset.etag):
+            return Response(status_code=304, headers=headers)
+
+        body, encoding = asset.negotiate(request.headers.get("accept-encoding", ""))
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(body, media_type=asset.content_type, headers=headers)
 
     async def init_module(self) -> None:
-        pass
\ No newline at end of file
+        # Fingerprint and precompress static files, then render the index
+        # once against the fingerprinted URLs
+        self.assets.build()
+        html = self.templates.get_template("index.html").render()
+        self.index = Asset(html.encode(), "text/html; charset=utf-8")
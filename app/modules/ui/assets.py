@@ -0,0 +1,114 @@
+# app/modules/ui/assets.py
+import gzip
+import hashlib
+import mimetypes
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+try:
+    import brotli
+except ImportError:  # in requirements.txt; without it assets are served gzip-only
+    brotli = None
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# Smaller files are not worth compressing
+MIN_COMPRESS_SIZE = 256
+
+def accepted_encodings(accept_encoding: str) -> Set[str]:
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip())
+    return accepted
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match check: the header may list several tags, or be "*".
+    Uses weak comparison, so W/"x" matches "x" (RFC 9110, 13.1.2).
+    """
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+class Asset:
+    """One static file with its precompressed variants"""
+
+    def __init__(self, body: bytes, content_type: str):
+        self.body = body
+        self.content_type = content_type
+        self.digest = hashlib.sha256(body).hexdigest()[:12]
+        self.etag = f'"{self.digest}"'
+        self.encodings: Dict[str, bytes] = {}
+
+        if len(body) >= MIN_COMPRESS_SIZE:
+            compressed = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(compressed) < len(body):
+                self.encodings["gzip"] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(body, quality=11)
+                if len(compressed) < len(body):
+                    self.encodings["br"] = compressed
+
+    def negotiate(self, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+        """Pick the best precompressed variant the client accepts"""
+        accepted = accepted_encodings(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in self.encodings:
+                return self.encodings[encoding], encoding
+        return self.body, None
+
+class AssetManifest:
+    """
+    Content-hashed view of the static directory. Every file is reachable
+    under its fingerprinted name (js/app.<hash>.js), which is safe to cache
+    forever, and under its plain name, which clients must revalidate.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._assets: Dict[str, Asset] = {}
+        self._hashed_paths: Dict[str, str] = {}
+
+    def build(self) -> None:
+        assets: Dict[str, Asset] = {}
+        hashed_paths: Dict[str, str] = {}
+        for file in sorted(self.root.rglob("*")):
+            if not file.is_file():
+                continue
+            path = file.relative_to(self.root).as_posix()
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            if content_type.startswith("text/") or content_type.endswith("javascript"):
+                content_type += "; charset=utf-8"
+            asset = Asset(file.read_bytes(), content_type)
+
+            stem, dot, suffix = path.rpartition(".")
+            hashed = f"{stem}.{asset.digest}.{suffix}" if dot else f"{path}.{asset.digest}"
+            assets[path] = asset
+            assets[hashed] = asset
+            hashed_paths[path] = hashed
+
+        self._assets = assets
+        self._hashed_paths = hashed_paths
+
+    def url(self, path: str) -> str:
+        return f"/static/{self._hashed_paths.get(path, path)}"
+
+    def get(self, path: str) -> Tuple[Optional[Asset], bool]:
+        """Return the asset and whether it was requested by fingerprinted name"""
+        asset = self._assets.get(path)
+        return asset, asset is not None and path not in self._hashed_paths
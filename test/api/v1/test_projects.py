@@ -0,0 +1,141 @@
+import asyncio
+import time
+import uuid
+from datetime import date, timedelta
+import pytest
+from app.main import app
+from app.modules.projects.purge import purge_deleted_projects
+
+API = "/api/v1"
+
+@pytest.fixture
+def search(client, execute):
+    """Create projects sharing a unique name prefix; returns the prefix"""
+    prefix = f"projects-{uuid.uuid4()}"
+    today = date.today()
+
+    first = client.post(f"{API}/projects/", json={
+        "name": f"{prefix} \"quoted\" ü",
+        "description": "line\nbreak",
+        "start_date": "2026-01-01T08:30:00",
+        "end_date": "2026-12-31T17:00:00.250000",
+    }).json()
+    for index in range(3):
+        response = client.post(f"{API}/tasks/", json={
+            "project_id": first["id"],
+            "title": f"task {index}",
+            "assignee": "alice",
+            "start_date": str(today - timedelta(days=5)),
+            "end_date": str(today + timedelta(days=index - 1)),
+            "priority": index + 1,
+        })
+        client.patch(
+            f"{API}/tasks/{response.json()['id']}/status",
+            params={"status": "completed" if index == 0 else "pending"}
+        )
+
+    # No tasks: zero statistics and an empty embedded list
+    second = client.post(f"{API}/projects/", json={"name": f"{prefix} empty"}).json()
+    execute(
+        "UPDATE projects SET created_at = date_trunc('second', created_at) WHERE id = $1",
+        second["id"]
+    )
+    return prefix
+
+@pytest.mark.parametrize("query", [
+    "",
+    "&include=tasks",
+    "&include=tasks,stats&tasks_limit=2&tasks_order=end_date",
+    "&include=",
+    "&page_size=1&count=none",
+    "&status=planning&page=2&page_size=1",
+])
+def test_db_rendered_list_matches_project_list(client, search, query):
+    url = f"{API}/projects/?search={search}{query}"
+    expected = client.get(url)
+    actual = client.get(url + "&render=db")
+
+    assert actual.status_code == expected.status_code == 200
+    assert actual.content == expected.content
+
+def create_project_with_tasks(client, count):
+    project = client.post(f"{API}/projects/", json={
+        "name": f"purge-{uuid.uuid4()}"
+    }).json()
+    task_ids = [
+        client.post(f"{API}/tasks/", json={
+            "project_id": project["id"],
+            "title": f"task {index}",
+            "assignee": "alice",
+            "start_date": str(date.today()),
+            "end_date": str(date.today()),
+        }).json()["id"]
+        for index in range(count)
+    ]
+    return project["id"], task_ids
+
+def wait_for_purge(client, project_id, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        purge = client.get(f"{API}/projects/{project_id}/purge").json()
+        if purge["status"] == "completed" or time.monotonic() > deadline:
+            return purge
+        time.sleep(0.1)
+
+def test_deleted_project_hides_its_tasks(client):
+    project_id, task_ids = create_project_with_tasks(client, 2)
+
+    assert client.delete(f"{API}/projects/{project_id}").status_code == 200
+    assert client.get(f"{API}/projects/{project_id}").status_code == 404
+    listed = client.get(f"{API}/tasks/", params={"project_id": project_id}).json()
+    assert listed["tasks"] == [] and listed["total"] == 0
+    assert client.get(f"{API}/tasks/{task_ids[0]}").status_code == 404
+    # Writes miss them too, before the purge gets to them
+    task_id = task_ids[0]
+    assert client.put(f"{API}/tasks/{task_id}", json={"priority": 5}).status_code == 404
+    assert client.patch(
+        f"{API}/tasks/{task_id}/status", params={"status": "completed"}
+    ).status_code == 404
+    assert client.delete(f"{API}/tasks/{task_id}").status_code == 404
+
+    purge = wait_for_purge(client, project_id)
+    assert purge["status"] == "completed"
+    assert purge["deleted_tasks"] == 2
+
+def test_purge_moves_past_locked_rows(client):
+    pool = app.state.pool
+    if pool is None:
+        pytest.skip("Needs the postgres storage backend")
+    stuck_id, stuck_tasks = create_project_with_tasks(client, 2)
+    free_id, _ = create_project_with_tasks(client, 3)
+
+    # Another transaction holds some of the tasks of the first project
+    conn = client.portal.call(pool.acquire)
+    transaction = conn.transaction()
+    client.portal.call(transaction.start)
+    try:
+        client.portal.call(
+            conn.execute,
+            'SELECT 1 FROM tasks WHERE id = ANY($1::int[]) FOR UPDATE',
+            stuck_tasks
+        )
+        client.delete(f"{API}/projects/{stuck_id}")
+        client.delete(f"{API}/projects/{free_id}")
+
+        # The run finishes the other purge and returns instead of spinning
+        client.portal.call(asyncio.wait_for, purge_deleted_projects(pool, {}), 5)
+        assert wait_for_purge(client, free_id)["status"] == "completed"
+        assert client.get(f"{API}/projects/{stuck_id}/purge").json()["status"] != "completed"
+    finally:
+        client.portal.call(transaction.rollback)
+        client.portal.call(pool.release, conn)
+
+    client.portal.call(purge_deleted_projects, pool, {})
+    purge = wait_for_purge(client, stuck_id)
+    assert purge["status"] == "completed"
+    assert purge["deleted_tasks"] == 2
+
+def test_status_change_of_missing_project(client):
+    response = client.patch(f"{API}/projects/99999999/status", params={"status": "active"})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Project 99999999 not found"
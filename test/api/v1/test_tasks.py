@@ -0,0 +1,108 @@
+import uuid
+from datetime import date, timedelta
+import pytest
+
+API = "/api/v1"
+
+@pytest.fixture
+def project_id(client):
+    response = client.post(f"{API}/projects/", json={"name": f"tasks-{uuid.uuid4()}"})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+@pytest.fixture
+def tasks(client, execute, project_id):
+    today = date.today()
+    payloads = [
+        {
+            "title": 'Quote " backslash \\ tab \t newline \n',
+            "assignee": "Nguyễn Văn A",
+            "start_date": str(today - timedelta(days=10)),
+            "end_date": str(today - timedelta(days=3)),
+            "priority": 5,
+        },
+        {
+            "title": "Control \x01 and emoji 🚀",
+            "description": "</script>   \x7f",
+            "assignee": "bob",
+            "start_date": str(today),
+            "end_date": str(today + timedelta(days=10)),
+        },
+        {
+            "title": "Due today",
+            "description": "",
+            "assignee": "bob",
+            "start_date": str(today),
+            "end_date": str(today),
+            "priority": 1,
+        },
+    ]
+    ids = []
+    for payload in payloads:
+        response = client.post(f"{API}/tasks/", json={**payload, "project_id": project_id})
+        assert response.status_code == 200
+        ids.append(response.json()["id"])
+
+    client.patch(f"{API}/tasks/{ids[0]}/status", params={"status": "completed"})
+    client.put(f"{API}/tasks/{ids[1]}", json={"priority": 4})
+    # Timestamps without microseconds are printed without a fraction
+    execute("UPDATE tasks SET created_at = date_trunc('second', created_at) WHERE id = $1", ids[2])
+    return ids
+
+@pytest.mark.parametrize("query", [
+    "",
+    "&status=pending",
+    "&assignee=bob&page_size=1",
+    "&page=2&page_size=2",
+    "&page=5",
+    "&count=none&page_size=2",
+    "&include_archived=true",
+])
+def test_db_rendered_list_matches_task_list(client, project_id, tasks, query):
+    url = f"{API}/tasks/?project_id={project_id}{query}"
+    expected = client.get(url)
+    actual = client.get(url + "&render=db")
+
+    assert actual.status_code == expected.status_code == 200
+    assert actual.headers["content-type"] == expected.headers["content-type"]
+    assert actual.content == expected.content
+
+def test_next_tasks(client, project_id, tasks):
+    response = client.get(f"{API}/tasks/next", params={"per_project": 1})
+    assert response.status_code == 200
+    (group,) = [g for g in response.json()["projects"] if g["project_id"] == project_id]
+    # tasks[0] is completed; tasks[1] now has priority 4
+    assert [task["id"] for task in group["tasks"]] == [tasks[1]]
+
+    # Filtered by assignee: bob's open tasks by priority; A's only task is done
+    response = client.get(f"{API}/tasks/next", params={"assignee": "bob"})
+    (group,) = [g for g in response.json()["projects"] if g["project_id"] == project_id]
+    assert [task["id"] for task in group["tasks"]] == [tasks[1], tasks[2]]
+    response = client.get(f"{API}/tasks/next", params={"assignee": "Nguyễn Văn A"})
+    assert project_id not in [g["project_id"] for g in response.json()["projects"]]
+
+    response = client.get(f"{API}/tasks/next", params={"status": "completed"})
+    assert response.status_code == 400
+
+def test_tasks_batch(client, tasks):
+    response = client.get(f"{API}/tasks/batch", params={"ids": f"{tasks[2]},{tasks[0]},0x"})
+    assert response.status_code == 400
+
+    response = client.get(f"{API}/tasks/batch", params={"ids": f"{tasks[2]},{tasks[0]},2147483647"})
+    assert response.status_code == 200
+    body = response.json()
+    assert [task["id"] for task in body["tasks"]] == [tasks[2], tasks[0]]
+    assert body["missing_ids"] == [2147483647]
+
+@pytest.mark.parametrize("ids", ["99999999999", "0", "-1"])
+def test_batch_ids_out_of_range(client, ids):
+    response = client.get(f"{API}/tasks/batch", params={"ids": ids})
+    assert response.status_code == 400
+
+    response = client.post(f"{API}/projects/batch", json={"ids": [int(ids)]})
+    assert response.status_code == 422
+
+def test_status_change_of_missing_task(client):
+    response = client.patch(f"{API}/tasks/99999999/status", params={"status": "completed"})
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Task 99999999 not found"
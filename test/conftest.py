@@ -0,0 +1,40 @@
+import asyncpg
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+@pytest.fixture(scope="session")
+def client():
+    """Client for the app against the database configured in Settings"""
+    client = TestClient(app)
+    try:
+        client.__enter__()
+    except (OSError, asyncpg.PostgresError) as exc:
+        pytest.skip(f"Database not available: {exc}")
+    yield client
+    client.__exit__(None, None, None)
+
+@pytest.fixture
+def pool(client):
+    """The app's connection pool"""
+    if app.state.pool is None:
+        pytest.skip("Needs the postgres storage backend")
+    return app.state.pool
+
+@pytest.fixture
+def execute(client, pool):
+    """Run SQL directly, for state the API cannot produce"""
+    async def run(query, *args):
+        async with pool.acquire() as conn:
+            return await conn.execute(query, *args)
+    return lambda query, *args: client.portal.call(run, query, *args)
+
+@pytest.fixture
+def run(client, pool):
+    """Run `fn(pool, conn)` on the app's event loop with a pooled connection"""
+    def run(fn):
+        async def scenario():
+            async with pool.acquire() as conn:
+                return await fn(pool, conn)
+        return client.portal.call(scenario)
+    return run
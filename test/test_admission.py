@@ -0,0 +1,159 @@
+"""AdmissionController and AdmissionMiddleware, without a database"""
+import asyncio
+import json
+import pytest
+from app.core.admission import (
+    AdmissionController, AdmissionMiddleware, AdmissionRejected, class_limits
+)
+
+def controller(read=2, write=1, bulk=1, capacity=3, **kwargs):
+    return AdmissionController(
+        limits={"read": read, "write": write, "bulk": bulk},
+        capacity=capacity,
+        **kwargs
+    )
+
+async def pending(coro):
+    """Start `coro` and let it run until it blocks"""
+    task = asyncio.ensure_future(coro)
+    await asyncio.sleep(0.01)
+    return task
+
+def test_class_limit_queues_until_release():
+    async def scenario():
+        admission = controller(read=2)
+        await admission.acquire("read")
+        await admission.acquire("read")
+        third = await pending(admission.acquire("read"))
+        assert not third.done()
+        assert admission.stats()["read"]["queued"] == 1
+
+        admission.release("read")
+        await asyncio.sleep(0.01)
+        assert third.done()
+        assert admission.stats()["read"]["active"] == 2
+    asyncio.run(scenario())
+
+def test_other_classes_pass_a_class_at_its_limit():
+    async def scenario():
+        admission = controller(read=1, write=1, bulk=1, capacity=3)
+        await admission.acquire("read")
+        queued_read = await pending(admission.acquire("read"))
+
+        # Reads wait on their own limit; writes and bulk still have room
+        await asyncio.wait_for(admission.acquire("write"), 0.1)
+        await asyncio.wait_for(admission.acquire("bulk"), 0.1)
+        assert not queued_read.done()
+        queued_read.cancel()
+    asyncio.run(scenario())
+
+def test_shared_capacity_goes_to_higher_priority_first():
+    async def scenario():
+        admission = controller(read=2, write=2, bulk=2, capacity=2)
+        await admission.acquire("bulk")
+        await admission.acquire("bulk")
+        write = await pending(admission.acquire("write"))
+        read = await pending(admission.acquire("read"))
+
+        admission.release("bulk")
+        await asyncio.sleep(0.01)
+        assert read.done() and not write.done()
+        write.cancel()
+    asyncio.run(scenario())
+
+def test_timeout_and_full_queue_are_rejected():
+    async def scenario():
+        admission = controller(write=1, max_queue=1, max_wait=0.05, retry_after=7)
+        await admission.acquire("write")
+        waiting = await pending(admission.acquire("write"))
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.acquire("write")
+        assert (rejected.value.status_code, rejected.value.retry_after) == (429, 7)
+
+        with pytest.raises(AdmissionRejected) as rejected:
+            await waiting
+        assert rejected.value.status_code == 503
+
+        stats = admission.stats()["write"]
+        assert (stats["rejected_queue_full"], stats["rejected_timeout"]) == (1, 1)
+        assert (stats["active"], stats["queued"]) == (1, 0)
+    asyncio.run(scenario())
+
+def test_limits_derived_from_capacity():
+    assert class_limits(8, {"read": 0, "write": 0, "bulk": 0}) == {
+        "read": 8, "write": 4, "bulk": 2
+    }
+    assert class_limits(2, {"read": 0, "write": 0, "bulk": 5}) == {
+        "read": 2, "write": 1, "bulk": 5
+    }
+
+def test_standing_queue_serves_newest_and_sheds_stale():
+    async def scenario():
+        admission = controller(read=1, target_wait=0.2, interval=0.15)
+        await admission.acquire("read")
+        older = await pending(admission.acquire("read"))
+        await asyncio.sleep(0.3)
+        newer = await pending(admission.acquire("read"))
+
+        # Queued past the target for a whole interval without the queue
+        # draining: overloaded, and the oldest waiter is shed
+        with pytest.raises(AdmissionRejected) as rejected:
+            await asyncio.wait_for(older, 0.2)
+        assert rejected.value.status_code == 503
+        assert admission.stats()["read"]["overloaded"]
+
+        # Newest first; the other is shed once past the target
+        newest = await pending(admission.acquire("read"))
+        admission.release("read")
+        await asyncio.sleep(0.01)
+        assert newest.done() and not newer.done()
+        with pytest.raises(AdmissionRejected):
+            await asyncio.wait_for(newer, 0.2)
+
+        stats = admission.stats()["read"]
+        assert (stats["rejected_overload"], stats["rejected_timeout"]) == (2, 0)
+        assert (stats["active"], stats["queued"]) == (1, 0)
+        # A drained queue ends the overload
+        assert not stats["overloaded"]
+    asyncio.run(scenario())
+
+def test_middleware_sheds_with_retry_after():
+    async def scenario():
+        admission = controller(read=1, max_wait=0.05, retry_after=3)
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        middleware = AdmissionMiddleware(app, admission, path_prefix="/api")
+
+        async def call(path):
+            messages = []
+            scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+
+            async def send(message):
+                messages.append(message)
+            await middleware(scope, None, send)
+            return messages
+
+        first = await pending(call("/api/tasks/"))
+        shed = await call("/api/tasks/")
+        start = shed[0]
+        assert start["status"] == 503
+        assert (b"retry-after", b"3") in start["headers"]
+        assert json.loads(shed[1]["body"]) == {
+            "detail": "Server is overloaded, retry later"
+        }
+
+        # Paths outside the prefix skip admission control
+        outside = await pending(call("/ui/"))
+        release.set()
+        assert (await first)[0]["status"] == 200
+        assert (await outside)[0]["status"] == 200
+        stats = admission.stats()["read"]
+        assert stats["active"] == 0
+        assert stats["latency_p99_seconds"] >= 0.05
+    asyncio.run(scenario())
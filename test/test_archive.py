@@ -0,0 +1,107 @@
+"""Archiving closed tasks to tasks_archive, and restoring them on change"""
+import uuid
+from datetime import date
+import asyncpg
+import pytest
+from app.modules.tasks.archive import ARCHIVE_JOB, archive_closed_tasks
+from app.modules.tasks.repository import PostgresTaskRepository
+
+API = "/api/v1"
+
+@pytest.fixture
+def archived(client, execute):
+    """A project with one open task and one archived task; returns their ids"""
+    project = client.post(f"{API}/projects/", json={
+        "name": f"archive-{uuid.uuid4()}"
+    }).json()
+    ids = []
+    for title in ("open", "done"):
+        ids.append(client.post(f"{API}/tasks/", json={
+            "project_id": project["id"],
+            "title": title,
+            "assignee": "alice",
+            "start_date": str(date.today()),
+            "end_date": str(date.today()),
+        }).json()["id"])
+    open_id, done_id = ids
+    client.patch(f"{API}/tasks/{done_id}/status", params={"status": "completed"})
+    execute(
+        "UPDATE tasks SET updated_at = CURRENT_TIMESTAMP - interval '90 days' WHERE id = $1",
+        done_id
+    )
+
+    client.portal.call(archive_closed_tasks, client.app.state.pool, {})
+    return project["id"], open_id, done_id
+
+def listed(client, project_id, **params):
+    response = client.get(f"{API}/tasks/", params={"project_id": project_id, **params})
+    return [task["id"] for task in response.json()["tasks"]]
+
+def table_of(client, task_id):
+    async def find(conn):
+        return await conn.fetchval('''
+            SELECT 'tasks' FROM tasks WHERE id = $1
+            UNION ALL
+            SELECT 'tasks_archive' FROM tasks_archive WHERE id = $1
+        ''', task_id)
+
+    async def run():
+        async with client.app.state.pool.acquire() as conn:
+            return await find(conn)
+    return client.portal.call(run)
+
+def test_archive_moves_only_old_closed_tasks(client, archived):
+    project_id, open_id, done_id = archived
+    assert table_of(client, open_id) == "tasks"
+    assert table_of(client, done_id) == "tasks_archive"
+
+    assert listed(client, project_id) == [open_id]
+    assert sorted(listed(client, project_id, include_archived=True)) == [open_id, done_id]
+
+    response = client.get(f"{API}/tasks/{done_id}")
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+
+def test_changing_an_archived_task_restores_it(client, archived):
+    project_id, open_id, done_id = archived
+
+    response = client.patch(f"{API}/tasks/{done_id}/status", params={"status": "pending"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "pending"
+    assert table_of(client, done_id) == "tasks"
+    assert sorted(listed(client, project_id)) == [open_id, done_id]
+
+def test_failed_change_leaves_task_archived(client, run, archived):
+    _, _, done_id = archived
+
+    async def scenario(pool, conn):
+        # Fails on the row itself, i.e. after the restore
+        with pytest.raises(asyncpg.CheckViolationError):
+            await PostgresTaskRepository(conn).update(done_id, {"priority": 9})
+    run(scenario)
+    assert table_of(client, done_id) == "tasks_archive"
+
+def test_archived_task_of_deleted_project_stays_put(client, archived):
+    project_id, _, done_id = archived
+    client.delete(f"{API}/projects/{project_id}")
+
+    response = client.patch(f"{API}/tasks/{done_id}/status", params={"status": "pending"})
+    assert response.status_code == 404
+    assert client.delete(f"{API}/tasks/{done_id}").status_code == 404
+    assert table_of(client, done_id) in ("tasks_archive", None)
+
+def test_deleting_an_archived_task(client, archived):
+    _, _, done_id = archived
+    assert client.delete(f"{API}/tasks/{done_id}").status_code == 200
+    assert table_of(client, done_id) is None
+    assert client.get(f"{API}/tasks/{done_id}").status_code == 404
+
+def test_archive_job_is_scheduled(client, execute):
+    async def run():
+        async with client.app.state.pool.acquire() as conn:
+            return await conn.fetchrow('''
+                SELECT status, interval_seconds FROM jobs
+                WHERE dedupe_key = $1 AND status IN ('queued', 'running')
+            ''', ARCHIVE_JOB)
+    job = client.portal.call(run)
+    assert job is not None and job["interval_seconds"] > 0
@@ -0,0 +1,36 @@
+"""Static asset fingerprinting, compression and revalidation"""
+import pytest
+from app.modules.ui.assets import Asset, brotli, etag_matches
+
+BODY = b"body { color: red; }\n" * 40
+
+@pytest.mark.parametrize("header, matches", [
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"old", W/"abc"', True),
+    ('"old",W/"abc" ', True),
+    ("*", True),
+    ('"old"', False),
+    ('W/"abcd"', False),
+    ("", False),
+])
+def test_etag_matches(header, matches):
+    assert etag_matches(header, '"abc"') is matches
+
+def test_negotiate_prefers_brotli():
+    asset = Asset(BODY, "text/css")
+    assert asset.negotiate("gzip;q=0, identity") == (BODY, None)
+    assert asset.negotiate("gzip")[1] == "gzip"
+    expected = "br" if brotli is not None else "gzip"
+    assert asset.negotiate("gzip, deflate, br")[1] == expected
+
+def test_static_revalidation(client):
+    response = client.get("/")
+    etag = response.headers["etag"]
+    assert response.status_code == 200
+
+    for header in (etag, f"W/{etag}", f'"stale", {etag}'):
+        response = client.get("/", headers={"If-None-Match": header})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+    assert client.get("/", headers={"If-None-Match": '"stale"'}).status_code == 200
@@ -0,0 +1,116 @@
+"""WriteCoalescer with the task write flushes, against postgres"""
+import asyncio
+import uuid
+from datetime import date, datetime
+import asyncpg
+from app.modules.base.coalesce import WriteCoalescer
+from app.modules.tasks.repository import (
+    CREATE_TASK, SET_TASK_STATUS, create_tasks, set_task_statuses
+)
+
+def coalescing(fn, window=0.05, max_batch=100):
+    """Scenario for `run` calling `fn(coalescer, conn)` with a fresh coalescer"""
+    async def scenario(pool, conn):
+        coalescer = WriteCoalescer(pool, window=window, max_batch=max_batch)
+        coalescer.register(CREATE_TASK, create_tasks)
+        coalescer.register(SET_TASK_STATUS, set_task_statuses)
+        await coalescer.start()
+        try:
+            return await fn(coalescer, conn)
+        finally:
+            await coalescer.close()
+    return scenario
+
+async def create_project(conn):
+    return await conn.fetchval(
+        "INSERT INTO projects (name, status) VALUES ($1, 'planning') RETURNING id",
+        f"coalesce-{uuid.uuid4()}"
+    )
+
+def task(project_id, title, priority=3):
+    return {
+        "project_id": project_id,
+        "title": title,
+        "description": None,
+        "assignee": "alice",
+        "start_date": date(2024, 1, 1),
+        "end_date": date(2024, 1, 5),
+        "priority": priority,
+        "status": "pending",
+    }
+
+def test_creates_share_one_statement(run):
+    async def scenario(coalescer, conn):
+        project_id = await create_project(conn)
+        titles = [f"t{i}" for i in range(20)]
+        rows = await asyncio.gather(
+            *(coalescer.submit(CREATE_TASK, task(project_id, title)) for title in titles),
+            coalescer.submit(CREATE_TASK, task(0, "orphan"))
+        )
+        assert [row["title"] for row in rows[:-1]] == titles
+        assert rows[-1] is None
+        assert len({row["id"] for row in rows[:-1]}) == len(titles)
+        assert coalescer.stats()["batches"] == 1
+
+        stored = await conn.fetch(
+            "SELECT id, title, status FROM tasks WHERE project_id = $1", project_id
+        )
+        assert {(r["id"], r["title"]) for r in stored} == {
+            (row["id"], row["title"]) for row in rows[:-1]
+        }
+        assert {r["status"] for r in stored} == {"pending"}
+    run(coalescing(scenario))
+
+def test_batch_is_flushed_at_max_size(run):
+    async def scenario(coalescer, conn):
+        project_id = await create_project(conn)
+        await asyncio.gather(*(
+            coalescer.submit(CREATE_TASK, task(project_id, f"t{i}")) for i in range(10)
+        ))
+        stats = coalescer.stats()
+        assert stats["batches"] == 3 and stats["largest_batch"] == 4
+    run(coalescing(scenario, window=10, max_batch=4))
+
+def test_bad_row_fails_only_its_caller(run):
+    async def scenario(coalescer, conn):
+        project_id = await create_project(conn)
+        results = await asyncio.gather(
+            coalescer.submit(CREATE_TASK, task(project_id, "ok")),
+            coalescer.submit(CREATE_TASK, task(project_id, "bad", priority=9)),
+            coalescer.submit(CREATE_TASK, task(project_id, "also ok")),
+            return_exceptions=True
+        )
+        assert results[0]["title"] == "ok" and results[2]["title"] == "also ok"
+        assert isinstance(results[1], asyncpg.CheckViolationError)
+        assert coalescer.stats()["split_batches"] == 1
+    run(coalescing(scenario))
+
+def test_status_changes(run):
+    async def scenario(coalescer, conn):
+        project_id = await create_project(conn)
+        first, second = await create_tasks(
+            conn, [task(project_id, "first"), task(project_id, "second")]
+        )
+
+        def change(task_id, status):
+            values = {"status": status, "updated_at": datetime.utcnow()}
+            return coalescer.submit(SET_TASK_STATUS, (task_id, values))
+
+        rows = await asyncio.gather(
+            change(first["id"], "in_progress"),
+            change(second["id"], "cancelled"),
+            change(first["id"], "completed"),
+            change(0, "completed"),
+        )
+        # Each caller gets the row its own change left, in caller order
+        assert [row and row["status"] for row in rows] == [
+            "in_progress", "cancelled", "completed", None
+        ]
+        assert rows[0]["updated_at"] < rows[2]["updated_at"]
+        assert coalescer.stats()["batches"] == 1
+        stored = dict(await conn.fetch(
+            "SELECT id, status::text FROM tasks WHERE project_id = $1", project_id
+        ))
+        # The later change to a task wins
+        assert stored == {first["id"]: "completed", second["id"]: "cancelled"}
+    run(coalescing(scenario))
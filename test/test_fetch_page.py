@@ -0,0 +1,75 @@
+"""Page and count queries of base.service, against postgres"""
+import time
+import asyncpg
+import pytest
+from app.modules.base import service
+
+def test_failed_page_cancels_its_count(run):
+    async def scenario(pool, conn):
+        async def fetch(page_conn):
+            raise RuntimeError("page failed")
+
+        started = time.monotonic()
+        with pytest.raises(RuntimeError):
+            await service._fetch_with_exact_count(
+                conn, pool, 'SELECT COUNT(*) FROM pg_sleep(5)', [], fetch
+            )
+        # The count was cancelled rather than left running on a released
+        # connection, and no count slot leaked
+        assert time.monotonic() - started < 2
+        assert service._count_connections == 0
+        async with pool.acquire() as other:
+            assert await other.fetchval('SELECT 1') == 1
+    run(scenario)
+
+def test_count_runs_beside_the_page(run):
+    async def scenario(pool, conn):
+        async def fetch(page_conn):
+            assert page_conn is conn
+            return await page_conn.fetchval('SELECT 42')
+
+        result, total = await service._fetch_with_exact_count(
+            conn, pool, 'SELECT COUNT(*) FROM generate_series(1, 7)', [], fetch
+        )
+        assert (result, total) == (42, 7)
+        assert service._count_connections == 0
+    run(scenario)
+
+def test_slow_reset_of_the_count_connection(run, monkeypatch):
+    # As on a busy server: the reset on release takes a while
+    reset_query = asyncpg.Connection.get_reset_query
+    monkeypatch.setattr(
+        asyncpg.Connection, "get_reset_query",
+        lambda self: f"SELECT pg_sleep({3 * service.COUNT_CONNECTION_TIMEOUT}); "
+        + reset_query(self)
+    )
+
+    async def scenario(pool, conn):
+        async def fetch(page_conn):
+            return await page_conn.fetchval('SELECT 42')
+
+        # The count connection is acquired with a short timeout; returning
+        # it to the pool must not inherit that timeout for its reset
+        result, total = await service._fetch_with_exact_count(
+            conn, pool, 'SELECT COUNT(*) FROM generate_series(1, 7)', [], fetch
+        )
+        assert (result, total) == (42, 7)
+        assert service._count_connections == 0
+    run(scenario)
+
+def test_estimate_uses_statistics_only_without_user_filters(run):
+    async def scenario(pool, conn):
+        await conn.execute('ANALYZE projects')
+        reltuples = await conn.fetchval(
+            "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = 'projects'::regclass"
+        )
+        unfiltered = await service.estimate_count(
+            conn, 'projects', ' WHERE deleted_at IS NULL', [], ('projects',)
+        )
+        assert unfiltered == (reltuples or unfiltered)
+
+        filtered = await service.estimate_count(
+            conn, 'projects', ' WHERE deleted_at IS NULL AND name = $1', ['none'], ()
+        )
+        assert filtered <= 1
+    run(scenario)
@@ -0,0 +1,124 @@
+"""JobRunner claim, retry, reap and lease handling, against postgres"""
+import asyncio
+import uuid
+import pytest
+from app.modules.jobs.runner import JobRunner
+from app.modules.jobs.service import JobService
+
+@pytest.fixture
+def kind():
+    """A job kind no other runner claims"""
+    return f"test.{uuid.uuid4()}"
+
+async def job_row(conn, job_id):
+    return await conn.fetchrow('SELECT * FROM jobs WHERE id = $1', job_id)
+
+def test_claim_runs_job_once(run, kind):
+    async def scenario(pool, conn):
+        seen = []
+
+        async def handler(pool, payload):
+            seen.append(payload)
+
+        runner = JobRunner(pool, handlers={kind: handler})
+        job = await JobService(conn).enqueue(kind, {"n": 1})
+
+        assert await runner._run_one()
+        assert not await runner._run_one()
+        assert seen == [{"n": 1}]
+        row = await job_row(conn, job.id)
+        assert row['status'] == 'completed' and row['attempts'] == 1
+        assert row['locked_by'] is None
+    run(scenario)
+
+def test_failure_retries_then_fails(run, kind):
+    async def scenario(pool, conn):
+        async def handler(pool, payload):
+            raise ValueError("boom")
+
+        runner = JobRunner(pool, backoff=0, handlers={kind: handler})
+        job = await JobService(conn).enqueue(kind, max_attempts=2)
+
+        assert await runner._run_one()
+        row = await job_row(conn, job.id)
+        assert row['status'] == 'queued' and row['attempts'] == 1
+        assert row['last_error'] == "ValueError: boom"
+
+        assert await runner._run_one()
+        row = await job_row(conn, job.id)
+        assert row['status'] == 'failed' and row['attempts'] == 2
+        assert row['finished_at'] is not None
+        assert not await runner._run_one()
+    run(scenario)
+
+def test_reap_requeues_or_fails_expired_jobs(run, kind):
+    async def scenario(pool, conn):
+        async def stalled(attempts, interval_seconds=None):
+            return await conn.fetchval('''
+                INSERT INTO jobs (
+                    kind, status, attempts, max_attempts, interval_seconds,
+                    locked_at, locked_by
+                )
+                VALUES ($1, 'running', $2, 3, $3,
+                        CURRENT_TIMESTAMP - interval '1 hour', 'gone:1')
+                RETURNING id
+            ''', kind, attempts, interval_seconds)
+
+        retry = await stalled(1)
+        exhausted = await stalled(3)
+        recurring = await stalled(3, interval_seconds=600)
+
+        # Reaping happens on the first poll; the kind has no handler here
+        async def handler(pool, payload):
+            pass
+        runner = JobRunner(pool, lease=60, handlers={f"{kind}.other": handler})
+        await runner._run_one()
+
+        row = await job_row(conn, retry)
+        assert (row['status'], row['attempts']) == ('queued', 1)
+        assert row['last_error'] == 'Lease expired on worker gone:1'
+        row = await job_row(conn, exhausted)
+        assert (row['status'], row['attempts']) == ('failed', 3)
+        assert row['finished_at'] is not None
+        row = await job_row(conn, recurring)
+        assert (row['status'], row['attempts']) == ('queued', 0)
+        assert await conn.fetchval(
+            "SELECT run_at > CURRENT_TIMESTAMP + interval '5 minutes' FROM jobs WHERE id = $1",
+            recurring
+        )
+    run(scenario)
+
+def test_heartbeat_keeps_lease(run, kind):
+    async def scenario(pool, conn):
+        lease_renewed = []
+
+        async def handler(pool, payload):
+            claimed = await conn.fetchval(
+                'SELECT locked_at FROM jobs WHERE kind = $1', kind
+            )
+            await asyncio.sleep(0.8)
+            lease_renewed.append(await conn.fetchval(
+                'SELECT locked_at > $2 FROM jobs WHERE kind = $1', kind, claimed
+            ))
+
+        runner = JobRunner(pool, lease=1, handlers={kind: handler})
+        job = await JobService(conn).enqueue(kind)
+        assert await runner._run_one()
+        assert lease_renewed == [True]
+        assert (await job_row(conn, job.id))['status'] == 'completed'
+    run(scenario)
+
+def test_late_finish_is_dropped_after_reap(run, kind):
+    async def scenario(pool, conn):
+        async def handler(pool, payload):
+            # Meanwhile the lease expired and another worker took the job
+            await conn.execute(
+                "UPDATE jobs SET locked_by = 'other:2' WHERE kind = $1", kind
+            )
+
+        runner = JobRunner(pool, handlers={kind: handler})
+        job = await JobService(conn).enqueue(kind)
+        assert await runner._run_one()
+        row = await job_row(conn, job.id)
+        assert (row['status'], row['locked_by']) == ('running', 'other:2')
+    run(scenario)
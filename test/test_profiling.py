@@ -0,0 +1,128 @@
+"""Request profiler on a small app of its own"""
+import sys
+import time
+from typing import List
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+from app.core import profiling
+from app.core.profiling import Profiler, ProfilingMiddleware
+from app.modules.system import SystemModule
+
+class Item(BaseModel):
+    id: int
+    name: str
+    tags: List[str]
+
+ITEMS = [{"id": i, "name": f"item {i}", "tags": ["a", "b", "c"]} for i in range(5000)]
+
+def busy(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+@pytest.fixture
+def profiled():
+    profiler = Profiler(token="secret", interval=0.001, slow_threshold=0.2, buffer_size=3)
+    app = FastAPI()
+    app.state.profiler = profiler
+    app.add_middleware(ProfilingMiddleware, profiler=profiler, path_prefix="/api")
+    app.include_router(SystemModule(app).get_router(), prefix="/system")
+
+    @app.get("/api/busy")
+    async def busy_endpoint():
+        profiling.record("db", 0.01)
+        busy(0.05)
+        return {"ok": True}
+
+    @app.get("/api/items", response_model=List[Item])
+    async def items():
+        return ITEMS
+
+    @app.post("/api/items")
+    async def create_items(items: List[Item]):
+        return {"count": len(items)}
+
+    with TestClient(app) as client:
+        yield profiler, client
+
+def test_header_profiles_request(profiled):
+    profiler, client = profiled
+    response = client.get("/api/busy", headers={"X-Profile-Token": "secret"})
+    assert response.status_code == 200
+    assert "db;dur=10.0" in response.headers["server-timing"]
+
+    profile = profiler.get(int(response.headers["x-profile-id"]))
+    assert profile.reason == "header" and profile.status_code == 200
+    assert sum(profile.stacks.values()) > 5
+    assert profile.phases["app"] > 5
+    assert any("busy_endpoint" in line and "busy (" in line for line in profile.collapsed())
+    assert all(line.startswith("GET /api/busy;") for line in profile.collapsed())
+
+def test_validation_and_serialization_phases(profiled):
+    profiler, client = profiled
+    headers = {"X-Profile-Token": "secret"}
+    response = client.get("/api/items", headers=headers)
+    profile = profiler.get(int(response.headers["x-profile-id"]))
+    assert profile.phases["serialization"] > profile.phases["validation"]
+
+    response = client.post("/api/items", json=ITEMS, headers=headers)
+    profile = profiler.get(int(response.headers["x-profile-id"]))
+    assert profile.phases["validation"] > profile.phases["serialization"]
+
+def test_unprofiled_requests(profiled):
+    profiler, client = profiled
+    response = client.get("/api/busy", headers={"X-Profile-Token": "wrong"})
+    assert "x-profile-id" not in response.headers
+    # Fast and not asked for: not kept
+    assert list(profiler.profiles) == []
+
+    profiler.slow_threshold = 0.01
+    client.get("/api/busy")
+    (profile,) = profiler.profiles
+    assert profile.reason == "slow" and profile.duration >= 0.05
+    assert profile.collapsed() == []
+    # Waits are still measured; sampled phases are left out
+    summary = profile.summary()
+    assert summary["samples"] == 0
+    assert set(summary["breakdown_ms"]) == {"db", "pool_wait", "admission_wait", "other"}
+    assert summary["breakdown_ms"]["db"] == 10.0
+
+def test_collapsed_needs_stacks(profiled):
+    profiler, client = profiled
+    headers = {"X-Profile-Token": "secret"}
+    profiler.slow_threshold = 0.01
+    assert "x-profile-id" not in client.get("/api/busy").headers
+    (slow,) = profiler.profiles
+
+    response = client.get(f"/system/profiles/{slow.id}", params={"format": "collapsed"},
+                          headers=headers)
+    assert response.status_code == 404
+    assert "timings only" in response.json()["detail"]
+    response = client.get("/system/profiles", params={"format": "collapsed"}, headers=headers)
+    assert response.status_code == 404
+
+    sampled = client.get("/api/busy", headers=headers).headers["x-profile-id"]
+    response = client.get(f"/system/profiles/{sampled}", params={"format": "collapsed"},
+                          headers=headers)
+    assert response.status_code == 200
+    assert response.text.startswith("GET /api/busy;")
+    response = client.get(f"/system/profiles/{slow.id}", headers=headers)
+    assert response.json()["stacks"] == []
+
+def test_switch_interval_restored(profiled):
+    profiler, client = profiled
+    before = sys.getswitchinterval()
+    client.get("/api/busy", headers={"X-Profile-Token": "secret"})
+    assert sys.getswitchinterval() == before
+    assert profiler._active == {}
+
+def test_ring_buffer_is_bounded(profiled):
+    profiler, client = profiled
+    ids = [
+        int(client.get("/api/busy", headers={"X-Profile-Token": "secret"})
+            .headers["x-profile-id"])
+        for _ in range(5)
+    ]
+    assert [profile.id for profile in profiler.profiles] == ids[-3:]
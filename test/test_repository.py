@@ -0,0 +1,303 @@
+"""Conformance suite every storage backend must pass"""
+import asyncio
+import uuid
+from datetime import date, timedelta
+import pytest
+from app.modules.base.memory import MemoryBackend
+from app.modules.base.repository import DuplicateError
+from app.modules.base.schema import CountMode
+
+TODAY = date.today()
+
+@pytest.fixture(params=["memory", "postgres"])
+def run(request):
+    """Run `fn(storage)` against each backend"""
+    if request.param == "memory":
+        backend = MemoryBackend()
+        call = lambda fn: asyncio.run(fn())
+    else:
+        request.getfixturevalue("pool")
+        client = request.getfixturevalue("client")
+        backend = client.app.state.storage
+        call = client.portal.call
+
+    def run(fn):
+        async def session():
+            async with backend.session() as storage:
+                return await fn(storage)
+        return call(session)
+    return run
+
+def unique(name):
+    return f"{name}-{uuid.uuid4()}"
+
+async def create_project(storage, name=None, **values):
+    return await storage.projects.create({
+        "name": name or unique("project"),
+        "status": "planning",
+        **values
+    })
+
+async def create_task(storage, project_id, **values):
+    return await storage.tasks.create({
+        "project_id": project_id,
+        "title": "task",
+        "assignee": "alice",
+        "start_date": TODAY,
+        "end_date": TODAY + timedelta(days=7),
+        "priority": 3,
+        "status": "pending",
+        **values
+    })
+
+def test_project_crud(run):
+    async def scenario(storage):
+        projects = storage.projects
+        name = unique("crud")
+        project = await create_project(storage, name, description="first")
+        assert project["name"] == name
+        assert project["status"] == "planning"
+        assert project["created_at"] is not None
+        assert await projects.exists(project["id"])
+        assert (await projects.get(project["id"]))["description"] == "first"
+
+        with pytest.raises(DuplicateError):
+            await create_project(storage, name)
+
+        other = await create_project(storage)
+        with pytest.raises(DuplicateError):
+            await projects.update(other["id"], {"name": name})
+
+        updated = await projects.update(project["id"], {"status": "active"})
+        assert updated["status"] == "active"
+        assert await projects.update(0, {"status": "active"}) is None
+
+        # Renaming frees the old name and reserves the new one
+        original, renamed = other["name"], unique("renamed")
+        assert (await projects.update(other["id"], {"name": renamed}))["name"] == renamed
+        with pytest.raises(DuplicateError):
+            await projects.update(project["id"], {"name": renamed})
+        reused = await create_project(storage, original)
+        await projects.delete(reused["id"])
+
+        found = await projects.get_many([project["id"], other["id"], 0])
+        assert {row["id"] for row in found} == {project["id"], other["id"]}
+
+        await create_task(storage, project["id"])
+        assert await create_task(storage, 0) is None
+        assert await projects.delete(project["id"])
+        assert not await projects.delete(project["id"])
+        assert await projects.get(project["id"]) is None
+        assert not await projects.exists(project["id"])
+        assert await create_task(storage, project["id"]) is None
+        assert (await projects.get_purge(project["id"]))["project_id"] == project["id"]
+        assert await projects.get_purge(other["id"]) is None
+
+        # The name is free again once the project is gone
+        await create_project(storage, name)
+    run(scenario)
+
+def test_project_list(run):
+    async def scenario(storage):
+        prefix = unique("list")
+        created = [
+            await create_project(storage, f"{prefix} {i}", status=status)
+            for i, status in enumerate(["planning", "active", "active", "completed"])
+        ]
+        await create_project(storage, unique("other"), description=f"about {prefix}")
+
+        rows, total, has_more = await storage.projects.list(search=prefix, page_size=10)
+        assert total == 5 and not has_more
+        assert rows[1:] == list(reversed(created))
+
+        rows, total, has_more = await storage.projects.list(
+            search=prefix.upper(), status="active", page_size=1
+        )
+        assert total == 2 and has_more
+        assert [row["id"] for row in rows] == [created[2]["id"]]
+
+        rows, total, has_more = await storage.projects.list(
+            search=prefix, status="active", page=2, page_size=1, count=CountMode.NONE
+        )
+        assert total is None and not has_more
+        assert [row["id"] for row in rows] == [created[1]["id"]]
+    run(scenario)
+
+def test_task_list_filters_and_pages(run):
+    async def scenario(storage):
+        project = await create_project(storage)
+        specs = [
+            ("alice", "pending", 1),
+            ("bob", "pending", 2),
+            ("alice", "completed", 2),
+            ("bob", "in_progress", 5),
+            ("alice", "pending", 5),
+            ("carol", "cancelled", 1),
+            ("alice", "pending", 2),
+        ]
+        tasks = [
+            await create_task(
+                storage, project["id"], title=f"t{i}",
+                assignee=assignee, status=status, priority=priority
+            )
+            for i, (assignee, status, priority) in enumerate(specs)
+        ]
+        newest_first = [task["id"] for task in reversed(tasks)]
+
+        async def ids(**filters):
+            rows, total, _ = await storage.tasks.list(
+                project_id=project["id"], page_size=100, **filters
+            )
+            assert total == len(rows)
+            return [row["id"] for row in rows]
+
+        assert await ids() == newest_first
+        assert await ids(assignee="alice", status="pending") == [
+            tasks[6]["id"], tasks[4]["id"], tasks[0]["id"]
+        ]
+        assert await ids(priority=2) == [tasks[6]["id"], tasks[2]["id"], tasks[1]["id"]]
+        assert await ids(assignee="nobody") == []
+
+        pages = []
+        for page in (1, 2, 3):
+            rows, total, has_more = await storage.tasks.list(
+                project_id=project["id"], page=page, page_size=3
+            )
+            assert total == 7
+            assert has_more == (page < 3)
+            pages += [row["id"] for row in rows]
+        assert pages == newest_first
+
+        rows, total, has_more = await storage.tasks.list(
+            project_id=project["id"], page_size=5, count=CountMode.NONE
+        )
+        assert total is None and has_more and len(rows) == 5
+
+        row = rows[0]
+        assert row["title"] == "t6" and row["start_date"] == TODAY
+        assert row["project_id"] == project["id"] and row["updated_at"] is None
+    run(scenario)
+
+def test_task_get_update_delete(run):
+    async def scenario(storage):
+        project = await create_project(storage)
+        task = await create_task(storage, project["id"], description="notes")
+        assert (await storage.tasks.get(task["id"]))["description"] == "notes"
+
+        updated = await storage.tasks.update(task["id"], {"status": "completed", "priority": 4})
+        assert updated["status"] == "completed" and updated["priority"] == 4
+        assert (await storage.tasks.get(task["id"]))["status"] == "completed"
+        assert await storage.tasks.update(0, {"priority": 1}) is None
+
+        changed = await storage.tasks.set_status(task["id"], "cancelled")
+        assert changed["status"] == "cancelled" and changed["priority"] == 4
+        assert changed["updated_at"] is not None
+        assert await storage.tasks.set_status(0, "cancelled") is None
+        await storage.tasks.set_status(task["id"], "completed")
+
+        rows, _, _ = await storage.tasks.list(project_id=project["id"], status="completed")
+        assert [row["id"] for row in rows] == [task["id"]]
+        rows, _, _ = await storage.tasks.list(project_id=project["id"], status="pending")
+        assert rows == []
+
+        found = await storage.tasks.get_many([task["id"], 0])
+        assert [row["id"] for row in found] == [task["id"]]
+
+        assert await storage.tasks.delete(task["id"])
+        assert not await storage.tasks.delete(task["id"])
+        assert await storage.tasks.get(task["id"]) is None
+    run(scenario)
+
+def test_statistics_and_embedded_tasks(run):
+    async def scenario(storage):
+        project = await create_project(storage)
+        empty = await create_project(storage)
+        yesterday = TODAY - timedelta(days=1)
+        late = await create_task(storage, project["id"], end_date=yesterday, priority=1,
+                                 start_date=yesterday - timedelta(days=3))
+        done = await create_task(storage, project["id"], end_date=yesterday, priority=5,
+                                 start_date=yesterday, status="completed")
+        urgent = await create_task(storage, project["id"], priority=5, status="in_progress")
+
+        stats = await storage.projects.statistics([project["id"], empty["id"]])
+        assert {
+            key: stats[project["id"]][key]
+            for key in ("total_tasks", "completed_tasks", "pending_tasks", "overdue_tasks")
+        } == {"total_tasks": 3, "completed_tasks": 1, "pending_tasks": 1, "overdue_tasks": 1}
+        assert stats.get(empty["id"], {"total_tasks": 0})["total_tasks"] == 0
+
+        async def embedded(order, limit=10):
+            tasks = await storage.projects.tasks([project["id"], empty["id"]], limit, order)
+            assert tasks[empty["id"]] == []
+            return [row["id"] for row in tasks[project["id"]]]
+
+        assert await embedded("priority") == [done["id"], urgent["id"], late["id"]]
+        assert await embedded("end_date") == [late["id"], done["id"], urgent["id"]]
+        assert await embedded("created_at", limit=2) == [urgent["id"], done["id"]]
+    run(scenario)
+
+def test_timeline(run):
+    async def scenario(storage):
+        project = await create_project(storage)
+        start = date(2024, 3, 1)
+        first = await create_task(storage, project["id"], priority=2,
+                                  start_date=start, end_date=start + timedelta(days=2))
+        # Dates saved in the wrong order still cover their range
+        second = await create_task(storage, project["id"], priority=3,
+                                   start_date=start + timedelta(days=4), end_date=start + timedelta(days=1))
+        await create_task(storage, project["id"], start_date=start + timedelta(days=10),
+                          end_date=start + timedelta(days=12))
+
+        rows = await storage.tasks.timeline(
+            start + timedelta(days=2), start + timedelta(days=3), project_id=project["id"]
+        )
+        assert [row["id"] for row in rows] == [first["id"], second["id"]]
+        rows = await storage.tasks.timeline(
+            start, start + timedelta(days=30), project_id=project["id"], limit=1
+        )
+        assert [row["id"] for row in rows] == [first["id"]]
+
+        buckets = await storage.tasks.day_buckets(
+            start + timedelta(days=2), start + timedelta(days=5), project_id=project["id"]
+        )
+        assert {
+            day: (row["task_count"], row["priority_total"]) for day, row in buckets.items()
+        } == {
+            start + timedelta(days=2): (2, 5),
+            start + timedelta(days=3): (1, 3),
+            start + timedelta(days=4): (1, 3),
+        }
+    run(scenario)
+
+def test_next_up(run):
+    async def scenario(storage):
+        # Other tests leave projects behind; only look at these two
+        first = await create_project(storage)
+        second = await create_project(storage, status="active")
+        done = await create_project(storage, status="completed")
+        later = TODAY + timedelta(days=30)
+
+        low = await create_task(storage, first["id"], priority=1)
+        due_late = await create_task(storage, first["id"], priority=5, end_date=later)
+        due_soon = await create_task(storage, first["id"], priority=5, assignee="bob")
+        await create_task(storage, first["id"], priority=5, status="completed")
+        await create_task(storage, first["id"], priority=5, status="cancelled")
+        working = await create_task(storage, second["id"], priority=2, status="in_progress")
+        await create_task(storage, done["id"], priority=5)
+
+        async def ids(per_project, **filters):
+            rows = await storage.tasks.next_up(per_project, **filters)
+            rows = [row for row in rows if row["project_id"] in (first["id"], second["id"])]
+            return [row["id"] for row in rows]
+
+        assert await ids(2) == [due_soon["id"], due_late["id"], working["id"]]
+        assert await ids(10) == [due_soon["id"], due_late["id"], low["id"], working["id"]]
+        assert await ids(10, assignee="bob") == [due_soon["id"]]
+        assert await ids(10, status="in_progress") == [working["id"]]
+
+        rows = await storage.tasks.next_up(1, assignee="bob")
+        assert [row["project_name"] for row in rows if row["id"] == due_soon["id"]] == [
+            first["name"]
+        ]
+        assert all(row["project_id"] != done["id"] for row in rows)
+    run(scenario)
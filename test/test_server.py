@@ -0,0 +1,71 @@
+"""Worker and connection planning for `python -m app serve`"""
+import pytest
+from app.core import server
+from app.core.config import get_settings
+
+@pytest.fixture
+def settings(monkeypatch):
+    """Patch settings for plan_workers(); returns a function taking overrides"""
+    def configure(**values):
+        patched = get_settings().model_copy(update={
+            "WEB_WORKERS": 0,
+            "DB_POOL_MIN_SIZE": 10,
+            "DB_POOL_MAX_SIZE": 10,
+            "DB_RESERVED_CONNECTIONS": 5,
+            "DB_COUNT_CONNECTIONS": 2,
+            "WRITE_COALESCE_ENABLED": False,
+            **values,
+        })
+        monkeypatch.setattr(server, "get_settings", lambda: patched)
+        return patched
+    monkeypatch.setattr(server, "cpu_count", lambda: 4)
+    return configure
+
+def test_without_budget_uses_configured_pool(settings):
+    settings()
+    assert server.plan_workers(0, None) == (4, 10, 10)
+    assert server.plan_workers(2, None) == (2, 10, 10)
+
+def test_pool_is_split_across_workers(settings):
+    settings()
+    workers, pool_min, pool_max = server.plan_workers(0, 25)
+    assert (workers, pool_min, pool_max) == (4, 5, 5)
+    assert workers * pool_max <= 25 - 5
+
+def test_workers_are_reduced_to_fit(settings):
+    # Each worker needs its 2 count connections plus one for requests
+    settings(WEB_WORKERS=8)
+    assert server.plan_workers(0, 14) == (3, 3, 3)
+
+def test_coalescer_connection_is_counted(settings):
+    config = settings(WRITE_COALESCE_ENABLED=True, DB_POOL_MAX_SIZE=2)
+    assert server.pool_overhead(config) == 3
+    # The pool grows to hold the overhead and one request
+    assert server.plan_workers(1, None) == (1, 4, 4)
+    assert server.request_capacity(config) == 1
+
+def test_budget_too_small(settings):
+    settings()
+    with pytest.raises(SystemExit):
+        server.plan_workers(0, 7)
+
+def test_request_capacity_leaves_room(settings):
+    config = settings(WRITE_COALESCE_ENABLED=True)
+    assert server.request_capacity(config) == 7
+
+def test_serve_falls_back_to_default_budget(settings, monkeypatch):
+    settings(DB_MAX_CONNECTIONS=0)
+    planned = []
+
+    async def unreachable():
+        return None
+
+    def plan(workers, budget):
+        planned.append(budget)
+        raise SystemExit
+    monkeypatch.setattr(server, "probe_connection_budget", unreachable)
+    monkeypatch.setattr(server, "plan_workers", plan)
+
+    with pytest.raises(SystemExit):
+        server.serve()
+    assert planned == [server.DEFAULT_CONNECTION_BUDGET]
@@ -0,0 +1,124 @@
+"""SingleFlight sharing rules, without a database"""
+import asyncio
+import pytest
+from app.modules.base.singleflight import SingleFlight, begin_request
+
+class Query:
+    """Stand-in for a query: counts executions, finishes when released"""
+
+    def __init__(self, result="rows"):
+        self.result = result
+        self.executions = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.executions += 1
+        await self.release.wait()
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+async def request(flights: SingleFlight, query: Query, key="key"):
+    """A request that arrives now and reads once the others have arrived"""
+    begin_request()
+    await asyncio.sleep(0)
+    return await flights.run(key, query)
+
+async def started(coro):
+    task = asyncio.ensure_future(coro)
+    await asyncio.sleep(0.01)
+    return task
+
+def test_concurrent_reads_share_one_execution():
+    async def scenario():
+        flights, query = SingleFlight(), Query()
+        # Requests that arrived before the flight started share it
+        reads = await started(asyncio.gather(
+            request(flights, query),
+            request(flights, query),
+            request(flights, query, key="other"),
+        ))
+        query.release.set()
+
+        assert await reads == ["rows"] * 3
+        assert query.executions == 2
+        assert flights.stats() == {"executed": 2, "coalesced": 1, "in_flight": 0}
+    asyncio.run(scenario())
+
+def test_no_join_after_invalidate():
+    async def scenario():
+        flights, query = SingleFlight(), Query()
+
+        async def write_between_reads():
+            begin_request()
+            first = await started(flights.run("key", query))
+            # A write committed here: later reads must not share the old flight
+            flights.invalidate()
+            second = await started(flights.run("key", query))
+            query.release.set()
+            await asyncio.gather(first, second)
+
+        await write_between_reads()
+        assert query.executions == 2
+    asyncio.run(scenario())
+
+def test_no_join_on_flight_older_than_request():
+    async def scenario():
+        flights, query = SingleFlight(), Query()
+        first = await started(request(flights, query))
+        # A request arriving after the flight started (say, after a write
+        # committed by another process) runs its own query
+        second = await started(request(flights, query))
+        assert query.executions == 2
+        query.release.set()
+        await asyncio.gather(first, second)
+    asyncio.run(scenario())
+
+def test_reads_outside_requests_never_join_older_flights():
+    async def scenario():
+        flights, query = SingleFlight(), Query()
+        first = await started(flights.run("key", query))
+        second = await started(flights.run("key", query))
+        query.release.set()
+        await asyncio.gather(first, second)
+        assert query.executions == 2
+    asyncio.run(scenario())
+
+def test_error_reaches_every_caller():
+    async def scenario():
+        flights, query = SingleFlight(), Query(ValueError("boom"))
+
+        async def two_reads():
+            begin_request()
+            return await asyncio.gather(
+                flights.run("key", query),
+                flights.run("key", query),
+                return_exceptions=True
+            )
+        reads = await started(two_reads())
+        query.release.set()
+        results = await reads
+        assert [type(result) for result in results] == [ValueError, ValueError]
+        assert query.executions == 1
+    asyncio.run(scenario())
+
+def test_joiner_retries_when_leader_is_cancelled():
+    async def scenario():
+        flights, query = SingleFlight(), Query()
+
+        async def two_reads():
+            begin_request()
+            leader = asyncio.ensure_future(flights.run("key", query))
+            await asyncio.sleep(0.01)
+            joiner = asyncio.ensure_future(flights.run("key", query))
+            await asyncio.sleep(0.01)
+            leader.cancel()
+            await asyncio.sleep(0.01)
+            query.release.set()
+            with pytest.raises(asyncio.CancelledError):
+                await leader
+            return await joiner
+
+        assert await two_reads() == "rows"
+        assert query.executions == 2
+    asyncio.run(scenario())